@@ -1,100 +1,194 @@
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, request, jsonify, session, redirect, url_for, g, Response, stream_with_context, send_file
 from flask_cors import CORS
-import sqlite3
+import atexit
+import functools
+import importlib.util
 import json
 import os
-from models.ml_model import FARecommendationModel
+import tempfile
+import time
+import zlib
+from models.batch_scheduler import InferenceBatcher
+from models.model_loader import LazyModel
+from models.prediction_cache import PredictionCache, SqliteCacheStore
+from models.retrain import RetrainScheduler
+from utils.analytics import assessment_summary
+from utils.auth import PasswordHasher, UserCache, hash_password
+from utils.bulk_import import ADMIN_ROLE, MAX_ROWS, bulk_insert, read_csv
+from utils.db import ConnectionPool
+from utils.export import FORMATS, export_query, iter_chunks, iter_csv, iter_ndjson, write_parquet
+from utils.memory import process_memory
+from utils.metrics import registry as metrics
+from utils.schema import create_tables, migrate
+from utils.write_behind import WriteBehindQueue
 from utils.rubric_generator import RubricGenerator
+from utils.rubric_renderer import RubricHtmlRenderer
 
 app = Flask(__name__)
 app.secret_key = 'fa_recommendation_secret_key'
+app.config['DATABASE'] = os.environ.get('FA_DB_PATH', 'fa_system.db')
+# FA_DB_POOL_SIZE=0 opens a fresh connection per request (no pooling/WAL)
+app.config['DB_POOL_SIZE'] = int(os.environ.get('FA_DB_POOL_SIZE', 8))
 CORS(app)
 
-# Initialize ML model and rubric generator
-fa_model = FARecommendationModel()
+# Shared SQLite connections (WAL, synchronous=NORMAL, busy timeout)
+db_pool = ConnectionPool(app.config['DATABASE'], size=app.config['DB_POOL_SIZE'])
+atexit.register(db_pool.close)
+
+def get_db():
+    """Connection for the current app context, checked out of the pool once"""
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# Initialize rubric generator (the ML model is set up after the database)
 rubric_gen = RubricGenerator()
+rubric_renderer = RubricHtmlRenderer()
 
 # Database setup
 def init_db():
-    conn = sqlite3.connect('fa_system.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        create_tables(conn)
+        cursor = conn.cursor()
 
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS assessments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            teacher_id INTEGER,
-            subject_name TEXT NOT NULL,
-            assessment_name TEXT NOT NULL,
-            bloom_level TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_active BOOLEAN DEFAULT 1,
-            FOREIGN KEY (teacher_id) REFERENCES users (id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS student_responses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            assessment_id INTEGER,
-            student_id INTEGER,
-            year_of_study INTEGER,
-            study_hours INTEGER,
-            confidence_level INTEGER,
-            learning_mode INTEGER,
-            difficulty_level INTEGER,
-            time_available INTEGER,
-            topic_type INTEGER,
-            resources TEXT,
-            previous_tools TEXT,
-            bloom_focus TEXT,
-            predicted_tool TEXT,
-            confidence_score REAL,
-            explanation TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (assessment_id) REFERENCES assessments (id),
-            FOREIGN KEY (student_id) REFERENCES users (id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS rubrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            assessment_id INTEGER,
-            total_marks INTEGER,
-            rubric_data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (assessment_id) REFERENCES assessments (id)
-        )
-    ''')
+        # Default users, hashed only when missing so startup doesn't pay for it every time
+        default_users = [('teacher1', 'teacher123', 'teacher'),
+                         ('student1', 'student123', 'student'),
+                         ('student2', 'student123', 'student')]
+        existing = {row[0] for row in cursor.execute('SELECT username FROM users WHERE username IN (?, ?, ?)',
+                                                     [username for username, _, _ in default_users])}
+        cursor.executemany('INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)',
+                           [(username, hash_password(password), role)
+                            for username, password, role in default_users if username not in existing])
 
-    # Default users
-    cursor.execute('INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)',
-                   ('teacher1', 'teacher123', 'teacher'))
-    cursor.execute('INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)',
-                   ('student1', 'student123', 'student'))
-    cursor.execute('INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)',
-                   ('student2', 'student123', 'student'))
+        conn.commit()
 
-    conn.commit()
-    conn.close()
+        migrate(conn)
 
 # Init DB + Model
 init_db()
-if not fa_model.load_model():
-    if os.path.exists('data/dataset.csv'):
-        fa_model.train_model('data/dataset.csv')
-    else:
-        print("⚠️ No dataset found in data/ directory")
+
+# FA_PRECOMPUTED=1 serves predictions from the exhaustive lookup table,
+# FA_COMPILED=1 from the flattened NumPy forest (no sklearn import).
+# FA_MODEL_LOADING=lazy defers importing/loading the model to the first
+# prediction, =background loads it in a thread while the server starts.
+# The model file is polled every FA_MODEL_WATCH_INTERVAL seconds (0 = off)
+# and hot-reloaded when it changes.
+fa_model = LazyModel(
+    mode=os.environ.get('FA_MODEL_LOADING', 'eager'),
+    watch_interval=float(os.environ.get('FA_MODEL_WATCH_INTERVAL', 5)),
+    precomputed=os.environ.get('FA_PRECOMPUTED') == '1',
+    compiled=os.environ.get('FA_COMPILED') == '1'
+)
+
+# Identical encoded submissions are answered from an LRU of
+# FA_PREDICTION_CACHE_SIZE predictions (0 = off), emptied when the model
+# version changes. FA_PREDICTION_CACHE_DB names a SQLite file that the
+# workers on a host share as a second level.
+cache_size = int(os.environ.get('FA_PREDICTION_CACHE_SIZE', 4096))
+cache_db = os.environ.get('FA_PREDICTION_CACHE_DB')
+prediction_cache = PredictionCache(
+    cache_size, store=SqliteCacheStore(cache_db) if cache_db else None
+) if cache_size > 0 else None
+
+# Concurrent single submissions are scored together: a prediction waits up
+# to FA_BATCH_MAX_WAIT_MS for others (at most FA_BATCH_MAX_SIZE per batch)
+# when another one is in flight, and runs directly otherwise. 0 = off.
+inference_batcher = InferenceBatcher(
+    fa_model,
+    max_wait=float(os.environ.get('FA_BATCH_MAX_WAIT_MS', 2)) / 1e3,
+    max_batch=int(os.environ.get('FA_BATCH_MAX_SIZE', 32)),
+    cache=prediction_cache
+)
+atexit.register(inference_batcher.close)
+
+# FA_RETRAIN_INTERVAL=<seconds> retrains from stored responses in a child
+# process on that schedule; published models are picked up by the watcher.
+retrain_interval = float(os.environ.get('FA_RETRAIN_INTERVAL', 0))
+retrain_scheduler = RetrainScheduler(retrain_interval, app.config['DATABASE']) if retrain_interval > 0 else None
+
+# Password checks run on FA_AUTH_THREADS hashing threads (default a quarter
+# of the cores), so a login storm can't take the CPU from predictions; past
+# FA_AUTH_MAX_PENDING waiting logins the rest get a 503. Username lookups
+# are cached for FA_USER_CACHE_TTL seconds (0 = off).
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('FA_AUTH_THREADS', max(1, (os.cpu_count() or 1) // 4))),
+    max_pending=int(os.environ.get('FA_AUTH_MAX_PENDING', 64))
+)
+atexit.register(password_hasher.close)
+# Bulk user imports hash on FA_IMPORT_THREADS threads of their own, so an
+# import can't fill the login pool; over HTTP they are capped at
+# FA_IMPORT_MAX_USERS rows (larger cohorts go through python -m utils.bulk_import).
+import_hasher = PasswordHasher(max_workers=int(os.environ.get('FA_IMPORT_THREADS', 1)))
+atexit.register(import_hasher.close)
+MAX_HTTP_IMPORT_USERS = int(os.environ.get('FA_IMPORT_MAX_USERS', 500))
+user_cache_ttl = float(os.environ.get('FA_USER_CACHE_TTL', 30))
+user_cache = UserCache(ttl=user_cache_ttl) if user_cache_ttl > 0 else None
+
+# FA_METRICS=1 records request and stage timings for GET /metrics
+# (Prometheus text format). Off, the request hooks aren't even installed.
+metrics.enable(os.environ.get('FA_METRICS') == '1')
+
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+def _record_request(response):
+    # The rule, not the path, keeps label cardinality bounded
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.observe_request(route, request.method, response.status_code,
+                            time.perf_counter() - g.request_started)
+    return response
+
+def _app_metrics():
+    """Stats the app already keeps, read at scrape time"""
+    writes = response_writer.stats()
+    batching = inference_batcher.stats()
+    samples = [
+        ('fa_write_rows_total', 'counter', 'Response rows written by the write-behind queue', {}, writes['rows_written']),
+        ('fa_write_rows_dropped_total', 'counter', 'Response rows dropped (queue full or flush failed)', {},
+         writes['rows_dropped']),
+        ('fa_write_queue_depth', 'gauge', 'Row batches waiting for the writer', {}, writes['queue_depth']),
+        ('fa_inference_calls_total', 'counter', 'Single predictions by path', {'path': 'direct'},
+         batching['direct_calls']),
+        ('fa_inference_calls_total', 'counter', 'Single predictions by path', {'path': 'batched'},
+         batching['batched_calls']),
+        ('fa_inference_batches_total', 'counter', 'Micro-batches run', {}, batching['batches']),
+        ('fa_model_info', 'gauge', 'Version of the served model', {'version': fa_model.version or ''}, 1),
+    ]
+    hashing = password_hasher.stats()
+    samples += [
+        ('fa_password_hashes_total', 'counter', 'Password hashes and checks run', {}, hashing['hashes']),
+        ('fa_password_busy_total', 'counter', 'Logins turned away with the hashing pool full', {}, hashing['busy']),
+        ('fa_password_pending', 'gauge', 'Password checks queued or running', {}, hashing['pending']),
+    ]
+    if user_cache is not None:
+        users = user_cache.stats()
+        samples += [
+            ('fa_user_cache_hits_total', 'counter', 'Login lookups answered from the user cache', {}, users['hits']),
+            ('fa_user_cache_misses_total', 'counter', 'Login lookups that read the users table', {}, users['misses']),
+        ]
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        samples += [
+            ('fa_prediction_cache_hits_total', 'counter', 'Prediction cache hits', {'level': 'local'}, cache['hits']),
+            ('fa_prediction_cache_hits_total', 'counter', 'Prediction cache hits', {'level': 'shared'},
+             cache['shared_hits']),
+            ('fa_prediction_cache_misses_total', 'counter', 'Predictions computed and cached', {}, cache['misses']),
+            ('fa_prediction_cache_evictions_total', 'counter', 'LRU evictions', {}, cache['evictions']),
+            ('fa_prediction_cache_size', 'gauge', 'Predictions held in the LRU', {}, cache['size']),
+        ]
+    return samples
+
+if metrics.enabled:
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    metrics.add_collector(_app_metrics)
 
 # ---------- ROUTES ---------- #
 
@@ -102,24 +196,61 @@ if not fa_model.load_model():
 def index():
     return jsonify({"status": "Backend is running", "message": "FA Tool Recommendation System API"})
 
+def _readiness():
+    """Model status plus the ready flag (lazy mode loads on demand, so is always ready)"""
+    status = fa_model.status()
+    status['ready'] = status['model_loaded'] or (fa_model.mode == 'lazy' and not status['error'])
+    return status
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 503 until the model is loaded"""
+    status = _readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+def _find_user(username):
+    """(id, role, password hash) for a username, or None"""
+    user = user_cache.get(username) if user_cache is not None else None
+    if user is None:
+        row = get_db().execute('SELECT id, role, password FROM users WHERE username = ?', (username,)).fetchone()
+        if row is not None:
+            user = tuple(row)
+            if user_cache is not None:
+                user_cache.put(username, user)
+    return user
+
+def _upgrade_hash(username, user_id, stored, password):
+    """Re-hash a password stored with older parameters, now that we know it"""
+    new_hash = password_hasher.hash(password)
+    if new_hash is None:
+        return  # pool busy: the next login will try again
+    conn = get_db()
+    conn.execute('UPDATE users SET password = ? WHERE id = ? AND password = ?', (new_hash, user_id, stored))
+    conn.commit()
+    if user_cache is not None:
+        user_cache.invalidate(username)
+
 @app.route('/login', methods=['POST'])
 def login():
     data = request.json
     username = data.get("username")
     password = data.get("password")
 
-    conn = sqlite3.connect('fa_system.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, username, role FROM users WHERE username = ? AND password = ?',
-                   (username, password))
-    user = cursor.fetchone()
-    conn.close()
-
-    if user:
-        session['user_id'] = user[0]
-        session['username'] = user[1]
-        session['role'] = user[2]
-        return jsonify({"message": "Login successful", "role": user[2], "username": user[1]})
+    user = _find_user(username) if isinstance(username, str) else None
+    # Unknown users are checked against a dummy hash, so they take as long as a wrong password
+    with metrics.stage('password_verify'):
+        verified = password_hasher.verify(password, user[2] if user else None)
+    if verified is None:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    if verified:
+        user_id, role, stored = user
+        if password_hasher.needs_rehash(stored):
+            _upgrade_hash(username, user_id, stored, password)
+        session['user_id'] = user_id
+        session['username'] = username
+        session['role'] = role
+        return jsonify({"message": "Login successful", "role": role, "username": username})
     else:
         return jsonify({"error": "Invalid credentials"}), 401
 
@@ -129,18 +260,96 @@ def logout():
     return jsonify({"message": "Logged out"})
 
 # Teacher endpoints
+ASSESSMENT_FIELDS = ('id', 'teacher_id', 'subject_name', 'assessment_name', 'bloom_level', 'created_at', 'is_active')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _listing_params(args):
+    """(fields, limit, after_id, is_active, error) from the listing query string"""
+    fields = tuple(name for name in args.get('fields', '').split(',') if name) or ASSESSMENT_FIELDS
+    unknown = [name for name in fields if name not in ASSESSMENT_FIELDS]
+    if unknown:
+        return None, None, None, None, f"Unknown fields {unknown}, expected some of {', '.join(ASSESSMENT_FIELDS)}"
+    # id is the page cursor, so it's always returned (first, for next_after_id)
+    fields = ('id',) + tuple(name for name in fields if name != 'id')
+
+    # Parsed here rather than with args.get(type=int), which turns a malformed
+    # value into the default and would silently restart a bad cursor at page 1
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = None
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return None, None, None, None, f"limit must be between 1 and {MAX_PAGE_SIZE}"
+    try:
+        after_id = int(args.get('after_id', 0))
+    except ValueError:
+        after_id = None
+    if after_id is None or after_id < 0:
+        return None, None, None, None, "after_id must be a non-negative integer"
+
+    is_active = args.get('is_active')
+    if is_active not in (None, '0', '1'):
+        return None, None, None, None, "is_active must be 0 or 1"
+    return fields, limit, after_id, None if is_active is None else int(is_active), None
+
+@functools.lru_cache(maxsize=128)
+def _listing_query(fields, filter_active):
+    """SELECT and row serializer for a projection, built once per (fields, filter) combination"""
+    sql = f'''
+        SELECT {', '.join(fields)} FROM assessments
+        WHERE teacher_id = ? {'AND is_active = ?' if filter_active else ''} AND id > ?
+        ORDER BY id LIMIT ?
+    '''
+    return sql, lambda row: dict(zip(fields, row))
+
+def _listing_etag(conn, teacher_id, query_string):
+    """ETag from the teacher's assessment_versions counter (bumped by triggers) and the query"""
+    row = conn.execute('SELECT version FROM assessment_versions WHERE teacher_id = ?', (teacher_id,)).fetchone()
+    return f"a{teacher_id}-{row[0] if row else 0}-{zlib.crc32(query_string):08x}"
+
 @app.route('/teacher/assessments', methods=['GET'])
 def teacher_assessments():
+    """A page of the teacher's assessments, oldest first.
+
+    ?limit (default 100, at most 1000) and ?after_id (the previous page's
+    next_after_id) page by id; ?fields=id,assessment_name,... projects the
+    columns and ?is_active=0|1 filters. Rows come back as objects. The
+    ETag changes whenever any of the teacher's assessments do, so
+    If-None-Match gets a 304 without running the listing query.
+    """
     if session.get('role') != 'teacher':
         return jsonify({"error": "Unauthorized"}), 401
 
-    conn = sqlite3.connect('fa_system.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM assessments WHERE teacher_id = ?', (session['user_id'],))
-    assessments = cursor.fetchall()
-    conn.close()
-
-    return jsonify({"assessments": assessments})
+    fields, limit, after_id, is_active, error = _listing_params(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    teacher_id = session['user_id']
+    conn = get_db()
+    with metrics.stage('db_read'):
+        etag = _listing_etag(conn, teacher_id, request.query_string)
+        if request.if_none_match.contains(etag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
+
+        sql, serialize = _listing_query(fields, is_active is not None)
+        params = (teacher_id, is_active, after_id, limit + 1) if is_active is not None \
+            else (teacher_id, after_id, limit + 1)
+        rows = conn.execute(sql, params).fetchall()
+
+    with metrics.stage('serialize'):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        response = jsonify({
+            "assessments": [serialize(row) for row in rows],
+            "has_more": has_more,
+            "next_after_id": rows[-1][0] if has_more else None
+        })
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 @app.route('/teacher/create_assessment', methods=['POST'])
 def create_assessment():
@@ -152,87 +361,487 @@ def create_assessment():
     assessment_name = data.get("assessment_name")
     bloom_level = data.get("bloom_level")
 
-    conn = sqlite3.connect('fa_system.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    conn = get_db()
+    cursor = conn.execute('''
         INSERT INTO assessments (teacher_id, subject_name, assessment_name, bloom_level)
         VALUES (?, ?, ?, ?)
     ''', (session['user_id'], subject_name, assessment_name, bloom_level))
     conn.commit()
-    conn.close()
 
-    return jsonify({"message": "Assessment created successfully"})
+    return jsonify({"message": "Assessment created successfully", "assessment_id": cursor.lastrowid})
+
+def _bulk_rows(key):
+    """Rows of a bulk import: a JSON {key: [...]}, an uploaded CSV ("file") or a text/csv body"""
+    upload = request.files.get('file')
+    if upload is not None:
+        return read_csv(upload.read().decode('utf-8-sig'))
+    if request.mimetype == 'text/csv':
+        return read_csv(request.get_data(as_text=True))
+    return (request.get_json(silent=True) or {}).get(key)
+
+def _bulk_import(kind, rows, teacher_id=None, max_rows=MAX_ROWS):
+    """Run a bulk import and shape the response; ?strict=1 writes nothing if any row is invalid"""
+    strict = request.args.get('strict') == '1'
+    try:
+        with metrics.stage('db_write'):
+            result = bulk_insert(get_db(), kind, rows, teacher_id=teacher_id, strict=strict,
+                                 hash_many=import_hasher.hash_many, max_rows=max_rows)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    status = 422 if strict and result["errors"] else 200
+    return jsonify(dict(result, message=f"{result['inserted']} {kind} imported")), status
+
+@app.route('/teacher/assessments/bulk', methods=['POST'])
+def bulk_create_assessments():
+    """Create many of the teacher's assessments in one transaction, with per-row errors"""
+    if session.get('role') != 'teacher':
+        return jsonify({"error": "Unauthorized"}), 401
+    return _bulk_import('assessments', _bulk_rows('assessments'), teacher_id=session['user_id'])
+
+DEFAULT_FA_TOOL = "Quiz"
+
+def _recommended_tools(conn, assessment_sql, params):
+    """Most frequently predicted FA tool for each assessment selected by `assessment_sql`"""
+    cursor = conn.execute(f'''
+        SELECT assessment_id, predicted_tool FROM student_responses
+        WHERE assessment_id IN ({assessment_sql}) AND predicted_tool IS NOT NULL
+        GROUP BY assessment_id, predicted_tool
+        ORDER BY assessment_id, COUNT(*) DESC, predicted_tool
+    ''', params)
+    tools = {}
+    for assessment_id, tool in cursor:
+        tools.setdefault(assessment_id, tool)
+    return tools
+
+def _rubric_inputs(assessment_name, bloom_level, fa_tool, total_marks):
+    return {
+        'assessment_name': assessment_name,
+        'fa_tool': fa_tool,
+        'total_marks': total_marks,
+        'bloom_level': bloom_level
+    }
+
+def _reusable_rubric(rubric_json, inputs):
+    """The stored rubric if it was generated from the same inputs, else None"""
+    if not rubric_json:
+        return None
+    stored_rubric = json.loads(rubric_json)
+    if all(stored_rubric.get(key) == value for key, value in inputs.items()):
+        return stored_rubric
+    return None
+
+INSERT_RUBRIC_SQL = '''
+    INSERT OR REPLACE INTO rubrics (assessment_id, total_marks, rubric_data)
+    VALUES (?, ?, ?)
+'''
 
 @app.route('/teacher/generate_rubric/<int:assessment_id>', methods=['POST'])
 def generate_rubric(assessment_id):
     if session.get('role') != 'teacher':
         return jsonify({"error": "Unauthorized"}), 401
 
-    data = request.json
+    with metrics.stage('decode'):
+        data = request.json
     total_marks = data.get("total_marks", 20)
 
-    conn = sqlite3.connect('fa_system.db')
+    conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM assessments WHERE id = ?', (assessment_id,))
-    assessment = cursor.fetchone()
+    with metrics.stage('db_read'):
+        cursor.execute('SELECT assessment_name, bloom_level FROM assessments WHERE id = ?', (assessment_id,))
+        assessment = cursor.fetchone()
 
-    if not assessment:
-        return jsonify({"error": "Assessment not found"}), 404
+        if not assessment:
+            return jsonify({"error": "Assessment not found"}), 404
+        assessment_name, bloom_level = assessment
 
-    rubric_data = rubric_gen.generate_rubric(
-        assessment_name=assessment[3],
-        fa_tool="Quiz",
-        total_marks=total_marks,
-        bloom_level=assessment[4]
-    )
+        fa_tool = _recommended_tools(conn, '?', (assessment_id,)).get(assessment_id, DEFAULT_FA_TOOL)
+        inputs = _rubric_inputs(assessment_name, bloom_level, fa_tool, total_marks)
+
+        # Serve the stored rubric when it was generated from the same inputs
+        cursor.execute('SELECT rubric_data FROM rubrics WHERE assessment_id = ?', (assessment_id,))
+        stored = cursor.fetchone()
+        stored_rubric = _reusable_rubric(stored[0], inputs) if stored else None
+    if stored_rubric is not None:
+        with metrics.stage('serialize'):
+            return jsonify({"message": "Rubric generated", "rubric": stored_rubric, "cached": True})
+
+    with metrics.stage('rubric_generate'):
+        rubric_data = rubric_gen.generate_rubric(**inputs)
+
+    with metrics.stage('db_write'):
+        cursor.execute(INSERT_RUBRIC_SQL, (assessment_id, total_marks, json.dumps(rubric_data)))
 
-    cursor.execute('''
-        INSERT OR REPLACE INTO rubrics (assessment_id, total_marks, rubric_data)
-        VALUES (?, ?, ?)
-    ''', (assessment_id, total_marks, json.dumps(rubric_data)))
+        conn.commit()
 
+    with metrics.stage('serialize'):
+        return jsonify({"message": "Rubric generated", "rubric": rubric_data, "cached": False})
+
+@app.route('/teacher/generate_rubrics', methods=['POST'])
+def generate_rubrics():
+    """Generate rubrics for every active assessment of the teacher in one go"""
+    if session.get('role') != 'teacher':
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.json or {}
+    total_marks = data.get("total_marks", 20)
+    teacher_id = session['user_id']
+
+    conn = get_db()
+    active_sql = 'SELECT id FROM assessments WHERE teacher_id = ? AND is_active = 1'
+    assessments = conn.execute('''
+        SELECT a.id, a.assessment_name, a.bloom_level, r.rubric_data
+        FROM assessments a LEFT JOIN rubrics r ON r.assessment_id = a.id
+        WHERE a.teacher_id = ? AND a.is_active = 1
+        ORDER BY a.id
+    ''', (teacher_id,)).fetchall()
+    tools = _recommended_tools(conn, active_sql, (teacher_id,))
+
+    # Generation is a few tens of microseconds of pure Python per rubric
+    # (and memoized), so it runs inline rather than in a worker pool.
+    results = []
+    rows = []
+    for assessment_id, assessment_name, bloom_level, rubric_json in assessments:
+        fa_tool = tools.get(assessment_id, DEFAULT_FA_TOOL)
+        inputs = _rubric_inputs(assessment_name, bloom_level, fa_tool, total_marks)
+        result = {"assessment_id": assessment_id, "fa_tool": fa_tool}
+        try:
+            if _reusable_rubric(rubric_json, inputs) is not None:
+                result["status"] = "unchanged"
+            else:
+                rows.append((assessment_id, total_marks, json.dumps(rubric_gen.generate_rubric(**inputs))))
+                result["status"] = "generated"
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        results.append(result)
+
+    conn.executemany(INSERT_RUBRIC_SQL, rows)
     conn.commit()
-    conn.close()
 
-    return jsonify({"message": "Rubric generated", "rubric": rubric_data})
+    return jsonify({
+        "message": f"{len(rows)} rubrics generated",
+        "generated": len(rows),
+        "unchanged": sum(1 for result in results if result["status"] == "unchanged"),
+        "results": results
+    })
 
-# Student endpoints
-@app.route('/student/submit_assessment', methods=['POST'])
-def submit_assessment():
-    if session.get('role') != 'student':
+def _stored_rubrics(cursor):
+    """Decode rubric_data rows lazily, so streamed documents never hold them all"""
+    for (rubric_data,) in cursor:
+        yield json.loads(rubric_data)
+
+@app.route('/teacher/rubric/<int:assessment_id>.html', methods=['GET'])
+def rubric_html(assessment_id):
+    if session.get('role') != 'teacher':
         return jsonify({"error": "Unauthorized"}), 401
 
-    data = request.json
-    assessment_id = data.get("assessment_id")
+    cursor = get_db().execute('''
+        SELECT r.rubric_data FROM rubrics r
+        JOIN assessments a ON a.id = r.assessment_id
+        WHERE r.assessment_id = ? AND a.teacher_id = ?
+    ''', (assessment_id, session['user_id']))
+    row = cursor.fetchone()
+    if not row:
+        return jsonify({"error": "Rubric not found"}), 404
+
+    rubric_data = json.loads(row[0])
+    document = rubric_renderer.iter_document([rubric_data], title=f"Rubric: {rubric_data['assessment_name']}")
+    return Response(stream_with_context(document), mimetype='text/html')
+
+@app.route('/teacher/rubrics.html', methods=['GET'])
+def course_rubrics_html():
+    """All of the teacher's stored rubrics in one document, optionally for one subject"""
+    if session.get('role') != 'teacher':
+        return jsonify({"error": "Unauthorized"}), 401
 
-    student_data = {
+    subject = request.args.get("subject")
+    sql = '''
+        SELECT r.rubric_data FROM rubrics r
+        JOIN assessments a ON a.id = r.assessment_id
+        WHERE a.teacher_id = ?
+    '''
+    params = [session['user_id']]
+    if subject:
+        sql += ' AND a.subject_name = ?'
+        params.append(subject)
+    cursor = get_db().execute(sql + ' ORDER BY a.id', params)
+
+    title = f"Rubrics: {subject}" if subject else "Rubrics"
+    document = rubric_renderer.iter_document(_stored_rubrics(cursor), title=title)
+    return Response(stream_with_context(document), mimetype='text/html')
+
+@app.route('/teacher/assessment/<int:assessment_id>/summary', methods=['GET'])
+def class_summary(assessment_id):
+    """Predicted tool distribution, mean confidence and year/learning mode breakdowns.
+
+    Read from the trigger-maintained assessment_summary table; ?live=1
+    aggregates student_responses instead. Responses still in the
+    write-behind queue aren't counted yet.
+    """
+    if session.get('role') != 'teacher':
+        return jsonify({"error": "Unauthorized"}), 401
+
+    conn = get_db()
+    with metrics.stage('db_read'):
+        owned = conn.execute('SELECT 1 FROM assessments WHERE id = ? AND teacher_id = ?',
+                             (assessment_id, session['user_id'])).fetchone()
+        if not owned:
+            return jsonify({"error": "Assessment not found"}), 404
+        summary = assessment_summary(conn, assessment_id, live=request.args.get('live') == '1')
+
+    with metrics.stage('serialize'):
+        return jsonify(summary)
+
+@app.route('/teacher/export/<dataset>', methods=['GET'])
+def export_data(dataset):
+    """Stream the teacher's responses, rubrics or training rows (data/dataset.csv layout).
+
+    ?format=csv|ndjson|parquet, filtered by ?assessment_id and a created_at
+    range ?since (inclusive) / ?until (exclusive). CSV and NDJSON are sent
+    chunk by chunk as they are read; Parquet (needs pyarrow) is spooled to a
+    temporary file first, since its footer comes last.
+    """
+    if session.get('role') != 'teacher':
+        return jsonify({"error": "Unauthorized"}), 401
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        return jsonify({"error": "Parquet export needs pyarrow installed"}), 501
+    try:
+        columns, sql, params = export_query(
+            dataset, assessment_id=request.args.get('assessment_id', type=int), teacher_id=session['user_id'],
+            since=request.args.get('since'), until=request.args.get('until')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filename = f"{dataset}.{fmt}"
+    chunks = iter_chunks(get_db(), sql, params)
+    if fmt == 'parquet':
+        spool = tempfile.TemporaryFile()
+        write_parquet(spool, columns, chunks)
+        spool.seek(0)
+        return send_file(spool, mimetype=FORMATS[fmt], as_attachment=True, download_name=filename)
+
+    body = (iter_csv if fmt == 'csv' else iter_ndjson)(columns, chunks)
+    return Response(stream_with_context(body), mimetype=FORMATS[fmt],
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+# Student endpoints
+def _student_features(data):
+    """Map a submission payload onto the model's feature names"""
+    return {
         'Year': data.get("year"),
         'LearningStyle': data.get("learning_style"),
         'ConfidenceLevel': data.get("confidence"),
         'BloomLevel': data.get("bloom_level")
     }
 
-    prediction_result = fa_model.predict_fa_tool(student_data)
-
-    conn = sqlite3.connect('fa_system.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO student_responses (
-            assessment_id, student_id, year_of_study, study_hours, confidence_level,
-            learning_mode, difficulty_level, time_available, topic_type, resources,
-            previous_tools, bloom_focus, predicted_tool, confidence_score, explanation
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        assessment_id, session['user_id'], data.get("year"), None, data.get("confidence"),
+def _response_row(assessment_id, student_id, data, prediction_result, model_version):
+    """Build a student_responses row for a submission and its prediction"""
+    return (
+        assessment_id, student_id, data.get("year"), None, data.get("confidence"),
         data.get("learning_style"), None, None, None,
         ','.join(data.get("resources", [])), ','.join(data.get("previous_tools", [])),
         ','.join(data.get("bloom_focus", [])), prediction_result['predicted_tool'],
-        prediction_result['confidence'], prediction_result.get("explanation", "Recommended based on ML model")
-    ))
-    conn.commit()
-    conn.close()
+        prediction_result['confidence'], prediction_result.get("explanation", "Recommended based on ML model"),
+        model_version
+    )
+
+INSERT_RESPONSE_SQL = '''
+    INSERT INTO student_responses (
+        assessment_id, student_id, year_of_study, study_hours, confidence_level,
+        learning_mode, difficulty_level, time_available, topic_type, resources,
+        previous_tools, bloom_focus, predicted_tool, confidence_score, explanation,
+        model_version
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# student_responses rows are written behind the response by a background
+# thread; FA_SYNC_WRITES=1 commits each submission before replying instead.
+response_writer = WriteBehindQueue(
+    db_pool, INSERT_RESPONSE_SQL,
+    durable=os.environ.get('FA_SYNC_WRITES') == '1'
+)
+atexit.register(response_writer.close)
+
+def _busy():
+    return jsonify({"error": "Server busy, please resubmit"}), 503
+
+# Largest batch one request may score and write (a class section); below
+# ml_model.COMPILED_MAX_ROWS, so a compiled model always scores it itself
+MAX_BATCH = 500
+LIST_FIELDS = ('resources', 'previous_tools', 'bloom_focus')
+
+def _parse_batch(data, role, user_id):
+    """(responses, student_ids, error) for a batch payload; error is None or a (body, status) pair"""
+    if not isinstance(data, dict):
+        return None, None, ({"error": "body must be a JSON object"}, 400)
+    responses = data.get("responses", [])
+    if not isinstance(responses, list) or not responses:
+        return None, None, ({"error": "responses must be a non-empty list"}, 400)
+    if len(responses) > MAX_BATCH:
+        return None, None, ({"error": f"at most {MAX_BATCH} responses per batch"}, 413)
+
+    student_ids = []
+    for index, item in enumerate(responses):
+        if not isinstance(item, dict):
+            return None, None, ({"error": "every response must be an object", "index": index}, 400)
+        for field in LIST_FIELDS:
+            value = item.get(field, [])
+            if not isinstance(value, list) or not all(isinstance(entry, str) for entry in value):
+                return None, None, ({"error": f"{field} must be a list of strings", "index": index}, 400)
+        student_id = item.get("student_id") if role == 'teacher' else user_id
+        if student_id is None:
+            return None, None, ({"error": "student_id is required for every response", "index": index}, 400)
+        student_ids.append(student_id)
+    return responses, student_ids, None
+
+def _batch_rows(data, responses, student_ids, predictions, model_version):
+    default_assessment_id = data.get("assessment_id")
+    return [
+        _response_row(item.get("assessment_id", default_assessment_id), student_id, item, prediction,
+                      model_version)
+        for item, student_id, prediction in zip(responses, student_ids, predictions)
+    ]
+
+@app.route('/student/submit_assessment', methods=['POST'])
+def submit_assessment():
+    if session.get('role') != 'student':
+        return jsonify({"error": "Unauthorized"}), 401
 
-    return jsonify({"message": "Response submitted", "prediction": prediction_result})
+    with metrics.stage('decode'):
+        data = request.json
+    assessment_id = data.get("assessment_id")
+
+    student_data = _student_features(data)
+
+    # The model comes back with the prediction: a reload swapping it
+    # mid-request doesn't change the version recorded for it
+    with metrics.stage('inference'):
+        model, prediction_result = inference_batcher.predict(student_data)
+
+    row = _response_row(assessment_id, session['user_id'], data, prediction_result, model.version)
+    with metrics.stage('db_write'):
+        queued = response_writer.submit(row)
+    if not queued:
+        return _busy()
+
+    with metrics.stage('serialize'):
+        return jsonify({"message": "Response submitted", "prediction": prediction_result})
+
+@app.route('/student/submit_assessments/batch', methods=['POST'])
+def submit_assessments_batch():
+    """Score many submissions at once (e.g. a whole class section).
+
+    Teachers may submit on behalf of students by giving a student_id per
+    response; students can only submit for themselves. At most MAX_BATCH
+    responses per request; a malformed one fails the batch with its index.
+    """
+    role = session.get('role')
+    if role not in ('student', 'teacher'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    with metrics.stage('decode'):
+        data = request.json or {}
+    responses, student_ids, error = _parse_batch(data, role, session['user_id'])
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    # One encode + one predict_proba for the whole batch
+    with metrics.stage('inference'):
+        model = fa_model.get()
+        predictions = model.predict_batch([_student_features(item) for item in responses])
+
+    rows = _batch_rows(data, responses, student_ids, predictions, model.version)
+    with metrics.stage('db_write'):
+        queued = response_writer.submit_many(rows)
+    if not queued:
+        return _busy()
+
+    with metrics.stage('serialize'):
+        return jsonify({"message": f"{len(rows)} responses submitted", "predictions": predictions})
+
+# Admin endpoints
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request/stage histograms and app counters for Prometheus (FA_METRICS=1)"""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled, set FA_METRICS=1"}), 404
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/admin/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Onboard a cohort (admins only): username/password/role rows (role defaults to student)"""
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    return _bulk_import('users', _bulk_rows('users'), max_rows=MAX_HTTP_IMPORT_USERS)
+
+@app.route('/admin/write_queue', methods=['GET'])
+def write_queue_stats():
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(response_writer.stats())
+
+@app.route('/admin/inference', methods=['GET'])
+def inference_stats():
+    """Micro-batching counters: direct vs batched calls, batch sizes, queueing delay"""
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(inference_batcher.stats())
+
+@app.route('/admin/prediction_cache', methods=['GET'])
+def prediction_cache_stats():
+    """Hit ratio, evictions, invalidations and estimated latency saved"""
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(prediction_cache.stats(), enabled=True))
+
+@app.route('/admin/reload_model', methods=['POST'])
+def reload_model():
+    """Reload the model file in the background; ?wait=1 waits and returns the outcome.
+
+    Only the worker answering the request reloads; with several workers
+    rely on the file watcher (FA_MODEL_WATCH_INTERVAL) instead.
+    """
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    wait = request.args.get('wait') == '1'
+    if not fa_model.reload(wait=wait):
+        return jsonify({"error": "A reload is already in progress", "model": fa_model.status()}), 409
+    status = fa_model.status()
+    if not wait:
+        return jsonify({"message": "Reload started", "model": status}), 202
+    if not status['last_reload']['ok']:
+        return jsonify({"error": status['last_reload']['error'], "model": status}), 422
+    return jsonify({"message": f"Model version {status['version']} loaded", "model": status})
+
+@app.route('/admin/retrain', methods=['GET'])
+def retrain_status():
+    """Checkpoint and last outcome of the retrain-from-feedback job"""
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    from models.training import load_state  # numpy; kept out of app startup
+
+    return jsonify({
+        "checkpoint": load_state(fa_model.model_file),
+        "scheduler": retrain_scheduler.status() if retrain_scheduler else None
+    })
+
+@app.route('/admin/memory', methods=['GET'])
+def memory_stats():
+    """RSS/PSS of the worker answering the request (Linux only)"""
+    if session.get('role') != ADMIN_ROLE:
+        return jsonify({"error": "Unauthorized"}), 401
+    usage = process_memory()
+    if usage is None:
+        return jsonify({"error": "Memory stats are not available on this platform"}), 501
+    usage['model'] = fa_model.status()
+    return jsonify(usage)
 
 if __name__ == "__main__":
     app.run(debug=True)
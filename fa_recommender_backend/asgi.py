@@ -0,0 +1,254 @@
+"""ASGI serving mode: the same API, served from an event loop.
+
+    uvicorn asgi:app [--workers N]
+
+The probe and prediction routes (/, /ready, /student/submit_assessment
+and the batch variant) are handled natively: inference runs on a
+dedicated executor (FA_INFERENCE_THREADS), and response rows go to the
+write-behind queue from the database executor. Every other route is the
+Flask app itself, run on the database executor (FA_DB_THREADS, default
+the connection pool size) so its blocking SQLite calls never stall the
+loop; streamed responses are forwarded chunk by chunk.
+
+Sessions are Flask's signed cookies, verified in the loop (no I/O), so a
+login made through either mode is valid in both.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+from app import (app as flask_app, db_pool, fa_model, inference_batcher, response_writer, _batch_rows,
+                 _parse_batch, _readiness, _response_row, _student_features)
+from utils.metrics import registry as metrics
+
+# Single predictions go through the app's micro-batcher, so concurrent ones
+# share a predict_proba and the inference threads mostly wait on it. With
+# batching off predict is GIL-bound, and more than one thread only contends.
+inference_executor = ThreadPoolExecutor(
+    int(os.environ.get('FA_INFERENCE_THREADS',
+                       inference_batcher.max_batch if inference_batcher.enabled else 1)),
+    thread_name_prefix='inference'
+)
+db_executor = ThreadPoolExecutor(int(os.environ.get('FA_DB_THREADS', max(db_pool.size, 1))),
+                                 thread_name_prefix='db')
+
+_session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+
+def load_session(scope):
+    """The Flask session carried by the request's cookie, or {}"""
+    cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            morsel = SimpleCookie(value.decode('latin-1')).get(cookie_name)
+            if morsel is not None:
+                try:
+                    return _session_serializer.loads(
+                        morsel.value, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+                except Exception:
+                    return {}
+    return {}
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_json(send, status, payload):
+    with metrics.stage('serialize'):
+        body = (flask_app.json.dumps(payload) + '\n').encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _predict_one(student_data):
+    # The model is fetched on the inference thread: a lazy first load never runs in the loop
+    return inference_batcher.predict(student_data)
+
+
+def _predict_many(students):
+    model = fa_model.get()
+    return model, model.predict_batch(students)
+
+
+async def index(scope, body, session):
+    return 200, {"status": "Backend is running", "message": "FA Tool Recommendation System API"}
+
+
+async def ready(scope, body, session):
+    status = _readiness()
+    return (200 if status['ready'] else 503), status
+
+
+async def submit_assessment(scope, body, session):
+    if session.get('role') != 'student':
+        return 401, {"error": "Unauthorized"}
+    with metrics.stage('decode'):
+        data = json.loads(body)
+
+    loop = asyncio.get_running_loop()
+    with metrics.stage('inference'):
+        model, prediction_result = await loop.run_in_executor(inference_executor, _predict_one,
+                                                              _student_features(data))
+
+    row = _response_row(data.get("assessment_id"), session['user_id'], data, prediction_result, model.version)
+    with metrics.stage('db_write'):
+        queued = await loop.run_in_executor(db_executor, response_writer.submit, row)
+    if not queued:
+        return 503, {"error": "Server busy, please resubmit"}
+    return 200, {"message": "Response submitted", "prediction": prediction_result}
+
+
+async def submit_assessments_batch(scope, body, session):
+    role = session.get('role')
+    if role not in ('student', 'teacher'):
+        return 401, {"error": "Unauthorized"}
+    with metrics.stage('decode'):
+        data = json.loads(body or b'{}') or {}
+    responses, student_ids, error = _parse_batch(data, role, session.get('user_id'))
+    if error:
+        body, status = error
+        return status, body
+
+    loop = asyncio.get_running_loop()
+    with metrics.stage('inference'):
+        model, predictions = await loop.run_in_executor(
+            inference_executor, _predict_many, [_student_features(item) for item in responses])
+
+    rows = _batch_rows(data, responses, student_ids, predictions, model.version)
+    with metrics.stage('db_write'):
+        queued = await loop.run_in_executor(db_executor, response_writer.submit_many, rows)
+    if not queued:
+        return 503, {"error": "Server busy, please resubmit"}
+    return 200, {"message": f"{len(rows)} responses submitted", "predictions": predictions}
+
+
+NATIVE_ROUTES = {
+    ('GET', '/'): index,
+    ('GET', '/ready'): ready,
+    ('POST', '/student/submit_assessment'): submit_assessment,
+    ('POST', '/student/submit_assessments/batch'): submit_assessments_batch,
+}
+
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ, send_threadsafe):
+    """Executor thread: run the Flask app and hand each chunk to the loop"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    def send_start():
+        if not started.get('sent'):
+            started['sent'] = True
+            send_threadsafe({'type': 'http.response.start', 'status': started['status'],
+                             'headers': started['headers']})
+
+    result = flask_app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                send_start()
+                send_threadsafe({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    send_start()
+    send_threadsafe({'type': 'http.response.body', 'body': b''})
+
+
+async def call_flask(scope, body, send):
+    loop = asyncio.get_running_loop()
+
+    def send_threadsafe(message):
+        # Waiting for each send keeps the thread at the client's pace
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    await loop.run_in_executor(db_executor, _run_wsgi, wsgi_environ(scope, body), send_threadsafe)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Drain queued response rows before the process exits
+            await asyncio.get_running_loop().run_in_executor(db_executor, response_writer.close)
+            inference_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    handler = NATIVE_ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        await call_flask(scope, body, send)
+        return
+
+    started = time.perf_counter()
+    try:
+        status, payload = await handler(scope, body, load_session(scope))
+    except json.JSONDecodeError:
+        status, payload = 400, {"error": "Request body must be JSON"}
+    await send_json(send, status, payload)
+    # Bridged routes are timed by the Flask app's own request hooks
+    if metrics.enabled:
+        metrics.observe_request(scope['path'], scope['method'], status, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run('asgi:app', host=os.environ.get('FA_HOST', '127.0.0.1'),
+                port=int(os.environ.get('FA_PORT', 8000)))
@@ -0,0 +1,53 @@
+"""Per-student latency of predict_batch vs. looping over predict_fa_tool.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_batch_predict
+"""
+import time
+
+from benchmarks.synthetic import make_students
+from models.ml_model import FARecommendationModel
+
+# Looping predict_fa_tool over 10k rows takes minutes, so the loop baseline
+# is timed on at most this many rows and reported per student.
+MAX_LOOP_ROWS = 200
+
+
+def time_loop(model, students):
+    sample = students[:MAX_LOOP_ROWS]
+    start = time.perf_counter()
+    for student in sample:
+        model.predict_fa_tool(student)
+    return (time.perf_counter() - start) / len(sample)
+
+
+def time_batch(model, students, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_batch(students)
+        best = min(best, time.perf_counter() - start)
+    return best / len(students)
+
+
+def main():
+    model = FARecommendationModel()
+    if not model.load_model():
+        model.train_model('data/dataset.csv')
+
+    # Sanity check: batch and single-row paths must agree
+    check = make_students(50, seed=1)
+    for student, result in zip(check, model.predict_batch(check)):
+        assert result['predicted_tool'] == model.predict_fa_tool(student)['predicted_tool']
+
+    print(f"{'rows':>8} {'loop ms/student':>16} {'batch ms/student':>17} {'speedup':>8}")
+    for n in (1, 100, 10_000):
+        students = make_students(n)
+        loop = time_loop(model, students)
+        batch = time_batch(model, students)
+        print(f"{n:>8} {loop * 1e3:>16.3f} {batch * 1e3:>17.4f} {loop / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Rows/s for onboarding users and assessments: one request per row vs bulk import.
+
+Uses the Flask test client against a throwaway database. There is no
+single-user endpoint, so the per-row baseline for users is an INSERT +
+commit per row on a pool connection (what one request per user would
+cost at the database, without the HTTP overhead), hashing as it goes.
+Passwords are hashed with --hash-n (default 2**10, not the app's 2**14)
+so a run takes minutes rather than hours; user imports are bound by
+hashing either way, and bench_login measures the real hash cost.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_bulk_import [--users 10000] [--assessments 1000] [--hash-n 1024]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_assessments
+
+
+def rate(n, fn):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--assessments', type=int, default=1_000)
+    parser.add_argument('--hash-n', type=int, default=2 ** 10, help="scrypt work factor for the imported passwords")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update(FA_DB_PATH=os.path.join(tmp, 'bench.db'), FA_MODEL_WATCH_INTERVAL='0',
+                      FA_PASSWORD_HASH_N=str(args.hash_n), FA_IMPORT_MAX_USERS=str(args.users))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app, db_pool
+    from utils.auth import hash_password
+    from utils.bulk_import import ADMIN_ROLE
+
+    teacher, admin = app.test_client(), app.test_client()
+    teacher.post('/login', json={'username': 'teacher1', 'password': 'teacher123'})
+    with db_pool.connection() as conn:
+        conn.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                     ('admin', hash_password('admin'), ADMIN_ROLE))
+        conn.commit()
+    admin.post('/login', json={'username': 'admin', 'password': 'admin'})
+    assessments = [{'subject_name': subject, 'assessment_name': name, 'bloom_level': bloom}
+                   for _, subject, name, bloom in make_assessments(args.assessments)]
+
+    def users(prefix):
+        return [{'username': f'{prefix}{i}', 'password': 'pw', 'role': 'student'} for i in range(args.users)]
+
+    def one_user_per_commit():
+        with db_pool.connection() as conn:
+            for user in users('single'):
+                conn.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                             (user['username'], hash_password(user['password']), user['role']))
+                conn.commit()
+
+    def one_request_per_assessment():
+        for assessment in assessments:
+            assert teacher.post('/teacher/create_assessment', json=assessment).status_code == 200
+
+    def bulk(path, body):
+        response = (admin if path.startswith('/admin') else teacher).post(path, **body)
+        assert response.status_code == 200 and not response.json['errors'], response.json
+
+    header = 'username,password,role\n'
+    users_csv = header + ''.join(f"csv{i},pw,student\n" for i in range(args.users))
+
+    print(f"{'import':<50} {'rows/s':>9}")
+    results = [
+        (f'{args.users} users, INSERT + commit per row', rate(args.users, one_user_per_commit)),
+        (f'{args.users} users, POST /admin/users/bulk (JSON)',
+         rate(args.users, lambda: bulk('/admin/users/bulk', {'json': {'users': users('json')}}))),
+        (f'{args.users} users, POST /admin/users/bulk (CSV)',
+         rate(args.users, lambda: bulk('/admin/users/bulk', {'data': users_csv, 'content_type': 'text/csv'}))),
+        (f'{args.assessments} assessments, create_assessment per row',
+         rate(args.assessments, one_request_per_assessment)),
+        (f'{args.assessments} assessments, POST /teacher/assessments/bulk',
+         rate(args.assessments, lambda: bulk('/teacher/assessments/bulk', {'json': {'assessments': assessments}}))),
+    ]
+    for name, rows_per_second in results:
+        print(f"{name:<50} {rows_per_second:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
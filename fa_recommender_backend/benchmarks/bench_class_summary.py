@@ -0,0 +1,107 @@
+"""Class summary latency: trigger-maintained table vs GROUP BY vs pandas, plus the insert overhead.
+
+Seeds a throwaway database with synthetic student_responses, then times
+one assessment's summary three ways: reading assessment_summary (what
+the endpoint does), the live GROUP BY pushdown (?live=1), and loading
+the whole table into pandas and grouping there, as analysis.py would.
+The insert rows show what the summary triggers add to a write-behind
+flush (executemany of 500 rows).
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_class_summary [--responses 200000] [--assessments 200]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic import make_responses
+from utils.analytics import assessment_summary
+from utils.schema import create_tables, migrate
+
+# app.INSERT_RESPONSE_SQL; importing app would open (and migrate) fa_system.db
+INSERT_RESPONSE_SQL = f'''
+    INSERT INTO student_responses (
+        assessment_id, student_id, year_of_study, study_hours, confidence_level,
+        learning_mode, difficulty_level, time_available, topic_type, resources,
+        previous_tools, bloom_focus, predicted_tool, confidence_score, explanation,
+        model_version
+    ) VALUES ({', '.join('?' * 16)})
+'''
+TRIGGERS = ('trg_summary_insert', 'trg_summary_delete', 'trg_summary_update')
+
+
+def per_call_ms(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e3
+
+
+def pandas_summary(conn, assessment_id):
+    import pandas as pd
+
+    df = pd.read_sql('SELECT * FROM student_responses', conn)
+    rows = df[df['assessment_id'] == assessment_id]
+    return {dimension: rows.groupby(dimension)['confidence_score'].agg(['count', 'mean'])
+            for dimension in ('predicted_tool', 'year_of_study', 'learning_mode')}
+
+
+def open_db(path, triggers=True):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    create_tables(conn)
+    migrate(conn)
+    if not triggers:
+        for name in TRIGGERS:
+            conn.execute(f'DROP TRIGGER {name}')
+    return conn
+
+
+def insert_ms(conn, rows, batch=500):
+    """Mean ms per write-behind style flush: executemany + commit of `batch` rows"""
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch):
+        conn.executemany(INSERT_RESPONSE_SQL, rows[i:i + batch])
+        conn.commit()
+    return (time.perf_counter() - start) / len(rows) * batch * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--responses', type=int, default=200_000)
+    parser.add_argument('--assessments', type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_responses(args.responses, range(1, args.assessments + 1), student_ids=range(1, 1001))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = open_db(os.path.join(tmp, 'plain.db'), triggers=False)
+        conn = open_db(os.path.join(tmp, 'summary.db'))
+
+        print(f"{args.responses} responses over {args.assessments} assessments")
+        print(f"{'insert (per 500-row flush)':<32} {'ms':>9}")
+        print(f"{'  without summary triggers':<32} {insert_ms(plain, rows):>9.2f}")
+        print(f"{'  with summary triggers':<32} {insert_ms(conn, rows):>9.2f}")
+        plain.close()
+
+        assessment_id = args.assessments // 2
+        stored = assessment_summary(conn, assessment_id)
+        live = assessment_summary(conn, assessment_id, live=True)
+        stored.pop('source'), live.pop('source')
+        assert stored == live, "assessment_summary disagrees with student_responses"
+
+        print(f"\n{'summary of one assessment':<32} {'ms':>9}")
+        print(f"{'  assessment_summary table':<32} "
+              f"{per_call_ms(lambda: assessment_summary(conn, assessment_id), 2000):>9.3f}")
+        print(f"{'  GROUP BY (live=1)':<32} "
+              f"{per_call_ms(lambda: assessment_summary(conn, assessment_id, live=True), 50):>9.3f}")
+        print(f"{'  pandas, whole table':<32} {per_call_ms(lambda: pandas_summary(conn, assessment_id), 3):>9.3f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
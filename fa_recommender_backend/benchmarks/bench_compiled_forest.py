@@ -0,0 +1,88 @@
+"""Check the compiled NumPy forest against sklearn and compare latency/footprint.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_compiled_forest
+"""
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from models.compiled_forest import compiled_path
+from models.feature_encoder import feature_domain
+from models.ml_model import FARecommendationModel
+
+MODEL_FILE = 'data/fa_model.pkl'
+
+# Loads the compiled model in a fresh interpreter and reports what it imported
+PROBE = """
+import sys
+from models.ml_model import FARecommendationModel
+m = FARecommendationModel(compiled={compiled})
+m.load_model()
+m.predict_fa_tool({{'Year': '2nd Year', 'LearningStyle': 'Visual', 'ConfidenceLevel': 4, 'BloomLevel': 'Apply'}})
+rss = [line.split()[1] for line in open('/proc/self/status') if line.startswith('VmRSS')]
+print('sklearn' in sys.modules, 'pandas' in sys.modules, int(rss[0]) // 1024 if rss else -1)
+"""
+
+
+def check_outputs(forest, compiled):
+    grid = np.array(list(itertools.product(*(feature_domain(n) for n in forest.feature_names))),
+                    dtype=np.float32)
+    noise = np.random.default_rng(0).uniform(-1, 7, (5000, grid.shape[1])).astype(np.float32)
+    X = np.vstack([grid, noise])
+    expected = forest.model.predict_proba(X)
+    actual = compiled.model.predict_proba(X)
+    assert np.allclose(actual, expected, rtol=0, atol=1e-12), np.abs(actual - expected).max()
+    assert (compiled.model.predict(X) == forest.model.predict(X)).all()
+    return len(X)
+
+
+def time_predict_proba(model, X, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict_proba(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def probe(compiled):
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', PROBE.format(compiled=compiled)],
+                         capture_output=True, text=True, check=True).stdout.split()
+    return out[-3] == 'True', out[-2] == 'True', int(out[-1])
+
+
+def main():
+    forest = FARecommendationModel()
+    forest.load_model(MODEL_FILE)
+    forest.export_compiled()
+    compiled = FARecommendationModel(compiled=True)
+    compiled.load_model(MODEL_FILE)
+
+    print(f"compiled forest matches sklearn on {check_outputs(forest, compiled)} rows")
+
+    # "served": what compiled mode uses for that many rows (sklearn past COMPILED_MAX_ROWS)
+    print(f"\n{'rows':>8} {'sklearn ms':>11} {'compiled ms':>12} {'served ms':>10}")
+    rng = np.random.default_rng(1)
+    for n in (1, 100, 1000, 10_000):
+        X = rng.integers(0, 6, (n, len(forest.feature_names))).astype(np.float32)
+        print(f"{n:>8} {time_predict_proba(forest.model, X) * 1e3:>11.3f} "
+              f"{time_predict_proba(compiled.model, X) * 1e3:>12.3f} "
+              f"{time_predict_proba(compiled._forest_for(n), X) * 1e3:>10.3f}")
+
+    arrays = compiled_path(MODEL_FILE, compiled.version)
+    on_disk = sum(os.path.getsize(os.path.join(arrays, f)) for f in os.listdir(arrays))
+    print(f"\npickle: {os.path.getsize(MODEL_FILE) / 1024:.0f} KB, "
+          f"compiled arrays: {on_disk / 1024:.0f} KB on disk")
+
+    for mode in (False, True):
+        sklearn_loaded, pandas_loaded, rss = probe(mode)
+        print(f"serving process compiled={mode}: sklearn imported={sklearn_loaded}, "
+              f"pandas imported={pandas_loaded}, RSS {rss} MB")
+
+
+if __name__ == "__main__":
+    main()
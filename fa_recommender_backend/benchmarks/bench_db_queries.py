@@ -0,0 +1,110 @@
+"""EXPLAIN QUERY PLAN and timings for the endpoint queries, before/after migrations.
+
+Seeds a throwaway database (1M student_responses by default) with only the
+base tables, measures each query, applies utils.schema.migrate and measures
+again.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_db_queries [--responses 1000000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from utils.auth import hash_password
+from utils.schema import create_tables, migrate
+
+N_TEACHERS = 200
+N_STUDENTS = 20000
+N_ASSESSMENTS = 2000
+
+# (endpoint, SQL, parameter factory)
+QUERIES = [
+    ('login', 'SELECT id, role, password FROM users WHERE username = ?',
+     lambda rng: (f'student{rng.randrange(N_STUDENTS)}',)),
+    ('teacher_assessments', 'SELECT * FROM assessments WHERE teacher_id = ?',
+     lambda rng: (rng.randrange(1, N_TEACHERS + 1),)),
+    ('generate_rubric (read)', 'SELECT * FROM assessments WHERE id = ?',
+     lambda rng: (rng.randrange(1, N_ASSESSMENTS + 1),)),
+    ('stored rubric', 'SELECT rubric_data FROM rubrics WHERE assessment_id = ?',
+     lambda rng: (rng.randrange(1, N_ASSESSMENTS + 1),)),
+    ('responses per assessment', 'SELECT COUNT(*) FROM student_responses WHERE assessment_id = ?',
+     lambda rng: (rng.randrange(1, N_ASSESSMENTS + 1),)),
+    ('response per student', 'SELECT id, predicted_tool FROM student_responses '
+                             'WHERE assessment_id = ? AND student_id = ?',
+     lambda rng: (rng.randrange(1, N_ASSESSMENTS + 1), rng.randrange(1, N_STUDENTS + 1))),
+]
+
+
+def seed(conn, n_responses, rng):
+    create_tables(conn)
+    # One hash shared by every user: hashing 20k passwords (or letting the
+    # password migration do it) would take minutes
+    password = hash_password('pw')
+    conn.executemany('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                     [(f'teacher{i}', password, 'teacher') for i in range(N_TEACHERS)] +
+                     [(f'student{i}', password, 'student') for i in range(N_STUDENTS)])
+    conn.executemany('INSERT INTO assessments (teacher_id, subject_name, assessment_name, bloom_level) '
+                     'VALUES (?, ?, ?, ?)',
+                     [(rng.randrange(1, N_TEACHERS + 1), 'Subject', f'Assessment {i}', 'Apply')
+                      for i in range(N_ASSESSMENTS)])
+    # Two rubrics per assessment, as repeated INSERT OR REPLACE used to leave
+    conn.executemany('INSERT INTO rubrics (assessment_id, total_marks, rubric_data) VALUES (?, ?, ?)',
+                     [(i % N_ASSESSMENTS + 1, 20, '{}') for i in range(2 * N_ASSESSMENTS)])
+
+    tools = ['Quiz', 'Project', 'Lab Work', 'Case Study']
+    batch = 100_000
+    for start in range(0, n_responses, batch):
+        conn.executemany(
+            'INSERT INTO student_responses (assessment_id, student_id, year_of_study, confidence_level, '
+            'learning_mode, predicted_tool, confidence_score) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(rng.randrange(1, N_ASSESSMENTS + 1), rng.randrange(1, N_STUDENTS + 1), '2nd Year',
+              rng.randint(1, 5), 'Visual', rng.choice(tools), rng.random())
+             for _ in range(min(batch, n_responses - start))])
+    conn.commit()
+
+
+def measure(conn, repeat):
+    results = {}
+    for name, sql, params in QUERIES:
+        plan = ' / '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params(random.Random(0))))
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params(rng)).fetchall()
+        results[name] = (plan, (time.perf_counter() - start) / repeat * 1e3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--responses', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        seed(conn, args.responses, random.Random(42))
+        print(f"seeded {args.responses} responses in {time.perf_counter() - start:.1f}s")
+
+        before = measure(conn, args.repeat)
+        start = time.perf_counter()
+        migrate(conn)
+        print(f"migrations took {time.perf_counter() - start:.1f}s")
+        after = measure(conn, args.repeat)
+        conn.close()
+
+    for name, _, _ in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f"\n{name}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+        print(f"  before: {plan_before}")
+        print(f"  after:  {plan_after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Export throughput and peak Python memory: streamed chunks vs fetchall.
+
+Seeds a throwaway database with synthetic student_responses and exports
+them as CSV and NDJSON through utils.export, against the fetchall +
+json.dumps approach teacher_assessments uses. Peak memory is measured
+with tracemalloc (Python allocations only). The training CSV is then
+fed to FARecommendationModel.train_model as a check that it loads (the
+synthetic labels are random, so its accuracy means nothing).
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_export [--responses 200000]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_assessments, make_responses
+from utils.export import FORMATS, export, export_query
+from utils.schema import create_tables, migrate
+
+# app.INSERT_RESPONSE_SQL; importing app would open (and migrate) fa_system.db
+INSERT_RESPONSE_SQL = f'''
+    INSERT INTO student_responses (
+        assessment_id, student_id, year_of_study, study_hours, confidence_level,
+        learning_mode, difficulty_level, time_available, topic_type, resources,
+        previous_tools, bloom_focus, predicted_tool, confidence_score, explanation,
+        model_version
+    ) VALUES ({', '.join('?' * 16)})
+'''
+
+
+def measure(fn):
+    """(seconds, peak MB) of fn(); timed in a separate run, tracemalloc slows everything down"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def fetchall_json(conn, path):
+    columns, sql, params = export_query('responses')
+    rows = conn.execute(sql, params).fetchall()
+    with open(path, 'w') as f:
+        f.write(json.dumps({"responses": rows}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--responses', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_tables(conn)
+            migrate(conn)
+        conn.executemany('INSERT INTO assessments (teacher_id, subject_name, assessment_name, bloom_level) '
+                         'VALUES (?, ?, ?, ?)', make_assessments(200))
+        conn.executemany(INSERT_RESPONSE_SQL, make_responses(args.responses, range(1, 201), range(1, 1001)))
+        conn.commit()
+
+        print(f"{args.responses} responses")
+        print(f"{'export':<28} {'s':>7} {'rows/s':>9} {'peak MB':>8}")
+        runs = [('fetchall + json.dumps', lambda: fetchall_json(conn, os.path.join(tmp, 'all.json')))]
+        for fmt in FORMATS:
+            if fmt != 'parquet':
+                runs.append((f'streamed {fmt}', lambda fmt=fmt: export(conn, 'responses', fmt,
+                                                                       os.path.join(tmp, f'responses.{fmt}'))))
+        training_csv = os.path.join(tmp, 'training.csv')
+        runs.append(('streamed training csv', lambda: export(conn, 'training', 'csv', training_csv)))
+        for name, fn in runs:
+            seconds, peak_mb = measure(fn)
+            print(f"{name:<28} {seconds:>7.2f} {args.responses / seconds:>9.0f} {peak_mb:>8.1f}")
+        conn.close()
+
+        # train_model saves to data/fa_model.pkl relative to the working directory
+        from models.ml_model import FARecommendationModel
+
+        cwd = os.getcwd()
+        os.makedirs(os.path.join(tmp, 'data'))
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                accuracy = FARecommendationModel().train_model(training_csv)
+        finally:
+            os.chdir(cwd)
+        print(f"\n✅ train_model on the exported training CSV: accuracy {accuracy:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Concurrent login throughput, and what a login storm does to predictions.
+
+Starts the app on a throwaway database in a subprocess per mode, then for
+each number of concurrent login clients runs a fixed number of logins
+while a few clients keep submitting assessments. Reported: login rate,
+p50/p99 login latency, logins turned away (503), and the submission p99
+next to its p99 with no logins running.
+
+"unbounded" gives the hashing pool as many threads as there are clients,
+roughly what hashing in each request thread would do; "bounded" is the
+default FA_AUTH_THREADS with a small FA_AUTH_MAX_PENDING. Predictions use
+the precomputed table so their latency is all request path.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_login [--logins 200] [--clients 1 8 32]
+"""
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.load_test_submit import PAYLOAD, _client, wait_until_up
+from utils.auth import UserCache
+
+SUBMIT_CLIENTS = 2
+
+MODES = {
+    'unbounded': {'FA_AUTH_THREADS': '64', 'FA_AUTH_MAX_PENDING': '100000'},
+    'bounded': {'FA_AUTH_MAX_PENDING': '16'},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1e3 if values else float('nan')
+
+
+def login(base_url):
+    req = urllib.request.Request(base_url + '/login', headers={'Content-Type': 'application/json'},
+                                 data=json.dumps({'username': 'student1', 'password': 'student123'}).encode())
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def submit_while(base_url, running):
+    """Submission latencies from SUBMIT_CLIENTS clients until running is cleared"""
+    latencies = []
+
+    def client():
+        post = _client(base_url)
+        while running.is_set():
+            start = time.perf_counter()
+            post('/student/submit_assessment', PAYLOAD)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(SUBMIT_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    return threads, latencies
+
+
+def run(base_url, n_logins, n_clients):
+    running = threading.Event()
+    running.set()
+    threads, submit_latencies = submit_while(base_url, running)
+    latencies, statuses = [], []
+
+    def timed_login(_):
+        start = time.perf_counter()
+        statuses.append(login(base_url))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_clients) as pool:
+        list(pool.map(timed_login, range(n_logins)))
+    elapsed = time.perf_counter() - start
+    running.clear()
+    for thread in threads:
+        thread.join()
+    ok = [latency for latency, status in zip(latencies, statuses) if status == 200]
+    return {
+        'rps': len(ok) / elapsed,
+        'p50_ms': percentile(ok, 0.5),
+        'p99_ms': percentile(ok, 0.99),
+        'busy': statuses.count(503),
+        'submit_p99_ms': percentile(submit_latencies, 0.99),
+    }
+
+
+def submit_only(base_url, seconds=3):
+    running = threading.Event()
+    running.set()
+    threads, latencies = submit_while(base_url, running)
+    time.sleep(seconds)
+    running.clear()
+    for thread in threads:
+        thread.join()
+    return percentile(latencies, 0.99)
+
+
+def lookups(n_users=20_000, repeat=20_000):
+    """Per-lookup ms: the users query vs a UserCache hit"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)')
+    conn.executemany('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                     [(f'student{i}', 'scrypt$...', 'student') for i in range(n_users)])
+    names = [f'student{i % n_users}' for i in range(repeat)]
+    cache = UserCache()
+    start = time.perf_counter()
+    for name in names:
+        cache.put(name, conn.execute('SELECT id, role, password FROM users WHERE username = ?', (name,)).fetchone())
+    query_ms = (time.perf_counter() - start) / repeat * 1e3
+    start = time.perf_counter()
+    for name in names:
+        cache.get(name)
+    return query_ms, (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins per run, {SUBMIT_CLIENTS} clients submitting alongside")
+    print(f"{'mode':<10} {'clients':>7} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'503s':>5} "
+          f"{'submit p99 ms':>14}")
+    for port, (mode, overrides) in enumerate(MODES.items(), start=5201):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, FA_DB_PATH=os.path.join(tmp, 'login.db'), FA_PRECOMPUTED='1', **overrides)
+            server = subprocess.Popen([sys.executable, '-W', 'ignore', '-m', 'benchmarks.load_test_submit',
+                                       '--serve', str(port)], env=env, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                wait_until_up(base_url)
+                print(f"{mode:<10} {0:>7} {'':>9} {'':>8} {'':>8} {'':>5} {submit_only(base_url):>14.2f}")
+                for n_clients in args.clients:
+                    result = run(base_url, args.logins, n_clients)
+                    print(f"{mode:<10} {n_clients:>7} {result['rps']:>9.1f} {result['p50_ms']:>8.1f} "
+                          f"{result['p99_ms']:>8.1f} {result['busy']:>5} {result['submit_p99_ms']:>14.2f}")
+            finally:
+                server.send_signal(signal.SIGINT)
+                server.wait()
+
+    query_ms, cached_ms = lookups()
+    print(f"\nuser lookup: users query {query_ms:.4f} ms, UserCache hit {cached_ms:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
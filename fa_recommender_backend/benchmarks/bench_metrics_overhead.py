@@ -0,0 +1,79 @@
+"""Cost of the instrumentation: submit_assessment with FA_METRICS off and on.
+
+Each mode runs in a fresh interpreter on a throwaway database (metrics
+are switched on at import) and times submissions through Flask's test
+client. Predictions use the precomputed table, so the request path is
+as cheap as it gets and the overhead is at its most visible. The cost of
+a disabled stage() is also timed on its own.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_metrics_overhead [--requests 3000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test_submit import PAYLOAD
+
+
+def run(n_requests):
+    """Child process: time n_requests submissions and print the mean as JSON"""
+    from app import app, response_writer
+
+    client = app.test_client()
+    client.post('/login', json={'username': 'student1', 'password': 'student123'})
+    for _ in range(100):
+        client.post('/student/submit_assessment', json=PAYLOAD)
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        client.post('/student/submit_assessment', json=PAYLOAD)
+    elapsed = time.perf_counter() - start
+    response_writer.close()
+    print(json.dumps({'us_per_request': elapsed / n_requests * 1e6}))
+
+
+def disabled_stage_ns(n=1_000_000):
+    from utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    start = time.perf_counter()
+    for _ in range(n):
+        with registry.stage('predict'):
+            pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run)
+        return
+
+    print(f"disabled stage(): {disabled_stage_ns():.0f} ns per with-block")
+    print(f"{args.requests} submissions through the test client")
+    results = {}
+    for mode, enabled in (('FA_METRICS off', '0'), ('FA_METRICS on', '1')):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, FA_DB_PATH=os.path.join(tmp, 'bench.db'), FA_PRECOMPUTED='1',
+                       FA_MODEL_WATCH_INTERVAL='0', FA_METRICS=enabled)
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-m', 'benchmarks.bench_metrics_overhead',
+                                  '--run', str(args.requests)], env=env, capture_output=True, text=True,
+                                 check=True).stdout
+            results[mode] = json.loads(out.strip().splitlines()[-1])['us_per_request']
+        print(f"{mode:>15}: {results[mode]:7.1f} us/request")
+    off, on = results['FA_METRICS off'], results['FA_METRICS on']
+    print(f"overhead when on: {on - off:+.1f} us/request ({(on - off) / off:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Throughput and latency of concurrent single predictions, direct vs micro-batched.
+
+Client threads each call InferenceBatcher.predict in a loop, as
+concurrent submit_assessment handlers would. The model is the sklearn
+forest (no lookup table, not compiled), where per-call overhead
+dominates; max_wait=0 is the direct-call baseline.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_micro_batching [--calls 400]
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.synthetic import make_students
+from models.batch_scheduler import InferenceBatcher
+from models.model_loader import LazyModel
+
+CONCURRENCY = (1, 4, 16, 32)
+
+
+def run(batcher, students, concurrency, calls):
+    latencies = []
+    per_thread = max(calls // concurrency, 1)
+
+    def client(offset):
+        for i in range(per_thread):
+            start = time.perf_counter()
+            batcher.predict(students[(offset + i) % len(students)])
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(n * per_thread,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1e3,
+        'p99_ms': latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    parser.add_argument('--max-batch', type=int, default=32)
+    args = parser.parse_args()
+
+    lazy_model = LazyModel()
+    students = make_students(1000)
+
+    # Sanity check: batched predictions match predict_fa_tool
+    model = lazy_model.get()
+    checker = InferenceBatcher(lazy_model, args.max_wait_ms / 1e3, args.max_batch)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, checker.predict(students[i])[1]))
+               for i in range(64)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, result in results.items():
+        assert result == model.predict_fa_tool(students[i])
+    checker.close()
+
+    print(f"{args.calls} predictions per run; max_wait {args.max_wait_ms} ms, max_batch {args.max_batch}")
+    print(f"{'clients':>7} {'mode':>8} {'pred/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10} {'queue ms':>9}")
+    for concurrency in CONCURRENCY:
+        for mode, max_wait in (('direct', 0), ('batched', args.max_wait_ms / 1e3)):
+            batcher = InferenceBatcher(lazy_model, max_wait, args.max_batch)
+            result = run(batcher, students, concurrency, args.calls)
+            stats = batcher.stats()
+            batcher.close()
+            print(f"{concurrency:>7} {mode:>8} {result['rps']:>8.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {stats['avg_batch_size']:>10.1f} {stats['avg_queue_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-prediction latency with and without the prediction cache.
+
+Single predictions through InferenceBatcher (as submit_assessment makes
+them) for a stream of random students; the four features only take a
+few hundred distinct values, so most of a class repeats an earlier
+tuple. The model is the sklearn forest (no lookup table, not compiled).
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_prediction_cache [--calls 2000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_students
+from models.batch_scheduler import InferenceBatcher
+from models.model_loader import LazyModel
+from models.prediction_cache import PredictionCache, SqliteCacheStore
+
+
+def run(batcher, students):
+    start = time.perf_counter()
+    for student in students:
+        batcher.predict(student)
+    return (time.perf_counter() - start) / len(students) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    lazy_model = LazyModel()
+    students = make_students(args.calls)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = (
+            ('no cache', None),
+            ('LRU', PredictionCache()),
+            ('LRU + shared SQLite', PredictionCache(store=SqliteCacheStore(os.path.join(tmp, 'cache.db')))),
+            ('LRU (warm shared)', PredictionCache(store=SqliteCacheStore(os.path.join(tmp, 'cache.db')))),
+        )
+        print(f"{args.calls} single predictions")
+        print(f"{'config':>20} {'ms/call':>8} {'hit ratio':>10} {'shared hits':>12} {'saved ms':>9}")
+        for name, cache in configs:
+            ms = run(InferenceBatcher(lazy_model, max_wait=0, cache=cache), students)
+            stats = cache.stats() if cache else {'hit_ratio': 0.0, 'shared_hits': 0, 'saved_ms': 0.0}
+            print(f"{name:>20} {ms:>8.3f} {stats['hit_ratio']:>10.2f} {stats['shared_hits']:>12} "
+                  f"{stats['saved_ms']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Check the precomputed prediction table against the forest and time both.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_prediction_table
+"""
+import itertools
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_students
+from models.feature_encoder import feature_domain
+from models.ml_model import FARecommendationModel
+
+
+def check_table(model):
+    """Every reachable input must give exactly the forest's probabilities"""
+    grid = np.array(list(itertools.product(*(feature_domain(name) for name in model.feature_names))),
+                    dtype=np.float32)
+    expected = model.model.predict_proba(grid)
+
+    for row, proba in zip(grid, expected):
+        assert np.array_equal(model.table.lookup(row), proba)
+
+    looked_up, hit = model.table.lookup_many(grid)
+    assert hit.all() and np.array_equal(looked_up, expected)
+
+    # Off-grid values must miss rather than alias another key
+    assert model.table.lookup(np.array([2, 1, 2.5, 3], dtype=np.float32)) is None
+    return len(grid)
+
+
+def time_single(model, students):
+    start = time.perf_counter()
+    for student in students:
+        model.predict_fa_tool(student)
+    return (time.perf_counter() - start) / len(students)
+
+
+def main():
+    forest = FARecommendationModel()
+    forest.load_model()
+    table = FARecommendationModel(precomputed=True)
+    table.load_model()
+
+    print(f"table matches forest on {check_table(table)} inputs")
+
+    students = make_students(500)
+    for a, b in zip(forest.predict_batch(students), table.predict_batch(students)):
+        assert a == b
+
+    forest_time = time_single(forest, students[:200])
+    table_time = time_single(table, students)
+    print(f"predict_fa_tool forest: {forest_time * 1e6:9.1f} us")
+    print(f"predict_fa_tool table:  {table_time * 1e6:9.1f} us ({forest_time / table_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
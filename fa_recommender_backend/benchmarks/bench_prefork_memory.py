@@ -0,0 +1,96 @@
+"""Per-worker memory of the pre-fork gunicorn server with and without a shared model.
+
+Starts gunicorn with gunicorn.conf.py on a throwaway database for each mode,
+sends prediction requests so every worker has used the model, then reads
+RSS and PSS of the master and each worker from /proc/<pid>/smaps_rollup.
+PSS splits shared pages between the processes using them, so the PSS total
+is what the server really costs. Linux only.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_prefork_memory [--workers 4] [--requests 400]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test_submit import PAYLOAD, _client, wait_until_up
+from models.ml_model import FARecommendationModel
+from utils.memory import child_pids, process_memory
+
+MODES = {
+    'per-worker pickle': {'FA_PRELOAD': '0', 'FA_COMPILED': '0'},
+    'preloaded pickle': {'FA_PRELOAD': '1', 'FA_COMPILED': '0'},
+    'per-worker compiled': {'FA_PRELOAD': '0', 'FA_COMPILED': '1'},
+    'preloaded compiled': {'FA_PRELOAD': '1', 'FA_COMPILED': '1'},
+}
+
+
+def wait_for_workers(master_pid, n_workers, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        workers = child_pids(master_pid)
+        if len(workers) >= n_workers:
+            return workers
+        time.sleep(0.2)
+    raise RuntimeError("workers did not start")
+
+
+def measure(mode_env, port, n_workers, n_requests):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FA_DB_PATH=os.path.join(tmp, 'prefork.db'),
+                   FA_BIND=f'127.0.0.1:{port}', FA_WORKERS=str(n_workers), **mode_env)
+        server = subprocess.Popen([sys.executable, '-W', 'ignore', '-m', 'gunicorn',
+                                   '-c', 'gunicorn.conf.py', 'app:app'],
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            wait_until_up(base_url)
+            workers = wait_for_workers(server.pid, n_workers)
+
+            # A new connection per request, so the requests spread over the workers
+            for _ in range(n_requests):
+                _client(base_url)('/student/submit_assessment', PAYLOAD)
+
+            master = process_memory(server.pid)
+            usage = [process_memory(pid) for pid in workers]
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait()
+    return master, usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    if process_memory() is None:
+        sys.exit("needs /proc/<pid>/smaps_rollup (Linux)")
+
+    # The shipped artifact predates save_model exporting its compiled forest
+    model = FARecommendationModel()
+    model.load_model()
+    model.export_compiled()
+
+    print(f"{args.workers} workers, {args.requests} prediction requests (MB)")
+    print(f"{'mode':>20} {'worker RSS':>11} {'worker PSS':>11} {'shared':>7} "
+          f"{'private':>8} {'total PSS':>10}")
+    for port, (mode, mode_env) in enumerate(MODES.items(), start=5201):
+        master, usage = measure(mode_env, port, args.workers, args.requests)
+        n = len(usage)
+        rss = sum(u['rss_kb'] for u in usage) / n / 1024
+        pss = sum(u['pss_kb'] for u in usage) / n / 1024
+        shared = sum(u['shared_clean_kb'] + u['shared_dirty_kb'] for u in usage) / n / 1024
+        private = sum(u['private_clean_kb'] + u['private_dirty_kb'] for u in usage) / n / 1024
+        total = (master['pss_kb'] + sum(u['pss_kb'] for u in usage)) / 1024
+        print(f"{mode:>20} {rss:>11.1f} {pss:>11.1f} {shared:>7.1f} {private:>8.1f} {total:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compiled/streaming rubric HTML renderer vs. the old string concatenation.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_rubric_html
+"""
+import time
+
+from utils.rubric_generator import RubricGenerator
+from utils.rubric_renderer import RubricHtmlRenderer
+
+
+def legacy_rubric_html(rubric_data):
+    """The previous RubricGenerator.generate_rubric_html, kept as the baseline"""
+    html = f"""
+        <div class="rubric-container">
+            <h2>Assessment Rubric: {rubric_data['assessment_name']}</h2>
+            <div class="rubric-info">
+                <p><strong>FA Tool:</strong> {rubric_data['fa_tool']}</p>
+                <p><strong>Bloom's Level:</strong> {rubric_data['bloom_level']}</p>
+                <p><strong>Total Marks:</strong> {rubric_data['total_marks']}</p>
+            </div>
+            <table class="rubric-table">
+                <thead>
+                    <tr>
+                        <th>Criteria</th>
+                        <th>Marks</th>
+                        <th>Excellent</th>
+                        <th>Good</th>
+                        <th>Satisfactory</th>
+                        <th>Needs Improvement</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+    for criterion in rubric_data['criteria']:
+        html += f"""
+                    <tr>
+                        <td><strong>{criterion['criterion']}</strong></td>
+                        <td>{criterion['marks']}</td>
+            """
+        for level in criterion['levels']:
+            html += f"""
+                        <td>
+                            <div class="level-info">
+                                <strong>{level['range']}</strong><br>
+                                <span class="marks">({level['marks']} marks)</span><br>
+                                <p>{level['description']}</p>
+                            </div>
+                        </td>
+                """
+        html += "</tr>"
+    html += """
+                </tbody>
+            </table>
+            <div class="bloom-integration">
+                <h3>Bloom's Taxonomy Integration</h3>
+                <p><strong>Target Level:</strong> {}</p>
+                <p><strong>Assessment Focus:</strong> {}</p>
+            </div>
+        </div>
+        """.format(
+        rubric_data['bloom_integration']['target_level'],
+        rubric_data['bloom_integration']['assessment_focus']
+    )
+    return html
+
+
+def make_rubric(n_criteria):
+    base = RubricGenerator().generate_rubric('Benchmark', 'Project', 100, 'Apply')
+    criteria = [dict(base['criteria'][i % len(base['criteria'])], criterion=f'Criterion {i}')
+                for i in range(n_criteria)]
+    return dict(base, criteria=criteria)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    renderer = RubricHtmlRenderer()
+    print(f"{'criteria':>9} {'concat ms':>10} {'render ms':>10} {'first chunk us':>15}")
+    for n in (4, 40, 400):
+        rubric = make_rubric(n)
+        repeat = 2000 // n + 5
+        concat = best_of(lambda: legacy_rubric_html(rubric), repeat)
+        render = best_of(lambda: renderer.render(rubric), repeat)
+        first = best_of(lambda: next(renderer.iter_rubric(rubric)), repeat)
+        print(f"{n:>9} {concat * 1e3:>10.3f} {render * 1e3:>10.3f} {first * 1e6:>15.1f}")
+
+    course = [make_rubric(6) for _ in range(200)]
+    doc = best_of(lambda: renderer.render_document(course), 5)
+    print(f"\ncourse document, 200 rubrics: {doc * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Import-time profile of app.py per model loading mode, with a budget.
+
+Runs `python -X importtime -c "import app"` against a throwaway database
+for each FA_MODEL_LOADING mode and exits non-zero if the fast-start
+(lazy) import exceeds the budget.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_startup [--budget-ms 600]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Import budget for FA_MODEL_LOADING=lazy, in milliseconds
+DEFAULT_BUDGET_MS = 600
+
+HEAVY_MODULES = ('numpy', 'pandas', 'sklearn', 'scipy', 'joblib')
+
+
+def profile_import(mode, db_path):
+    """Returns (wall seconds, {module: cumulative us}, heavy modules imported)"""
+    env = dict(os.environ, FA_MODEL_LOADING=mode, FA_DB_PATH=db_path)
+    probe = f"import app, sys; print('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', probe],
+                          env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, _, cum, name = line.replace('import time:', '|').split('|')
+        # Keep the indentation: it encodes the import nesting depth
+        cumulative[name[1:].rstrip()] = int(cum)
+    heavy = [line[len('HEAVY:'):] for line in proc.stdout.splitlines() if line.startswith('HEAVY:')]
+    return wall, cumulative, heavy[0] if heavy else ''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    lazy_ms = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('eager', 'background', 'lazy'):
+            wall, cumulative, heavy = profile_import(mode, os.path.join(tmp, f'{mode}.db'))
+            # A background warm-up thread importing concurrently can shift app's indentation
+            app_ms = max(us for name, us in cumulative.items() if name.strip() == 'app') / 1e3
+            print(f"{mode:>10}: import app {app_ms:8.1f} ms, process {wall * 1e3:8.1f} ms, "
+                  f"heavy modules: {heavy or 'none'}")
+            if mode == 'lazy':
+                lazy_ms = app_ms
+                # Direct imports of app are indented by two spaces
+                top = sorted(((us, name) for name, us in cumulative.items()
+                              if name.startswith('  ') and not name.startswith('   ')), reverse=True)[:args.top]
+                for us, name in top:
+                    print(f"{'':>12}{us / 1e3:8.1f} ms  {name.strip()}")
+
+    print(f"\nlazy import budget {args.budget_ms:.0f} ms: {'OK' if lazy_ms <= args.budget_ms else 'EXCEEDED'}")
+    if lazy_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Training time and peak memory on synthetic datasets of 10k, 1M and 10M rows.
+
+Each configuration runs in a fresh interpreter so its peak RSS (VmHWM)
+is its own:
+
+    whole-frame     pd.read_csv + preprocess_data + fit, n_jobs=1 (train_model's path)
+    chunked         read_csv_chunks + fit_forest with n_jobs=-1
+    chunked compact the same on distinct rows weighted by count
+    warm start      grow the compact forest by 20 trees on 1% new rows
+
+Fitting 100 trees on every raw row takes minutes per million rows, so the
+raw-row configurations are skipped above --max-raw-rows.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.bench_training [--sizes 10000 1000000 10000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import write_dataset
+
+CONFIGS = ('whole-frame', 'chunked', 'chunked compact', 'warm start')
+RAW_CONFIGS = ('whole-frame', 'chunked')
+
+
+def peak_rss_mb():
+    for line in open('/proc/self/status'):
+        if line.startswith('VmHWM'):
+            return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def run(config, path, new_rows_path):
+    """Child process: train one configuration and print its timings as JSON"""
+    import sklearn.ensemble  # imported up front: import time isn't fit time
+    from models.training import (TrainingData, csv_feature_names, fit_forest, grow_forest,
+                                 read_csv_chunks)
+
+    start = time.perf_counter()
+    if config == 'whole-frame':
+        import pandas as pd
+        from models.ml_model import FARecommendationModel
+
+        df = pd.read_csv(path)
+        X = FARecommendationModel().preprocess_data(df).fillna(0).to_numpy(dtype=np.float32)
+        y = df['PreferredTool']
+        read_seconds = time.perf_counter() - start
+        fit_start = time.perf_counter()
+        sklearn.ensemble.RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y)
+        fit_seconds = time.perf_counter() - fit_start
+    else:
+        feature_names = csv_feature_names(path)
+        data = TrainingData(len(feature_names), compact=config != 'chunked')
+        for X, y in read_csv_chunks(path, feature_names):
+            data.add(X, y)
+        read_seconds = time.perf_counter() - start
+        fit_start = time.perf_counter()
+        forest = fit_forest(data)
+        fit_seconds = time.perf_counter() - fit_start
+
+        if config == 'warm start':
+            start = time.perf_counter()
+            data = TrainingData(len(feature_names), compact=True)
+            for X, y in read_csv_chunks(new_rows_path, feature_names):
+                data.add(X, y)
+            read_seconds = time.perf_counter() - start
+            fit_start = time.perf_counter()
+            grow_forest(forest, data, 20)
+            fit_seconds = time.perf_counter() - fit_start
+            assert len(forest.estimators_) == 120
+            forest.predict_proba(X[:10])
+
+    print(json.dumps({'read': read_seconds, 'fit': fit_seconds, 'peak_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-raw-rows', type=int, default=1_000_000)
+    parser.add_argument('--run', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(*args.run)
+        return
+
+    print(f"{os.cpu_count()} CPU(s); 100 trees; times in seconds, peak RSS in MB")
+    print(f"{'rows':>10} {'config':>16} {'read':>8} {'fit':>9} {'peak RSS':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            path = os.path.join(tmp, 'train.csv')
+            new_rows_path = os.path.join(tmp, 'new.csv')
+            write_dataset(path, n_rows)
+            write_dataset(new_rows_path, max(n_rows // 100, 100), seed=1)
+
+            for config in CONFIGS:
+                if config in RAW_CONFIGS and n_rows > args.max_raw_rows:
+                    print(f"{n_rows:>10} {config:>16} {'skipped (> --max-raw-rows)':>28}")
+                    continue
+                out = subprocess.run([sys.executable, '-W', 'ignore', '-m', 'benchmarks.bench_training',
+                                      '--run', config, path, new_rows_path],
+                                     capture_output=True, text=True, check=True).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(f"{n_rows:>10} {config:>16} {result['read']:>8.2f} {result['fit']:>9.2f} "
+                      f"{result['peak_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""WSGI vs ASGI serving: the shared client checks, then a submission load test.
+
+Each mode serves the app on a throwaway database in a subprocess:
+
+    werkzeug threaded   the development server, one thread per request
+    gunicorn gthread    one worker, 8 threads
+    uvicorn asgi        asgi:app, inference and DB work on executors
+
+client_test.run_checks must pass against every mode before it is timed.
+Predictions use the precomputed table so the numbers reflect the serving
+path rather than the forest.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.load_test_asgi [--requests 2000] [--concurrency 16]
+"""
+import argparse
+import contextlib
+import io
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load_test_submit import run_load, wait_until_up
+
+
+def server_command(mode, port):
+    if mode == 'werkzeug threaded':
+        return [sys.executable, '-W', 'ignore', '-m', 'benchmarks.load_test_submit', '--serve', str(port)]
+    if mode == 'gunicorn gthread':
+        # gthread intermittently drops a kept-alive connection right after a
+        # response, which the checks' requests.Session would then reuse; the
+        # load itself opens a connection per request either way
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--worker-class', 'gthread',
+                '--threads', '8', '--keep-alive', '0', 'app:app']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning']
+
+
+MODES = ('werkzeug threaded', 'gunicorn gthread', 'uvicorn asgi')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    import client_test
+
+    print(f"{args.requests} submissions, {args.concurrency} concurrent clients")
+    for port, mode in enumerate(MODES, start=5201):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, FA_DB_PATH=os.path.join(tmp, 'load.db'), FA_PRECOMPUTED='1',
+                       FA_COMPILED='0', FA_MODEL_WATCH_INTERVAL='0', FA_WORKERS='1',
+                       FA_BIND=f'127.0.0.1:{port}')
+            server = subprocess.Popen(server_command(mode, port), env=env, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                wait_until_up(base_url)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    client_test.run_checks(base_url)
+                result = run_load(base_url, args.requests, args.concurrency)
+            finally:
+                # SIGINT lets the app shut down cleanly and drain queued writes
+                server.send_signal(signal.SIGINT)
+                server.wait()
+        print(f"{mode:>18}: checks ok  {result['rps']:7.1f} req/s  p50 {result['p50_ms']:6.2f} ms  "
+              f"p99 {result['p99_ms']:7.2f} ms  ({result['ok']} ok)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Concurrent /student/submit_assessment load test across DB write modes.
+
+Starts the app on a throwaway database in a subprocess per mode and fires
+concurrent submissions from a thread pool. Predictions use the
+precomputed table so the numbers reflect the request + SQLite path.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.load_test_submit [--requests 2000] [--concurrency 16]
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PAYLOAD = {
+    'assessment_id': 1, 'year': '2nd Year', 'learning_style': 'Visual',
+    'confidence': 4, 'bloom_level': 'Apply', 'resources': ['Slides'],
+    'previous_tools': ['Quiz'], 'bloom_focus': ['Apply']
+}
+
+MODES = {
+    'per-request connect': {'FA_DB_POOL_SIZE': '0', 'FA_SYNC_WRITES': '1'},
+    'pooled + WAL': {'FA_DB_POOL_SIZE': '8', 'FA_SYNC_WRITES': '1'},
+    'write-behind': {'FA_DB_POOL_SIZE': '8'},
+}
+
+
+def _client(base_url):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def post(path, body):
+        req = urllib.request.Request(base_url + path, data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+        with opener.open(req) as resp:
+            return resp.status
+    post('/login', {'username': 'student1', 'password': 'student123'})
+    return post
+
+
+def run_load(base_url, n_requests, concurrency):
+    local = threading.local()
+    latencies = []
+
+    def submit(_):
+        if not hasattr(local, 'post'):
+            local.post = _client(base_url)
+        start = time.perf_counter()
+        status = local.post('/student/submit_assessment', PAYLOAD)
+        latencies.append(time.perf_counter() - start)
+        return status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = list(pool.map(submit, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'ok': statuses.count(200),
+        'rps': n_requests / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1e3,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1e3,
+    }
+
+
+def serve(port):
+    """Child process: serve the app with threads until killed"""
+    from werkzeug.serving import make_server
+    from app import app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/').close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    print(f"{args.requests} submissions, {args.concurrency} concurrent clients")
+    for port, (mode, overrides) in enumerate(MODES.items(), start=5101):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'load.db')
+            env = dict(os.environ, FA_DB_PATH=db_path, FA_PRECOMPUTED='1', **overrides)
+            server = subprocess.Popen([sys.executable, '-W', 'ignore', '-m', 'benchmarks.load_test_submit',
+                                       '--serve', str(port)], env=env, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                wait_until_up(base_url)
+                result = run_load(base_url, args.requests, args.concurrency)
+            finally:
+                # SIGINT lets the app shut down cleanly and drain queued writes
+                server.send_signal(signal.SIGINT)
+                server.wait()
+            with sqlite3.connect(db_path) as conn:
+                stored = conn.execute('SELECT COUNT(*) FROM student_responses').fetchone()[0]
+        print(f"{mode:>20}: {result['rps']:7.1f} req/s  p50 {result['p50_ms']:6.2f} ms  "
+              f"p99 {result['p99_ms']:7.2f} ms  ({result['ok']} ok, {stored} stored)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Benchmark suite over the model, rubric and API hot paths, with a stored baseline.
+
+Every case reports seconds per operation (lower is better) as the best
+mean of a few repeats. Results are written as JSON and compared against
+benchmarks/baseline.json: a metric more than --threshold slower than its
+baseline value is reported as a regression and the run exits with 1.
+The baseline is only meaningful on the machine that recorded it; on a
+shared or single-CPU host the endpoint cases move by 20-30% between
+runs, so save a local baseline first and raise --threshold there.
+
+Costs that are deliberate rather than tuned are also held to an absolute
+per-operation ceiling in BUDGETS, independent of the baseline: a case
+over its budget fails the run even with a fresh baseline.
+
+    preprocess      FARecommendationModel.preprocess_data on a synthetic frame
+    predict         predict_fa_tool and predict_batch, pickle/compiled/precomputed
+    train           train_model on synthetic CSVs of several sizes
+    rubric          generate_rubric (cold and memoized), generate_rubric_html
+    endpoints       Flask test client against a seeded throwaway database
+
+The focused scripts next to this one (bench_*.py, load_test_*.py) compare
+alternative implementations of one path; this suite tracks the current
+one over time.
+
+Run from fa_recommender_backend/:
+
+    python -m benchmarks.suite [--quick] [--only predict rubric] [--output results.json]
+    python -m benchmarks.suite --save-baseline
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import (make_assessments, make_responses, make_students, make_submissions,
+                                  write_dataset)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Seconds per operation a case may never exceed, whatever the baseline says
+BUDGETS = {
+    # Login verifies a scrypt hash (utils.auth, n=2**14 by default): about
+    # 50-70 ms of one core by design, so its baseline can't be compared with
+    # plaintext-era runs. The budget catches a raised work factor or a
+    # saturated hashing pool.
+    'POST /login': 0.15,
+}
+CASES = {}
+
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def per_op(fn, number, repeat=5):
+    """Best mean seconds per call of fn() over `repeat` runs of `number` calls (GC paused, as timeit does)"""
+    best = float('inf')
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+@case('preprocess')
+def bench_preprocess(quick):
+    import pandas as pd
+    from models.ml_model import FARecommendationModel
+
+    n_rows = 1_000 if quick else 10_000
+    df = pd.DataFrame(make_students(n_rows))
+    model = FARecommendationModel()
+    return {f'preprocess_data.{n_rows}_rows': per_op(lambda: model.preprocess_data(df), 5 if quick else 20)}
+
+
+@case('predict')
+def bench_predict(quick):
+    from models.compiled_forest import CompiledForest
+    from models.ml_model import FARecommendationModel
+
+    students = make_students(1000)
+    batch = make_students(1000, seed=1)
+    results = {}
+    # Loading never writes the compiled forest, and without one compiled
+    # mode quietly serves the pickle, so export it first
+    with contextlib.redirect_stdout(io.StringIO()):
+        exporter = FARecommendationModel()
+        exporter.load_model()
+        exporter.export_compiled()
+    for mode, options in (('pickle', {}), ('compiled', {'compiled': True}), ('precomputed', {'precomputed': True})):
+        model = FARecommendationModel(**options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.load_model()
+        assert isinstance(model.model, CompiledForest) == (mode == 'compiled'), mode
+        it = iter(students * 1000)
+        number = (20 if quick else 200) if mode == 'pickle' else (200 if quick else 2000)
+        results[f'predict_fa_tool.{mode}'] = per_op(lambda: model.predict_fa_tool(next(it)), number)
+        results[f'predict_batch.{mode}.1000_rows'] = per_op(lambda: model.predict_batch(batch), 3 if quick else 10)
+    return results
+
+
+@case('train')
+def bench_train(quick):
+    from models.ml_model import FARecommendationModel
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # train_model saves to data/fa_model.pkl relative to the working directory
+        os.makedirs(os.path.join(tmp, 'data'))
+        os.chdir(tmp)
+        try:
+            for n_rows in ((1_000,) if quick else (1_000, 10_000, 100_000)):
+                path = os.path.join(tmp, f'train_{n_rows}.csv')
+                write_dataset(path, n_rows)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[f'train_model.{n_rows}_rows'] = per_op(
+                        lambda: FARecommendationModel().train_model(path), 1, repeat=1 if n_rows > 10_000 else 3)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+@case('rubric')
+def bench_rubric(quick):
+    from utils.rubric_generator import RubricGenerator
+    from utils.rubric_renderer import RubricHtmlRenderer
+
+    number = 500 if quick else 5000
+    inputs = {'assessment_name': 'Data Structures Quiz', 'fa_tool': 'Quiz', 'total_marks': 20,
+              'bloom_level': 'Apply'}
+    cold, memoized = RubricGenerator(cache_size=0), RubricGenerator()
+    rubric = memoized.generate_rubric(**inputs)
+    renderer = RubricHtmlRenderer()
+    course = [rubric] * 50
+    return {
+        'generate_rubric.cold': per_op(lambda: cold.generate_rubric(**inputs), number),
+        'generate_rubric.memoized': per_op(lambda: memoized.generate_rubric(**inputs), number),
+        'generate_rubric_html': per_op(lambda: memoized.generate_rubric_html(rubric), number),
+        'render_document.50_rubrics': per_op(lambda: renderer.render_document(course), number // 50),
+    }
+
+
+@case('endpoints')
+def bench_endpoints(quick):
+    """Runs last: importing app binds it to a throwaway database for the rest of the process"""
+    tmp = tempfile.mkdtemp()
+    os.environ.update(FA_DB_PATH=os.path.join(tmp, 'bench.db'), FA_MODEL_WATCH_INTERVAL='0')
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app, db_pool, response_writer, INSERT_RESPONSE_SQL
+
+    n_assessments = 200
+    with db_pool.connection() as conn:
+        conn.executemany('INSERT INTO assessments (teacher_id, subject_name, assessment_name, bloom_level) '
+                         'VALUES (?, ?, ?, ?)', make_assessments(n_assessments))
+        conn.executemany(INSERT_RESPONSE_SQL,
+                         make_responses(10_000, range(1, n_assessments + 1), student_ids=(2, 3)))
+        conn.commit()
+
+    teacher, student = app.test_client(), app.test_client()
+    teacher.post('/login', json={'username': 'teacher1', 'password': 'teacher123'})
+    student.post('/login', json={'username': 'student1', 'password': 'student123'})
+    submissions = iter(make_submissions(100_000, range(1, n_assessments + 1)))
+    batch = {'responses': make_submissions(100, range(1, n_assessments + 1), seed=1)}
+    assessment_ids = iter(list(range(1, n_assessments + 1)) * 1000)
+
+    listing_etag = teacher.get('/teacher/assessments').headers['ETag']
+
+    def post(client, path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 200, (path, response.status_code)
+
+    def settle():
+        # Let the write-behind thread drain so it doesn't run inside the next case
+        while response_writer.stats()['queue_depth']:
+            time.sleep(0.01)
+        time.sleep(2 * response_writer.flush_interval)
+
+    number = 50 if quick else 500
+    cases = (
+        # Each login is a full scrypt check (tens of ms), so far fewer of them
+        ('POST /login', max(1, number // 50),
+         lambda: post(app.test_client(), '/login', {'username': 'student1', 'password': 'student123'})),
+        ('POST /student/submit_assessment', number,
+         lambda: post(student, '/student/submit_assessment', next(submissions))),
+        ('POST /student/submit_assessments/batch.100', number // 10,
+         lambda: post(student, '/student/submit_assessments/batch', batch)),
+        ('GET /teacher/assessments', number, lambda: teacher.get('/teacher/assessments').get_data()),
+        ('GET /teacher/assessments.304', number,
+         lambda: teacher.get('/teacher/assessments', headers={'If-None-Match': listing_etag}).get_data()),
+        ('POST /teacher/generate_rubric', number,
+         lambda: post(teacher, f'/teacher/generate_rubric/{next(assessment_ids)}', {'total_marks': 20})),
+        ('GET /teacher/rubric.html', number, lambda: teacher.get('/teacher/rubric/1.html').get_data()),
+        ('GET /teacher/assessment/summary', number,
+         lambda: teacher.get(f'/teacher/assessment/{next(assessment_ids)}/summary').get_data()),
+    )
+    results = {}
+    for name, n, fn in cases:
+        settle()
+        results[name] = per_op(fn, n)
+    response_writer.close()
+    return results
+
+
+def environment(quick):
+    import numpy
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'quick': quick,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def _format_seconds(seconds):
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.3f}ms'
+    return f'{seconds * 1e6:.2f}us'
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline per metric; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'metric':<46} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<46} {'-':>11} {_format_seconds(seconds):>11} {'new':>8}")
+            continue
+        change = seconds / before - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  ⚠️ regression'
+        print(f"{name:<46} {_format_seconds(before):>11} {_format_seconds(seconds):>11} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def over_budget(results, budgets=BUDGETS):
+    """Print the cases slower than their BUDGETS entry; returns their names"""
+    over = [name for name, budget in budgets.items() if results.get(name, 0) > budget]
+    for name in over:
+        print(f"⚠️ {name}: {_format_seconds(results[name])} is over its "
+              f"{_format_seconds(budgets[name])} budget")
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare against a baseline")
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help="cases to run (default: all)")
+    parser.add_argument('--quick', action='store_true', help="smaller inputs and fewer iterations")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="relative slowdown reported as a regression (default 0.25)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or list(CASES):
+        start = time.perf_counter()
+        results.update(CASES[name](args.quick))
+        print(f"✅ {name} ({time.perf_counter() - start:.1f}s)")
+
+    document = {'environment': environment(args.quick), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+    over = over_budget(results)
+    if args.save_baseline:
+        if over:
+            print("⚠️ Not saving a baseline with cases over budget")
+            sys.exit(1)
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        sys.exit(1 if over else 0)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('quick') != args.quick:
+        print("⚠️ Baseline and this run differ in --quick; sizes that don't match are reported as new")
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+    if regressions or over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
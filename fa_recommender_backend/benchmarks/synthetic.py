@@ -0,0 +1,86 @@
+"""Synthetic students, submissions, assessments, responses and training CSVs.
+
+Everything is seeded, so two runs of a benchmark see the same data.
+"""
+import random
+
+YEARS = ['1st Year', '2nd Year', '3rd Year', '4th Year']
+STYLES = ['Visual', 'Auditory', 'Reading/Writing', 'Kinesthetic']
+BLOOMS = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']
+TOOLS = ['Quiz', 'Project', 'Lab Work', 'Case Study', 'Group Work', 'Presentation / PPT',
+         'Written Paper', 'Role Play', 'Reflection Journal']
+SUBJECTS = ['Physics', 'Chemistry', 'Mathematics', 'Biology', 'Computer Science']
+RESOURCES = ['Slides', 'Videos', 'Textbook', 'Notes', 'Labs']
+
+
+def make_students(n, seed=0):
+    """Feature dicts, as predict_fa_tool / predict_batch take them"""
+    rng = random.Random(seed)
+    return [{
+        'Year': rng.choice(YEARS),
+        'LearningStyle': rng.choice(STYLES),
+        'ConfidenceLevel': rng.randint(1, 5),
+        'BloomLevel': rng.choice(BLOOMS)
+    } for _ in range(n)]
+
+
+def make_submissions(n, assessment_ids=(1,), seed=0):
+    """POST /student/submit_assessment payloads"""
+    rng = random.Random(seed)
+    return [{
+        'assessment_id': rng.choice(assessment_ids),
+        'year': rng.choice(YEARS),
+        'learning_style': rng.choice(STYLES),
+        'confidence': rng.randint(1, 5),
+        'bloom_level': rng.choice(BLOOMS),
+        'resources': rng.sample(RESOURCES, 2),
+        'previous_tools': rng.sample(TOOLS, 1),
+        'bloom_focus': [rng.choice(BLOOMS)]
+    } for _ in range(n)]
+
+
+def make_assessments(n, teacher_ids=(1,), seed=0):
+    """(teacher_id, subject_name, assessment_name, bloom_level) rows for the assessments table"""
+    rng = random.Random(seed)
+    return [(rng.choice(teacher_ids), rng.choice(SUBJECTS), f'Assessment {i + 1}', rng.choice(BLOOMS))
+            for i in range(n)]
+
+
+def make_responses(n, assessment_ids, student_ids, seed=0):
+    """student_responses rows in app.INSERT_RESPONSE_SQL column order"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        tool = rng.choice(TOOLS)
+        rows.append((
+            rng.choice(assessment_ids), rng.choice(student_ids), rng.choice(YEARS), None, rng.randint(1, 5),
+            rng.choice(STYLES), None, None, None, ','.join(rng.sample(RESOURCES, 2)), rng.choice(TOOLS),
+            rng.choice(BLOOMS), tool, round(rng.random(), 4), 'Recommended based on ML model', None
+        ))
+    return rows
+
+
+def write_dataset(path, n_rows, seed=0, chunk=1_000_000):
+    """Training CSV in the data/dataset.csv layout; the label depends on the features plus 20% noise"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    header = True
+    for start in range(0, n_rows, chunk):
+        n = min(chunk, n_rows - start)
+        year, style = rng.integers(0, len(YEARS), n), rng.integers(0, len(STYLES), n)
+        confidence, bloom = rng.integers(1, 6, n), rng.integers(0, len(BLOOMS), n)
+        label = (year + 2 * bloom + style * (confidence > 3)) % len(TOOLS)
+        noisy = rng.random(n) < 0.2
+        label[noisy] = rng.integers(0, len(TOOLS), noisy.sum())
+        pd.DataFrame({
+            'StudentID': np.arange(start, start + n),
+            'Year': np.array(YEARS)[year],
+            'LearningStyle': np.array(STYLES)[style],
+            'ConfidenceLevel': confidence,
+            'PreferredTool': np.array(TOOLS)[label],
+            'LeastEffectiveTool': 'Quiz',
+            'BloomLevel': np.array(BLOOMS)[bloom]
+        }).to_csv(path, mode='w' if header else 'a', header=header, index=False)
+        header = False
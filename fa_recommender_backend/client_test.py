@@ -1,40 +1,124 @@
+"""End-to-end checks against a running server, WSGI or ASGI.
+
+    python client_test.py [--base-url http://127.0.0.1:5000] [--admin USERNAME PASSWORD]
+
+Expects a database with the default users (a fresh one is fine). The
+/admin routes are only checked for success when an admin account is given.
+"""
+import argparse
+import sys
+
 import requests
-import json
-
-# Use a session to persist cookies between requests
-session = requests.Session()
-
-# 1. Login
-login = session.post(
-    "http://127.0.0.1:5000/api/login",   # Use /api/login
-    json={"username": "student1", "password": "student123"}
-)
-
-print("Login Response:")
-print(json.dumps(login.json(), indent=2))
-
-if login.status_code != 200:
-    print("Login failed. Exiting...")
-    exit()
-
-# 2. Predict FA tool
-student_data = {
-    "student_id": 1,
-    "student_data": {
-        "year": 2,
-        "study_hours": 2,
-        "confidence": 4,
-        "learning_mode": 3,
-        "difficulty": 2,
-        "time_available": 2,
-        "topic_type": 3
-    }
+
+STUDENT_RESPONSE = {
+    "assessment_id": 1,
+    "year": "2nd Year",
+    "learning_style": "Visual",
+    "confidence": 4,
+    "bloom_level": "Apply",
+    "resources": ["Slides"],
+    "previous_tools": ["Quiz"],
+    "bloom_focus": ["Apply"]
 }
 
-predict = session.post(
-    "http://127.0.0.1:5000/api/predict",
-    json=student_data
-)
 
-print("\nPrediction Response:")
-print(json.dumps(predict.json(), indent=2))
+def check(name, condition):
+    if not condition:
+        raise AssertionError(name)
+    print(f"✅ {name}")
+
+
+def run_checks(base_url, admin=None):
+    # Use a session per user to persist cookies between requests
+    teacher = requests.Session()
+    student = requests.Session()
+
+    r = requests.get(f"{base_url}/")
+    check("index responds", r.status_code == 200 and r.json()["status"] == "Backend is running")
+    r = requests.get(f"{base_url}/ready")
+    check("ready", r.status_code == 200 and r.json()["ready"])
+
+    r = student.post(f"{base_url}/student/submit_assessment", json=STUDENT_RESPONSE)
+    check("submit requires login", r.status_code == 401)
+    r = student.post(f"{base_url}/login", json={"username": "student1", "password": "wrong"})
+    check("bad password rejected", r.status_code == 401)
+
+    # Teacher: create an assessment, list it, generate and render its rubric
+    r = teacher.post(f"{base_url}/login", json={"username": "teacher1", "password": "teacher123"})
+    check("teacher login", r.status_code == 200 and r.json()["role"] == "teacher")
+    r = teacher.post(f"{base_url}/teacher/create_assessment", json={
+        "subject_name": "Physics", "assessment_name": "Client check", "bloom_level": "Apply"})
+    check("create assessment", r.status_code == 200 and r.json()["assessment_id"])
+    assessment_id = r.json()["assessment_id"]
+    r = teacher.get(f"{base_url}/teacher/assessments", params={"after_id": assessment_id - 1, "limit": 1,
+                                                               "fields": "assessment_name"})
+    check("list assessments", r.status_code == 200
+          and r.json()["assessments"] == [{"id": assessment_id, "assessment_name": "Client check"}])
+    r = teacher.get(f"{base_url}/teacher/assessments", params={"after_id": assessment_id - 1, "limit": 1,
+                                                               "fields": "assessment_name"},
+                    headers={"If-None-Match": r.headers["ETag"]})
+    check("unchanged listing is a 304", r.status_code == 304)
+    r = teacher.get(f"{base_url}/teacher/assessments", params={"limit": 0})
+    check("bad page size rejected", r.status_code == 400)
+    r = teacher.get(f"{base_url}/teacher/assessments", params={"after_id": "abc"})
+    check("malformed cursor rejected", r.status_code == 400)
+
+    # Student: single and batch submissions
+    r = student.post(f"{base_url}/login", json={"username": "student1", "password": "student123"})
+    check("student login", r.status_code == 200 and r.json()["role"] == "student")
+    r = student.post(f"{base_url}/student/submit_assessment", json=dict(STUDENT_RESPONSE, assessment_id=assessment_id))
+    prediction = r.json().get("prediction", {})
+    check("submit assessment", r.status_code == 200 and prediction.get("predicted_tool")
+          and abs(sum(prediction["all_probabilities"].values()) - 1) < 1e-6)
+    r = student.post(f"{base_url}/student/submit_assessments/batch",
+                     json={"assessment_id": assessment_id, "responses": [STUDENT_RESPONSE] * 3})
+    check("batch submit", r.status_code == 200 and len(r.json()["predictions"]) == 3)
+    r = student.post(f"{base_url}/student/submit_assessments/batch", json={"responses": []})
+    check("empty batch rejected", r.status_code == 400)
+    r = student.post(f"{base_url}/student/submit_assessments/batch", json={"responses": [STUDENT_RESPONSE, 1, "x"]})
+    check("malformed batch item rejected", r.status_code == 400 and r.json().get("index") == 1)
+    r = student.post(f"{base_url}/student/submit_assessments/batch", json={"responses": [STUDENT_RESPONSE] * 501})
+    check("oversized batch rejected", r.status_code == 413)
+    r = student.get(f"{base_url}/admin/write_queue")
+    check("admin routes reject students", r.status_code == 401)
+
+    r = teacher.post(f"{base_url}/teacher/generate_rubric/{assessment_id}", json={"total_marks": 20})
+    check("generate rubric", r.status_code == 200 and r.json()["rubric"]["total_marks"] == 20)
+    r = teacher.get(f"{base_url}/teacher/rubric/{assessment_id}.html")
+    check("rubric html", r.status_code == 200 and r.headers["Content-Type"].startswith("text/html")
+          and "rubric-table" in r.text)
+    # Responses are written behind, so only the shape is checked here
+    r = teacher.get(f"{base_url}/teacher/assessment/{assessment_id}/summary")
+    check("class summary", r.status_code == 200 and r.json()["assessment_id"] == assessment_id
+          and isinstance(r.json()["predicted_tool"], list))
+    r = teacher.get(f"{base_url}/teacher/assessment/0/summary")
+    check("summary of unknown assessment", r.status_code == 404)
+    r = teacher.get(f"{base_url}/admin/write_queue")
+    check("admin routes reject teachers", r.status_code == 401)
+    if admin:
+        session = requests.Session()
+        r = session.post(f"{base_url}/login", json={"username": admin[0], "password": admin[1]})
+        check("admin login", r.status_code == 200 and r.json()["role"] == "admin")
+        r = session.get(f"{base_url}/admin/write_queue")
+        check("write queue stats", r.status_code == 200 and "rows_written" in r.json())
+
+    student.get(f"{base_url}/logout")
+    r = student.post(f"{base_url}/student/submit_assessment", json=STUDENT_RESPONSE)
+    check("logout ends the session", r.status_code == 401)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--admin', nargs=2, metavar=('USERNAME', 'PASSWORD'),
+                        help="an admin account (python -m utils.bulk_import) for the /admin checks")
+    args = parser.parse_args()
+    try:
+        run_checks(args.base_url.rstrip('/'), args.admin)
+    except AssertionError as e:
+        print(f"⚠️ Check failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Pre-fork serving: the model is loaded once in the master and shared by the workers.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+With preload_app the master imports app.py (loading the model) before
+forking, and the workers inherit it copy-on-write. The compiled forest is
+the default here because its node arrays are read-only memory maps of the
+.forest/<version>/*.npy files: nothing ever writes to those pages, so
+every worker keeps sharing them, whereas an unpickled sklearn forest is
+spread over many Python objects whose pages get copied as soon as
+refcounts change.
+GET /admin/memory reports the RSS/PSS of the worker that answers it.
+"""
+import gc
+import os
+import subprocess
+import sys
+
+bind = os.environ.get('FA_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('FA_WORKERS', 4))
+# FA_PRELOAD=0 makes every worker import the app (and load the model) itself
+preload_app = os.environ.get('FA_PRELOAD', '1') == '1'
+
+# Read by app.py when the master preloads it; set them explicitly to override
+os.environ.setdefault('FA_COMPILED', '1')
+os.environ.setdefault('FA_MODEL_LOADING', 'eager')
+
+# Workers only map the compiled forest; save_model exports it, but an
+# artifact saved before that (or copied in by hand) may not have one.
+# Export it once here, in a child so sklearn never loads into the master.
+if os.environ['FA_COMPILED'] == '1':
+    subprocess.run([sys.executable, '-W', 'ignore', '-m', 'models.compiled_forest'], check=False)
+
+
+def when_ready(server):
+    # Everything allocated by the preload moves to a generation the collector
+    # never scans, so a worker's GC passes don't touch (and copy) those pages
+    gc.freeze()
@@ -0,0 +1,212 @@
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+# Threads don't survive os.fork(): each forked worker restarts its own scheduler
+_schedulers = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for scheduler in list(_schedulers):
+        scheduler._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+# Upper bounds of the batch size histogram buckets (a batch of 3 counts under 4)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class InferenceBatcher:
+    """Coalesce concurrent single predictions into one predict_batch call.
+
+    predict() is what a request handler calls. When no other prediction is
+    in flight it runs predict_fa_tool directly on the caller's thread, so a
+    lone request pays nothing extra. Otherwise the request is queued: a
+    background thread collects queued requests for up to `max_wait`
+    seconds or `max_batch` items, whichever comes first, runs one
+    encode + predict_proba for the group with a single model and resolves
+    each caller's future. It stops waiting early once every in-flight
+    request has been collected.
+
+    max_wait=0 disables batching: every call is direct and no thread runs.
+
+    With a PredictionCache, cached predictions are answered straight from
+    it and only misses are computed (and then cached).
+    """
+
+    def __init__(self, lazy_model, max_wait=0.002, max_batch=32, cache=None):
+        self.lazy_model = lazy_model
+        self.cache = cache
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.enabled = max_wait > 0 and max_batch > 1
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._closed = False
+        self._stats = self._empty_stats()
+
+        self._worker = None
+        self._start_worker()
+        _schedulers.add(self)
+
+    def _empty_stats(self):
+        return {
+            'direct_calls': 0,
+            'batched_calls': 0,
+            'batches': 0,
+            'errors': 0,
+            'total_queue_ms': 0.0,
+            'max_queue_ms': 0.0,
+            'batch_sizes': dict.fromkeys(BATCH_SIZE_BUCKETS, 0)
+        }
+
+    def _start_worker(self):
+        if self.enabled:
+            self._worker = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+            self._worker.start()
+
+    def _reset(self):
+        # Requests queued before the fork belong to the parent's worker
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._stats = self._empty_stats()
+        self._worker = None
+        if not self._closed:
+            self._start_worker()
+
+    def predict(self, student_data):
+        """(model, prediction) for one student; the model is the one that made the prediction"""
+        return self.submit(student_data).result()
+
+    def submit(self, student_data):
+        """Future of (model, prediction); already resolved when the call ran directly or hit the cache"""
+        key = None
+        if self.cache is not None:
+            model = self.lazy_model.get()
+            if model.version is not None:
+                key = model.feature_key(student_data)
+                cached = self.cache.get(model.version, key)
+                if cached is not None:
+                    future = Future()
+                    future.set_result((model, cached))
+                    return future
+
+        with self._lock:
+            direct = not self.enabled or self._closed or self._inflight == 0
+            self._inflight += 1
+            self._stats['direct_calls' if direct else 'batched_calls'] += 1
+
+        future = Future()
+        if not direct:
+            future.add_done_callback(self._done)
+            self._queue.put((time.perf_counter(), student_data, key, future))
+            return future
+
+        try:
+            started = time.perf_counter()
+            model = self.lazy_model.get()
+            prediction = model.predict_fa_tool(student_data)
+            if key is not None:
+                self.cache.put(model.version, key, prediction, (time.perf_counter() - started) * 1e3)
+            future.set_result((model, prediction))
+        except Exception as e:
+            self._count_error()
+            future.set_exception(e)
+        finally:
+            self._done(future)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._inflight -= 1
+
+    def _count_error(self):
+        with self._lock:
+            self._stats['errors'] += 1
+
+    def _collect(self):
+        """Block for one queued request, then gather more until the batch is full or due"""
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = batch[0][0] + self.max_wait
+        while len(batch) < self.max_batch:
+            # Requests already queued always join; waiting for more is bounded by the deadline
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    others_inflight = self._inflight > len(batch)
+                timeout = deadline - time.perf_counter()
+                if not others_inflight or timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._predict(batch)
+
+    def _predict(self, batch):
+        started = time.perf_counter()
+        try:
+            model = self.lazy_model.get()
+            predictions = model.predict_batch([student_data for _, student_data, _, _ in batch])
+        except Exception as e:
+            self._count_error()
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1e3
+        self._record(len(batch), [(started - queued_at) * 1e3 for queued_at, _, _, _ in batch])
+        for (_, _, key, future), prediction in zip(batch, predictions):
+            if key is not None:
+                # Each row's share of the batch is what a later hit saves
+                self.cache.put(model.version, key, prediction, elapsed_ms / len(batch))
+            future.set_result((model, prediction))
+
+    def _record(self, size, queue_ms):
+        bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), BATCH_SIZE_BUCKETS[-1])
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['batch_sizes'][bucket] += 1
+            self._stats['total_queue_ms'] += sum(queue_ms)
+            self._stats['max_queue_ms'] = max(self._stats['max_queue_ms'], max(queue_ms))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, batch_sizes=dict(self._stats['batch_sizes']))
+            stats['inflight'] = self._inflight
+        total_ms = stats.pop('total_queue_ms')
+        stats['avg_queue_ms'] = total_ms / stats['batched_calls'] if stats['batched_calls'] else 0.0
+        stats['avg_batch_size'] = stats['batched_calls'] / stats['batches'] if stats['batches'] else 0.0
+        stats.update(enabled=self.enabled, max_wait_ms=self.max_wait * 1e3, max_batch=self.max_batch)
+        return stats
+
+    def close(self, timeout=5.0):
+        """Stop the worker once the requests already queued are answered"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
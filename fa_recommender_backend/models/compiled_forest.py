@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Arrays written one .npy per file so they can be memory-mapped
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots')
+
+# apply() works through this many rows at a time: every node's split
+# decision for a chunk is computed up front and has to stay in cache
+CHUNK_ROWS = 256
+
+
+def compiled_path(model_filename, version=None):
+    """Where compiled forests for a model artifact live (next to the .pkl), one directory per version"""
+    base = os.path.splitext(model_filename)[0] + '.forest'
+    return base if version is None else os.path.join(base, version)
+
+
+def prune(base, keep):
+    """Remove exported versions under `base` other than `keep` (and unfinished exports)"""
+    if not os.path.isdir(base):
+        return
+    for name in os.listdir(base):
+        if name in keep or name.endswith('.tmp'):
+            continue
+        # Processes that have these arrays mapped keep the (unlinked) pages
+        entry = os.path.join(base, name)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            os.remove(entry)  # files of the older, unversioned layout
+
+
+class CompiledForest:
+    """A RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one set of arrays: `roots[t]` is the first node of tree
+    t and `children` holds global node indices, interleaved so the next
+    node is children[2 * node + went_right]. Leaves point back at
+    themselves, so walking max_depth levels needs no leaf checks. `value`
+    holds each leaf's normalised class probabilities, so predict_proba is
+    the mean of the leaves reached by each tree. Exposes the same
+    predict_proba/predict/classes_ surface as the sklearn model, without
+    importing sklearn.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, classes, max_depth, n_features_in):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            own = np.arange(tree.node_count) + offset
+
+            # Leaves use feature 0 and loop back to themselves
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        children = np.empty(2 * offset, dtype=np.int32)
+        children[0::2] = np.concatenate(lefts)
+        children[1::2] = np.concatenate(rights)
+        return cls(
+            np.concatenate(features).astype(np.int32),
+            np.concatenate(thresholds).astype(np.float64),
+            children,
+            np.ascontiguousarray(np.concatenate(values)),
+            np.asarray(roots, dtype=np.int32),
+            forest.classes_,
+            max_depth,
+            forest.n_features_in_
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def _check_input(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D array, got {X.ndim}D input")
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest was fitted with "
+                             f"{self.n_features_in_} features")
+        return X
+
+    def apply(self, X):
+        """Global leaf index reached in every tree, shape (n_samples, n_trees).
+
+        Subtract roots to get sklearn's per-tree node ids.
+        """
+        X = self._check_input(X)
+        # Feature-major float64 copy: the split tests compare exactly as sklearn's do
+        columns = np.ascontiguousarray(X.T, dtype=np.float64)
+        threshold = self.threshold[:, None]
+        leaves = np.empty((len(self.roots), len(X)), dtype=np.intp)
+
+        for start in range(0, len(X), CHUNK_ROWS):
+            n = min(CHUNK_ROWS, len(X) - start)
+            # Every node's decision for every row of the chunk, then walk all
+            # trees level by level with one lookup per step
+            went_right = (columns[:, start:start + n][self.feature] > threshold).ravel()
+            rows = np.arange(n, dtype=np.intp)
+            node = np.repeat(self.roots[:, None].astype(np.intp), n, axis=1)
+            for _ in range(self.max_depth):
+                node = self.children[2 * node + went_right[node * n + rows]]
+            leaves[:, start:start + n] = node
+        return leaves.T
+
+    def predict_proba(self, X):
+        leaves = self.apply(X).T
+        # Accumulate tree by tree, in the same order as sklearn
+        proba = self.value[leaves[0]].copy() if len(leaves) else np.zeros((len(X), self.value.shape[1]))
+        for tree_leaves in leaves[1:]:
+            proba += self.value[tree_leaves]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, path, **metadata):
+        """Write the arrays and meta.json into directory `path`.
+
+        Everything is written into a temporary directory that is then
+        renamed to `path`, so a reader finds all of a version's files or
+        none. A saved version is never rewritten: processes that have its
+        arrays memory-mapped never see them change. If `path` already
+        exists (another process exported the same version) it is kept.
+        """
+        tmp = f'{path}.{os.getpid()}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(tmp, f'{name}.npy'), getattr(self, name))
+            meta = dict(metadata, classes=[str(c) for c in self.classes_], max_depth=self.max_depth,
+                        n_features_in=self.n_features_in_)
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved forest; returns (forest, metadata) or (None, None) if absent.
+
+        A forest exported in an older layout counts as absent.
+
+        With mmap=True the node arrays are memory-mapped read-only, so
+        processes loading the same files share the pages.
+        """
+        meta_file = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_file):
+            return None, None
+        with open(meta_file) as f:
+            meta = json.load(f)
+        files = [os.path.join(path, f'{name}.npy') for name in ARRAY_NAMES]
+        if 'n_features_in' not in meta or not all(os.path.exists(f) for f in files):
+            return None, None
+
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(f, mmap_mode=mode) for name, f in zip(ARRAY_NAMES, files)}
+        forest = cls(classes=meta.pop('classes'), max_depth=meta.pop('max_depth'),
+                     n_features_in=meta.pop('n_features_in'), **arrays)
+        return forest, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the compiled forest for a saved model")
+    parser.add_argument('--model', default='data/fa_model.pkl')
+    args = parser.parse_args()
+
+    from models.ml_model import FARecommendationModel
+    from models.prediction_table import file_digest
+
+    if not os.path.exists(args.model):
+        parser.error(f"{args.model} not found")
+    # Checked before loading the model, so an up-to-date export costs no sklearn import
+    path = compiled_path(args.model, file_digest(args.model)[:12])
+    if CompiledForest.load(path)[0] is None:
+        model = FARecommendationModel()
+        model.load_model(args.model)
+        path = model.export_compiled()
+    print(f"✅ Compiled forest at {path}")
+
+
+if __name__ == "__main__":
+    main()
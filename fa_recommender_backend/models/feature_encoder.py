@@ -0,0 +1,129 @@
+import math
+import threading
+
+import numpy as np
+
+# Categorical value → numeric code, shared by the DataFrame path used for
+# training and the compiled encoder used when serving.
+YEAR_MAPPING = {
+    '1st Year': 1,
+    '2nd Year': 2,
+    '3rd Year': 3,
+    '4th Year': 4
+}
+
+LEARNING_STYLE_MAPPING = {
+    'Visual': 1,
+    'Auditory': 2,
+    'Reading/Writing': 3,
+    'Kinesthetic': 4
+}
+
+BLOOM_MAPPING = {
+    'Remember': 1,
+    'Understand': 2,
+    'Apply': 3,
+    'Analyze': 4,
+    'Evaluate': 5,
+    'Create': 6
+}
+
+CATEGORICAL_MAPPINGS = {
+    'Year': YEAR_MAPPING,
+    'LearningStyle': LEARNING_STYLE_MAPPING,
+    'BloomLevel': BLOOM_MAPPING
+}
+
+# Values a numeric feature takes in well-formed requests
+CONFIDENCE_LEVELS = (1, 2, 3, 4, 5)
+
+NUMERIC_DOMAINS = {
+    'ConfidenceLevel': CONFIDENCE_LEVELS
+}
+
+
+def feature_domain(name):
+    """All encoded values a feature can take, including the 0 fill, or None if unbounded"""
+    if name in CATEGORICAL_MAPPINGS:
+        codes = CATEGORICAL_MAPPINGS[name].values()
+    elif name in NUMERIC_DOMAINS:
+        codes = NUMERIC_DOMAINS[name]
+    else:
+        return None
+    return sorted({0.0, *(float(code) for code in codes)})
+
+
+def _to_number(value):
+    """Numeric coercion matching pd.to_numeric(errors='coerce') + fillna(0)"""
+    if value is None or isinstance(value, bool):
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+def _categorical(mapping):
+    """Lookup matching Series.map(mapping) + fillna(0): unknown values become 0"""
+    table = {key: float(code) for key, code in mapping.items()}
+
+    def convert(value):
+        if isinstance(value, str):
+            return table.get(value, 0.0)
+        return 0.0
+    return convert
+
+
+class FeatureEncoder:
+    """Encode request dicts straight into float32 rows in feature_names order.
+
+    Built once per trained/loaded model. Produces the same values as
+    FARecommendationModel.preprocess_data followed by column padding and
+    fillna(0), without going through pandas.
+    """
+
+    def __init__(self, feature_names, mappings=None):
+        self.feature_names = list(feature_names)
+        mappings = CATEGORICAL_MAPPINGS if mappings is None else mappings
+
+        # One (key, lookup) pair per column, resolved up front
+        self._columns = []
+        for name in self.feature_names:
+            mapping = mappings.get(name)
+            convert = _categorical(mapping) if mapping is not None else _to_number
+            self._columns.append((name, convert))
+
+        self._local = threading.local()
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def _buffer(self):
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = np.zeros((1, self.n_features), dtype=np.float32)
+            self._local.row = row
+        return row
+
+    def encode(self, student_data, out=None):
+        """Encode one student into a (1, n_features) array.
+
+        Without `out`, a per-thread preallocated row is reused, so the result
+        is only valid until the next encode() call on the same thread.
+        """
+        row = self._buffer() if out is None else out
+        values = row[0] if row.ndim == 2 else row
+        get = student_data.get
+        for i, (name, convert) in enumerate(self._columns):
+            values[i] = convert(get(name))
+        return row
+
+    def encode_many(self, students):
+        """Encode a sequence of students into a fresh (n, n_features) array"""
+        students = list(students)
+        X = np.zeros((len(students), self.n_features), dtype=np.float32)
+        for i, student in enumerate(students):
+            self.encode(student, out=X[i])
+        return X
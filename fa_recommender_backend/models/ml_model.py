@@ -1,14 +1,30 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
 import os
 
+from models.compiled_forest import CompiledForest, compiled_path, prune
+from models.feature_encoder import (
+    FeatureEncoder, YEAR_MAPPING, LEARNING_STYLE_MAPPING, BLOOM_MAPPING
+)
+from models.prediction_table import PredictionTable, table_path, file_digest
+from utils.metrics import registry as metrics
+
+# sklearn, pandas and joblib are imported where they're needed, so a
+# process serving a compiled forest never loads them.
+
+# Past this many rows sklearn's compiled tree walk beats the NumPy one, so
+# compiled mode hands larger batches to the pickled forest (loaded on first
+# use; request batches stay below it)
+COMPILED_MAX_ROWS = 2000
+
+
+def model_version(filename):
+    """Version id of a model artifact: the start of its SHA-1"""
+    return file_digest(filename)[:12]
+
+
 class FARecommendationModel:
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+    def __init__(self, precomputed=False, compiled=False):
+        self.model = None
         self.feature_names = []
         self.fa_tools = [
             'Quiz', 'Project', 'Lab Work', 'Case Study', 'Group Work',
@@ -16,47 +32,41 @@ class FARecommendationModel:
             'Poster Presentation', 'Viva / Oral Test', 'Reflection Journal',
             'Open Book Test'
         ]
+        self.encoder = None
+
+        # Short digest of the artifact the model was loaded from / saved to
+        self.version = None
+
+        # "Precomputed" inference mode: answer from an exhaustive lookup table
+        self.precomputed = precomputed
+        self.table = None
+
+        # "Compiled" mode: serve from flat NumPy node arrays instead of sklearn
+        self.compiled = compiled
+        self.filename = None
+        self._sklearn_model = None
 
     def preprocess_data(self, df):
         """Preprocess dataset: map categorical to numeric, drop unused cols"""
+        import pandas as pd
 
         data = df.copy()
 
         # Year → numeric
-        year_mapping = {
-            '1st Year': 1,
-            '2nd Year': 2,
-            '3rd Year': 3,
-            '4th Year': 4
-        }
         if 'Year' in data.columns:
-            data['Year'] = data['Year'].map(year_mapping)
+            data['Year'] = data['Year'].map(YEAR_MAPPING)
 
         # Learning style → numeric
-        learning_style_mapping = {
-            'Visual': 1,
-            'Auditory': 2,
-            'Reading/Writing': 3,
-            'Kinesthetic': 4
-        }
         if 'LearningStyle' in data.columns:
-            data['LearningStyle'] = data['LearningStyle'].map(learning_style_mapping)
+            data['LearningStyle'] = data['LearningStyle'].map(LEARNING_STYLE_MAPPING)
 
         # ConfidenceLevel → numeric
         if 'ConfidenceLevel' in data.columns:
             data['ConfidenceLevel'] = pd.to_numeric(data['ConfidenceLevel'], errors='coerce')
 
         # Bloom’s taxonomy → numeric
-        bloom_mapping = {
-            'Remember': 1,
-            'Understand': 2,
-            'Apply': 3,
-            'Analyze': 4,
-            'Evaluate': 5,
-            'Create': 6
-        }
         if 'BloomLevel' in data.columns:
-            data['BloomLevel'] = data['BloomLevel'].map(bloom_mapping)
+            data['BloomLevel'] = data['BloomLevel'].map(BLOOM_MAPPING)
 
         # Drop non-feature columns
         drop_cols = ['StudentID', 'PreferredTool', 'LeastEffectiveTool']
@@ -68,75 +78,251 @@ class FARecommendationModel:
 
     def train_model(self, csv_file_path):
         """Train model using dataset"""
-        df = pd.read_csv(csv_file_path)
+        import pandas as pd
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score, classification_report
 
-        # Preprocess dataset
-        X = self.preprocess_data(df)
+        with metrics.stage('train_read'):
+            df = pd.read_csv(csv_file_path)
 
-        # Target labels
-        y = df['PreferredTool']
+        with metrics.stage('train_preprocess'):
+            # Preprocess dataset
+            X = self.preprocess_data(df)
 
-        # Handle NaN
-        X = X.fillna(0)
+            # Target labels
+            y = df['PreferredTool']
 
-        self.feature_names = list(X.columns)
+            # Handle NaN
+            X = X.fillna(0)
 
-        # Split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+            self.feature_names = list(X.columns)
+
+            # Split (plain arrays: column order is tracked by feature_names/encoder)
+            X_train, X_test, y_train, y_test = train_test_split(
+                X.to_numpy(dtype=np.float32), y, test_size=0.2, random_state=42
+            )
 
         # Train RF model
-        self.model.fit(X_train, y_train)
+        with metrics.stage('train_fit'):
+            self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+            self.model.fit(X_train, y_train)
 
         # Evaluate
-        y_pred = self.model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
+        with metrics.stage('train_evaluate'):
+            y_pred = self.model.predict(X_test)
+            accuracy = accuracy_score(y_test, y_pred)
         print(f"Model Accuracy: {accuracy:.2f}")
         print("\nClassification Report:\n", classification_report(y_test, y_pred))
 
+        self._build_encoder()
+
         # Save model
-        self.save_model()
+        with metrics.stage('train_save'):
+            self.save_model()
 
         return accuracy
 
-    def predict_fa_tool(self, student_data):
-        """Predict FA tool for a student"""
-        df = pd.DataFrame([student_data])
+    def _build_encoder(self):
+        """Compile the request encoder for the current feature_names"""
+        self.encoder = FeatureEncoder(self.feature_names)
+
+        # The encoder guarantees column order, so predictions take plain
+        # arrays; drop pandas column names a forest may have been fitted with
+        # so sklearn doesn't warn on every call.
+        if list(getattr(self.model, 'feature_names_in_', self.feature_names)) == self.feature_names:
+            self.model.__dict__.pop('feature_names_in_', None)
 
-        processed = self.preprocess_data(df)
+    def _get_encoder(self):
+        if self.encoder is None or self.encoder.feature_names != self.feature_names:
+            self._build_encoder()
+        return self.encoder
 
-        # Ensure features match training
-        for feature in self.feature_names:
-            if feature not in processed.columns:
-                processed[feature] = 0
-        processed = processed[self.feature_names].fillna(0)
+    def _get_table(self):
+        """Lookup table for the current model, rebuilt if feature_names changed"""
+        if not self.precomputed:
+            return None
+        if self.table is None or self.table.feature_names != self.feature_names:
+            self.table = PredictionTable.build(self.model, self.feature_names)
+        return self.table
 
-        prediction = self.model.predict(processed)[0]
-        prediction_proba = self.model.predict_proba(processed)[0]
+    def _refresh_table(self, filename):
+        """Load the table saved next to `filename`, rebuilding it if stale or missing"""
+        digest = file_digest(filename)
+        path = table_path(filename)
+        table = PredictionTable.load(path)
+        if table is None or not table.matches(self.feature_names, self.model.classes_, digest):
+            table = PredictionTable.build(self.model, self.feature_names, digest)
+            if table is not None:
+                table.save(path)
+                print(f"✅ Prediction table ({len(table)} inputs) saved to {path}")
+        self.table = table
 
+    def _format_prediction(self, classes, proba, idx):
         return {
-            'predicted_tool': prediction,
-            'confidence': float(max(prediction_proba)),
-            'all_probabilities': dict(zip(self.model.classes_, prediction_proba))
+            'predicted_tool': str(classes[idx]),
+            'confidence': float(proba[idx]),
+            'all_probabilities': dict(zip(classes.tolist(), proba.tolist()))
         }
 
+    def predict_fa_tool(self, student_data):
+        """Predict FA tool for a student"""
+        with metrics.stage('encode'):
+            row = self._get_encoder().encode(student_data)
+
+        with metrics.stage('predict'):
+            table = self._get_table()
+            prediction_proba = table.lookup(row[0]) if table is not None else None
+            if prediction_proba is None:
+                prediction_proba = self.model.predict_proba(row)[0]
+
+        return self._format_prediction(self.model.classes_, prediction_proba, prediction_proba.argmax())
+
+    def feature_key(self, student_data):
+        """Hashable key of a student's encoded feature row: inputs the model can't tell apart share it"""
+        return self._get_encoder().encode(student_data).tobytes()
+
+    def encode_batch(self, students):
+        """Encode a list of student dicts into one float array in feature_names order"""
+        return self._get_encoder().encode_many(students)
+
+    def predict_batch(self, students):
+        """Predict FA tools for many students with a single predict_proba call.
+
+        `students` is either a list of student dicts (same keys as
+        predict_fa_tool) or an already encoded 2-D array whose columns follow
+        self.feature_names.
+        """
+        if isinstance(students, np.ndarray):
+            X = np.asarray(students, dtype=np.float32)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+        else:
+            with metrics.stage('encode'):
+                X = self.encode_batch(students)
+
+        if len(X) == 0:
+            return []
+
+        with metrics.stage('predict'):
+            table = self._get_table()
+            if table is not None:
+                probas, hit = table.lookup_many(X)
+                if not hit.all():
+                    probas[~hit] = self._forest_for(int((~hit).sum())).predict_proba(X[~hit])
+            else:
+                probas = self._forest_for(len(X)).predict_proba(X)
+        best = probas.argmax(axis=1)
+        classes = self.model.classes_
+
+        return [self._format_prediction(classes, row, idx) for row, idx in zip(probas, best)]
+
+    def _forest_for(self, n_rows):
+        """The forest to score n_rows with: large batches skip the compiled one"""
+        if not isinstance(self.model, CompiledForest) or n_rows <= COMPILED_MAX_ROWS or self.filename is None:
+            return self.model
+        if self._sklearn_model is None:
+            import io
+            import hashlib
+            import joblib
+
+            # Read once and check the digest, in case the artifact was replaced since
+            with open(self.filename, 'rb') as f:
+                data = f.read()
+            if hashlib.sha1(data).hexdigest()[:12] != self.version:
+                return self.model
+            self._sklearn_model = joblib.load(io.BytesIO(data))['model']
+            self._sklearn_model.__dict__.pop('feature_names_in_', None)
+        return self._sklearn_model
+
     def save_model(self, filename='data/fa_model.pkl'):
+        import joblib
+
         os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Write beside the target and rename over it, so a process reloading
+        # the model never reads a half-written file
+        tmp_filename = f'{filename}.{os.getpid()}.tmp'
         joblib.dump({
             'model': self.model,
             'feature_names': self.feature_names,
             'fa_tools': self.fa_tools
-        }, filename)
+        }, tmp_filename)
+        digest = file_digest(tmp_filename)
+        # The compiled arrays are exported before the artifact is replaced, so
+        # a server that sees the new model finds them already there
+        path = self._export_compiled(filename, digest) if hasattr(self.model, 'estimators_') else None
+        os.replace(tmp_filename, filename)
+        self.version = digest[:12]
+        self.filename = filename
+        self._sklearn_model = None
         print(f"✅ Model saved to {filename}")
+        if self.compiled and path is not None:
+            self.model = CompiledForest.load(path)[0]
+        if self.precomputed:
+            self._refresh_table(filename)
+
+    def export_compiled(self):
+        """Export the compiled forest for the loaded artifact if it's missing; returns its directory"""
+        digest = file_digest(self.filename)
+        path = compiled_path(self.filename, digest[:12])
+        if CompiledForest.load(path)[0] is None:
+            self._export_compiled(self.filename, digest)
+        return path
+
+    def _export_compiled(self, filename, digest):
+        """Flatten the fitted forest for the artifact version `digest`; returns its directory.
+
+        Only writers (save_model, python -m models.compiled_forest) call
+        this: serving processes just map what is there.
+        """
+        path = compiled_path(filename, digest[:12])
+        os.makedirs(compiled_path(filename), exist_ok=True)
+        CompiledForest.from_sklearn(self.model).save(
+            path,
+            feature_names=self.feature_names,
+            fa_tools=self.fa_tools,
+            source_digest=digest
+        )
+        # Keep the version being replaced too: a server may still be loading it
+        current = file_digest(filename)[:12] if os.path.exists(filename) else None
+        prune(compiled_path(filename), keep={digest[:12], current})
+        print(f"✅ Compiled forest saved to {path}")
+        return path
+
+    def _load_compiled(self, filename):
+        """Map the compiled forest for `filename`, or serve the pickle if it wasn't exported"""
+        digest = file_digest(filename)
+        path = compiled_path(filename, digest[:12])
+        forest, meta = CompiledForest.load(path)
+        if forest is None or meta.get('source_digest') != digest:
+            print(f"⚠️ No compiled forest at {path}, serving the pickled model "
+                  f"(export it with python -m models.compiled_forest)")
+            self._load_pickle(filename)
+            return
+        self.feature_names = meta['feature_names']
+        self.fa_tools = meta['fa_tools']
+        self.model = forest
+
+    def _load_pickle(self, filename):
+        import joblib
+
+        data = joblib.load(filename)
+        self.model = data['model']
+        self.feature_names = data['feature_names']
+        self.fa_tools = data['fa_tools']
 
     def load_model(self, filename='data/fa_model.pkl'):
         if os.path.exists(filename):
-            data = joblib.load(filename)
-            self.model = data['model']
-            self.feature_names = data['feature_names']
-            self.fa_tools = data['fa_tools']
-            print(f"✅ Model loaded from {filename}")
+            if self.compiled:
+                self._load_compiled(filename)
+            else:
+                self._load_pickle(filename)
+            self._build_encoder()
+            self.version = model_version(filename)
+            self.filename = filename
+            print(f"✅ Model loaded from {filename} (version {self.version})")
+            if self.precomputed:
+                self._refresh_table(filename)
             return True
         return False
 
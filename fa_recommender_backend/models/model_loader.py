@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+import weakref
+
+# Nothing heavy at module level: models.ml_model (numpy, and sklearn/joblib
+# when unpickling) is only imported when the model is actually loaded.
+
+LOADING_MODES = ('eager', 'lazy', 'background')
+
+# A model loaded before os.fork() is inherited by the workers; only the
+# locks and threads (background load, file watcher) need redoing in the child
+_loaders = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for loader in list(_loaders):
+        loader._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _file_signature(path):
+    """(mtime, size) of a file, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class LazyModel:
+    """Owns the app's FARecommendationModel and decides when it gets loaded.
+
+    mode='eager' loads in the constructor (the old import-time behaviour),
+    'lazy' on the first get(), and 'background' in a daemon thread started
+    by the constructor so the server can bind its socket meanwhile; a get()
+    that arrives before the thread is done waits for it.
+
+    reload() loads model_file again in a background thread, checks the new
+    model and swaps it in with a single reference assignment. Callers that
+    already hold the old model from get() finish with it; everything after
+    the swap sees the new one. With watch_interval > 0 a watcher thread
+    polls the file and reloads when it has changed and stopped changing.
+    The model's version (a digest of the artifact) is model.version.
+    """
+
+    def __init__(self, mode='eager', model_file='data/fa_model.pkl',
+                 dataset_file='data/dataset.csv', watch_interval=0, **model_options):
+        if mode not in LOADING_MODES:
+            raise ValueError(f"Unknown model loading mode {mode!r}, expected one of {LOADING_MODES}")
+        self.mode = mode
+        self.model_file = model_file
+        self.dataset_file = dataset_file
+        self.model_options = model_options
+        self.watch_interval = watch_interval
+
+        self._model = None
+        self._lock = threading.Lock()
+        self._error = None
+        self._load_seconds = None
+
+        # Reload bookkeeping: signature of the file behind the current model,
+        # of the last file that failed validation, and the last reload outcome
+        self._reload_lock = threading.Lock()
+        self._reloader = None
+        self._signature = None
+        self._rejected = None
+        self._last_reload = None
+        _loaders.add(self)
+
+        if mode == 'eager':
+            self.get()
+        elif mode == 'background':
+            self._start_warmup()
+        self._start_watcher()
+
+    def _start_warmup(self):
+        threading.Thread(target=self._warm, name='model-warmup', daemon=True).start()
+
+    def _start_watcher(self):
+        if self.watch_interval > 0:
+            threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._reloader = None
+        if self._model is None and self.mode == 'background':
+            self._start_warmup()
+        self._start_watcher()
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(f"⚠️ Background model load failed: {e}")
+
+    def _load(self):
+        from models.ml_model import FARecommendationModel
+
+        model = FARecommendationModel(**self.model_options)
+        if not model.load_model(self.model_file):
+            if os.path.exists(self.dataset_file):
+                model.train_model(self.dataset_file)
+            else:
+                print("⚠️ No dataset found in data/ directory")
+        return model
+
+    def _validate(self, model, current):
+        """Raise ValueError if a freshly loaded model shouldn't replace `current`"""
+        if model.model is None:
+            raise ValueError("artifact has no fitted model")
+        if current is not None and current.model is not None \
+                and model.feature_names != current.feature_names:
+            raise ValueError(f"feature names changed from {current.feature_names} to {model.feature_names}")
+        probabilities = model.predict_fa_tool({})['all_probabilities']
+        if abs(sum(probabilities.values()) - 1.0) > 1e-6:
+            raise ValueError("probe prediction does not sum to 1")
+
+    def get(self):
+        """The loaded model, loading it first if needed"""
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                signature = _file_signature(self.model_file)
+                try:
+                    self._model = self._load()
+                    self._signature = signature or _file_signature(self.model_file)
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self._error = None
+                self._load_seconds = time.perf_counter() - start
+            return self._model
+
+    def reload(self, wait=False):
+        """Load model_file again in the background and swap it in if it's valid.
+
+        Returns False if a reload is already running. With wait=True blocks
+        until this reload is done.
+        """
+        with self._reload_lock:
+            if self._reloader is not None and self._reloader.is_alive():
+                return False
+            self._reloader = threading.Thread(target=self._reload, name='model-reload', daemon=True)
+            self._reloader.start()
+            reloader = self._reloader
+        if wait:
+            reloader.join()
+        return True
+
+    def _reload(self):
+        start = time.perf_counter()
+        signature = _file_signature(self.model_file)
+        current = self._model
+        previous_version = current.version if current is not None else None
+        try:
+            from models.ml_model import FARecommendationModel
+
+            model = FARecommendationModel(**self.model_options)
+            if not model.load_model(self.model_file):
+                raise FileNotFoundError(f"{self.model_file} not found")
+            self._validate(model, current)
+        except Exception as e:
+            self._rejected = signature
+            self._last_reload = {'ok': False, 'error': str(e), 'version': previous_version,
+                                 'seconds': time.perf_counter() - start}
+            print(f"⚠️ Model reload failed, keeping version {previous_version}: {e}")
+            return
+
+        # The swap: one reference assignment, atomic for concurrent readers
+        self._model = model
+        self._signature = signature
+        self._error = None
+        self._last_reload = {'ok': True, 'error': None, 'version': model.version,
+                             'previous_version': previous_version,
+                             'seconds': time.perf_counter() - start}
+        print(f"✅ Model reloaded: version {previous_version} -> {model.version}")
+
+    def _watch(self):
+        pending = None
+        while True:
+            time.sleep(self.watch_interval)
+            signature = _file_signature(self.model_file)
+            if signature is None or signature in (self._signature, self._rejected):
+                pending = None
+                continue
+            # Reload once the file has looked the same for a whole interval,
+            # so a copy that's still being written isn't picked up half-way
+            if signature != pending:
+                pending = signature
+                continue
+            pending = None
+            self.reload(wait=True)
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    @property
+    def version(self):
+        model = self._model
+        return model.version if model is not None else None
+
+    def status(self):
+        return {
+            'mode': self.mode,
+            'model_loaded': self.loaded,
+            'load_seconds': self._load_seconds,
+            'error': self._error,
+            'version': self.version,
+            'watch_interval': self.watch_interval,
+            'last_reload': self._last_reload
+        }
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+
+# Locks and SQLite connections must not be shared with a forked worker
+_caches = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for cache in list(_caches):
+        cache._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class SqliteCacheStore:
+    """Prediction store in a SQLite file, shared by every worker on the host.
+
+    Entries are keyed on (model version, encoded features); rows of other
+    versions are deleted when a worker first sees a new one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS predictions (
+                    version TEXT NOT NULL,
+                    features BLOB NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (version, features)
+                ) WITHOUT ROWID
+            ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def _reset(self):
+        # The parent's connections stay with the parent
+        self._local = threading.local()
+
+    def get(self, version, key):
+        row = self._connection().execute('SELECT result FROM predictions WHERE version = ? AND features = ?',
+                                         (version, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, version, key, result):
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO predictions (version, features, result) VALUES (?, ?, ?)',
+                         (version, key, json.dumps(result)))
+
+    def drop_other_versions(self, version):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM predictions WHERE version != ?', (version,))
+
+
+class PredictionCache:
+    """Bounded LRU of predictions keyed on the encoded feature vector.
+
+    Entries are tagged with the model version they came from: the first
+    lookup for a new version (after a retrain or reload) empties the
+    cache, so a stale prediction is never served. With a shared `store`
+    (SqliteCacheStore) local misses fall through to it before the model is
+    asked, and computed predictions are written to both.
+
+    Saved latency is estimated as hits x the average time of a miss.
+    """
+
+    def __init__(self, max_size=4096, store=None):
+        self.max_size = max_size
+        self.store = store
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+        _caches.add(self)
+
+    def _empty_stats(self):
+        return {
+            'hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'store_errors': 0,
+            'total_miss_ms': 0.0
+        }
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+        if self.store is not None:
+            self.store._reset()
+
+    def _check_version(self, version):
+        """Drop everything cached for another model version; call with the lock held"""
+        if version == self._version:
+            return False
+        if self._version is not None:
+            self._stats['invalidations'] += 1
+        self._entries.clear()
+        self._version = version
+        return True
+
+    def get(self, version, key):
+        with self._lock:
+            new_version = self._check_version(version)
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return result
+        if self.store is None:
+            return None
+
+        try:
+            if new_version:
+                self.store.drop_other_versions(version)
+            result = self.store.get(version, key)
+        except sqlite3.Error as e:
+            self._store_error(e)
+            return None
+        if result is not None:
+            self._insert(version, key, result)
+            with self._lock:
+                self._stats['shared_hits'] += 1
+        return result
+
+    def put(self, version, key, result, elapsed_ms):
+        """Cache a computed prediction; elapsed_ms is what computing it took"""
+        with self._lock:
+            self._stats['misses'] += 1
+            self._stats['total_miss_ms'] += elapsed_ms
+        self._insert(version, key, result)
+        if self.store is not None:
+            try:
+                self.store.put(version, key, result)
+            except sqlite3.Error as e:
+                self._store_error(e)
+
+    def _store_error(self, error):
+        # The shared store is only an optimisation: a failing one counts as a miss
+        with self._lock:
+            self._stats['store_errors'] += 1
+            first = self._stats['store_errors'] == 1
+        if first:
+            print(f"⚠️ Shared prediction cache unavailable: {error}")
+
+    def _insert(self, version, key, result):
+        with self._lock:
+            if self._version is None:
+                self._version = version
+            elif version != self._version:
+                # Computed by a model that has since been replaced
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['version'] = self._version
+        total_miss_ms = stats.pop('total_miss_ms')
+        hits = stats['hits'] + stats['shared_hits']
+        lookups = hits + stats['misses']
+        avg_miss_ms = total_miss_ms / stats['misses'] if stats['misses'] else 0.0
+        stats.update(
+            hit_ratio=hits / lookups if lookups else 0.0,
+            avg_miss_ms=avg_miss_ms,
+            saved_ms=hits * avg_miss_ms,
+            max_size=self.max_size,
+            shared_store=self.store.path if self.store is not None else None
+        )
+        return stats
@@ -0,0 +1,123 @@
+import hashlib
+import itertools
+import os
+
+import numpy as np
+
+from models.feature_encoder import feature_domain
+
+
+def table_path(model_filename):
+    """Where the lookup table for a model artifact lives (next to the .pkl)"""
+    return os.path.splitext(model_filename)[0] + '.table.npz'
+
+
+def file_digest(filename):
+    """SHA-1 of a model artifact, used to detect a stale table"""
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionTable:
+    """predict_proba for every reachable encoded input, indexed by a mixed-radix key.
+
+    Each feature has a small sorted domain of encoded values (see
+    feature_domain). A row's key is sum(position_i * stride_i), so a
+    prediction is one array index instead of a walk through the forest.
+    Rows with values outside the domains (e.g. ConfidenceLevel=2.5) miss and
+    the caller falls back to the model.
+    """
+
+    def __init__(self, feature_names, domains, classes, probabilities, source_digest=None):
+        self.feature_names = list(feature_names)
+        self.domains = [np.asarray(domain, dtype=np.float32) for domain in domains]
+        self.classes = np.asarray(classes)
+        self.probabilities = np.ascontiguousarray(probabilities, dtype=np.float64)
+        self.source_digest = source_digest
+
+        radices = [len(domain) for domain in self.domains]
+        self.strides = np.ones(len(radices), dtype=np.int64)
+        for i in range(len(radices) - 2, -1, -1):
+            self.strides[i] = self.strides[i + 1] * radices[i + 1]
+
+        # Scalar path: value → position dicts avoid numpy overhead per request
+        self._positions = [
+            {float(value): pos * int(stride) for pos, value in enumerate(domain)}
+            for domain, stride in zip(self.domains, self.strides)
+        ]
+
+    @classmethod
+    def build(cls, model, feature_names, source_digest=None):
+        """Enumerate the feature space and score it with the model, or None if unbounded"""
+        domains = [feature_domain(name) for name in feature_names]
+        if not feature_names or any(domain is None for domain in domains):
+            return None
+
+        # itertools.product is row-major, matching the strides above
+        grid = np.array(list(itertools.product(*domains)), dtype=np.float32)
+        probabilities = model.predict_proba(grid)
+        return cls(feature_names, domains, model.classes_, probabilities, source_digest)
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def matches(self, feature_names, classes, source_digest=None):
+        """True if this table was built for the given model"""
+        return (self.feature_names == list(feature_names)
+                and len(self.classes) == len(classes)
+                and bool(np.all(self.classes == np.asarray(classes)))
+                and (source_digest is None or self.source_digest == source_digest))
+
+    def lookup(self, row):
+        """Probabilities for one encoded row, or None if it's outside the table"""
+        key = 0
+        for positions, value in zip(self._positions, row):
+            offset = positions.get(float(value))
+            if offset is None:
+                return None
+            key += offset
+        return self.probabilities[key]
+
+    def lookup_many(self, X):
+        """Vectorised lookup: returns (probabilities, hit_mask); misses are zero rows"""
+        X = np.asarray(X, dtype=np.float32)
+        keys = np.zeros(len(X), dtype=np.int64)
+        hit = np.ones(len(X), dtype=bool)
+        for i, (domain, stride) in enumerate(zip(self.domains, self.strides)):
+            pos = np.searchsorted(domain, X[:, i])
+            pos = np.minimum(pos, len(domain) - 1)
+            hit &= domain[pos] == X[:, i]
+            keys += pos * stride
+
+        probabilities = np.zeros((len(X), len(self.classes)), dtype=np.float64)
+        probabilities[hit] = self.probabilities[keys[hit]]
+        return probabilities, hit
+
+    def save(self, filename):
+        np.savez(
+            filename,
+            feature_names=np.array(self.feature_names),
+            domain_sizes=np.array([len(domain) for domain in self.domains]),
+            domains=np.concatenate(self.domains),
+            classes=self.classes.astype(str),
+            probabilities=self.probabilities,
+            source_digest=np.array(self.source_digest or '')
+        )
+
+    @classmethod
+    def load(cls, filename):
+        if not os.path.exists(filename):
+            return None
+        with np.load(filename, allow_pickle=False) as data:
+            bounds = np.cumsum(data['domain_sizes'])[:-1]
+            domains = np.split(data['domains'], bounds)
+            return cls(
+                data['feature_names'].tolist(),
+                domains,
+                data['classes'],
+                data['probabilities'],
+                str(data['source_digest']) or None
+            )
@@ -0,0 +1,216 @@
+"""Retrain the model from stored student_responses, off the request path.
+
+Each run takes the responses added since the checkpoint watermark (see
+models.training), holds back every HOLDOUT_EVERY-th of them, and grows
+the saved forest with trees fitted on the rest (dropping the oldest
+trees past MAX_TREES, see models.training). The new model is
+published (saved over the artifact, which running servers hot-reload)
+only if its accuracy on the curated dataset.csv is no worse than the
+current model's. A rejected run leaves the watermark alone, so its rows
+are retried with the next batch.
+
+A stored response's label is its predicted_tool: the served model's own
+prediction, not an observed outcome. The current model agrees with those
+labels almost by construction, so they can't judge a candidate; only
+dataset.csv can. The held-back responses are scored separately and only
+reported, as how far the candidate departs from what was served.
+
+    python -m models.retrain --db fa_system.db
+
+RetrainScheduler runs the same command periodically in a child process,
+so the fit never competes with request handling for the GIL. A lock file
+next to the model keeps concurrent runs (e.g. one scheduler per worker)
+from overlapping.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+# app.py imports RetrainScheduler at startup, so numpy and the training
+# code are only imported by the retrain run itself.
+
+HOLDOUT_EVERY = 5
+# models.training.MAX_TREES, without importing numpy at app startup
+MAX_TREES = 200
+
+
+def lock_path(model_filename):
+    return os.path.splitext(model_filename)[0] + '.retrain.lock'
+
+
+def _accuracy(forest, X, y):
+    return float((forest.predict(X) == y).mean())
+
+
+def retrain_from_feedback(db_path, model_file='data/fa_model.pkl', holdout_csv='data/dataset.csv',
+                          new_trees=20, min_rows=50, holdout_every=HOLDOUT_EVERY, tolerance=0.0,
+                          n_jobs=-1, chunksize=100_000, max_trees=MAX_TREES):
+    """One retrain run; returns a report with the phase timings and the outcome"""
+    import fcntl
+    import numpy as np
+    from models.ml_model import FARecommendationModel
+    from models.training import (TrainingData, grow_forest, load_state, read_csv_chunks,
+                                 read_response_chunks, save_state)
+
+    report = {'published': False, 'rows': 0, 'extract_seconds': 0.0, 'fit_seconds': 0.0,
+              'eval_seconds': 0.0}
+
+    with open(lock_path(model_file), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            report['message'] = "Another retrain is running"
+            return report
+
+        model = FARecommendationModel()
+        if not model.load_model(model_file):
+            raise FileNotFoundError(f"{model_file} not found; train a model first")
+        if not holdout_csv or not os.path.exists(holdout_csv):
+            raise FileNotFoundError(f"{holdout_csv} not found; the publish gate needs labelled rows")
+        state = load_state(model_file)
+        report['previous_version'] = model.version
+
+        # Extract: new responses since the watermark, split into train/holdout by id
+        start = time.perf_counter()
+        train_data = TrainingData(len(model.feature_names), compact=True)
+        holdout_X, holdout_y = [], []
+        watermark = state['watermark']
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            for X, y, ids in read_response_chunks(conn, model.feature_names, watermark, chunksize):
+                held = ids % holdout_every == 0
+                train_data.add(X[~held], y[~held])
+                holdout_X.append(X[held])
+                holdout_y.append(y[held])
+                watermark = int(ids[-1])
+        finally:
+            conn.close()
+        report['extract_seconds'] = time.perf_counter() - start
+        held_rows = sum(len(y) for y in holdout_y)
+        report['rows'] = len(train_data) + held_rows
+
+        if report['rows'] < min_rows or not len(train_data):
+            report['message'] = f"{report['rows']} new rows, waiting for at least {min_rows}"
+            return report
+
+        # The gate scores dataset.csv only: response labels are self-predictions
+        csv_X, csv_y = [], []
+        for X, y in read_csv_chunks(holdout_csv, model.feature_names, chunksize):
+            csv_X.append(X)
+            csv_y.append(y)
+        X_holdout, y_holdout = np.concatenate(csv_X), np.concatenate(csv_y)
+        if held_rows:
+            X_responses, y_responses = np.concatenate(holdout_X), np.concatenate(holdout_y)
+        report.update(holdout_rows=len(y_holdout), response_holdout_rows=held_rows)
+
+        start = time.perf_counter()
+        current_accuracy = _accuracy(model.model, X_holdout, y_holdout)
+        if held_rows:
+            report['current_response_agreement'] = _accuracy(model.model, X_responses, y_responses)
+        report['eval_seconds'] = time.perf_counter() - start
+
+        # Fit: grow the loaded forest in place (the served copy is another process's)
+        start = time.perf_counter()
+        try:
+            forest = grow_forest(model.model, train_data, new_trees, n_jobs=n_jobs, max_trees=max_trees)
+        except ValueError as e:
+            report['message'] = str(e)
+            return report
+        report['fit_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidate_accuracy = _accuracy(forest, X_holdout, y_holdout)
+        if held_rows:
+            report['candidate_response_agreement'] = _accuracy(forest, X_responses, y_responses)
+        report['eval_seconds'] += time.perf_counter() - start
+        report.update(current_accuracy=current_accuracy, candidate_accuracy=candidate_accuracy)
+
+        if candidate_accuracy + tolerance < current_accuracy:
+            report['message'] = "Holdout accuracy regressed, model not published"
+        else:
+            model._build_encoder()
+            model.save_model(model_file)
+            state.update(watermark=watermark, rows=state['rows'] + report['rows'],
+                         n_estimators=len(forest.estimators_))
+            report.update(published=True, version=model.version, watermark=watermark)
+
+        state['last_run'] = dict(report, finished_at=time.time())
+        save_state(model_file, state)
+        return report
+
+
+class RetrainScheduler:
+    """Run `python -m models.retrain` every `interval` seconds in a child process.
+
+    The thread only waits on the child, so Flask workers keep serving
+    while the extract and fit run at a lower CPU priority elsewhere.
+    Threads don't survive os.fork(), so under a preloading pre-fork
+    server only the master schedules runs.
+    """
+
+    def __init__(self, interval, db_path, model_file='data/fa_model.pkl', nice=10):
+        self.interval = interval
+        self.db_path = db_path
+        self.model_file = model_file
+        self.nice = nice
+        self.runs = 0
+        self.last_report = None
+        self._thread = threading.Thread(target=self._loop, name='retrain-scheduler', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ Scheduled retrain failed: {e}")
+
+    def run_once(self):
+        result = subprocess.run(
+            [sys.executable, '-m', 'models.retrain', '--db', self.db_path,
+             '--model', self.model_file, '--nice', str(self.nice)],
+            capture_output=True, text=True
+        )
+        self.runs += 1
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                               else f"exit code {result.returncode}")
+        self.last_report = json.loads(result.stdout.strip().splitlines()[-1])
+        return self.last_report
+
+    def status(self):
+        return {'interval': self.interval, 'runs': self.runs, 'last_report': self.last_report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the FA model from stored student responses")
+    parser.add_argument('--db', default='fa_system.db')
+    parser.add_argument('--model', default='data/fa_model.pkl')
+    parser.add_argument('--holdout-csv', default='data/dataset.csv', help="labelled rows the publish gate scores")
+    parser.add_argument('--new-trees', type=int, default=20)
+    parser.add_argument('--min-rows', type=int, default=50)
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES, help="drop the oldest trees past this many")
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help="accuracy drop still accepted when publishing")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--nice', type=int, default=0, help="lower this process's CPU priority")
+    args = parser.parse_args()
+
+    if args.nice and hasattr(os, 'nice'):
+        os.nice(args.nice)
+
+    report = retrain_from_feedback(args.db, args.model, args.holdout_csv, args.new_trees,
+                                   args.min_rows, tolerance=args.tolerance, n_jobs=args.n_jobs,
+                                   max_trees=args.max_trees)
+    # Last line is the machine-readable report (RetrainScheduler parses it)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
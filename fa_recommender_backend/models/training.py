@@ -0,0 +1,332 @@
+"""Chunked, parallel and incremental training for the FA recommendation forest.
+
+Training data comes from a CSV in the data/dataset.csv layout, from the
+student_responses table, or both, read in fixed-size chunks and encoded
+straight into float32 arrays (no DataFrame-wide copies). The forest is
+fitted with n_jobs across cores and can later be grown with warm_start:
+new trees are fitted on the responses that arrived since the last
+checkpoint and added to the existing ones. A grown forest is capped at
+MAX_TREES; past that the oldest trees are dropped to make room, so
+prediction cost and artifact size stay bounded.
+
+    python -m models.training --csv data/dataset.csv --db fa_system.db
+    python -m models.training --db fa_system.db --incremental
+
+The checkpoint (response-id watermark, row counts) is kept in a JSON file
+next to the model artifact.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from models.feature_encoder import CATEGORICAL_MAPPINGS
+from utils.metrics import registry as metrics
+
+LABEL = 'PreferredTool'
+# Same columns preprocess_data drops from the CSV
+NON_FEATURE_COLUMNS = ('StudentID', 'PreferredTool', 'LeastEffectiveTool')
+
+# student_responses columns that map onto the training features. The
+# submission's bloom_level isn't stored, so the assessment's target level
+# is used, falling back to the first bloom_focus entry. The label is the
+# recommended tool that was served.
+RESPONSE_COLUMNS = {
+    'Year': 'r.year_of_study',
+    'LearningStyle': 'r.learning_mode',
+    'ConfidenceLevel': 'r.confidence_level',
+    'BloomLevel': "COALESCE(NULLIF(a.bloom_level, ''), r.bloom_focus)"
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+MAX_TREES = 200
+
+
+def state_path(model_filename):
+    """Where the training checkpoint for a model artifact lives (next to the .pkl)"""
+    return os.path.splitext(model_filename)[0] + '.train.json'
+
+
+def load_state(model_filename):
+    path = state_path(model_filename)
+    if not os.path.exists(path):
+        return {'watermark': 0, 'rows': 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(model_filename, state):
+    path = state_path(model_filename)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def encode_frame(df, feature_names):
+    """Encode a DataFrame chunk into a float32 array, as preprocess_data + fillna(0) would"""
+    import pandas as pd
+
+    X = np.zeros((len(df), len(feature_names)), dtype=np.float32)
+    for j, name in enumerate(feature_names):
+        if name not in df.columns:
+            continue
+        mapping = CATEGORICAL_MAPPINGS.get(name)
+        if mapping is not None:
+            column = df[name].map(mapping)
+        else:
+            column = pd.to_numeric(df[name], errors='coerce')
+        X[:, j] = column.fillna(0).to_numpy(dtype=np.float32)
+    return X
+
+
+def csv_feature_names(path):
+    import pandas as pd
+
+    columns = pd.read_csv(path, nrows=0).columns
+    return [c for c in columns if c not in NON_FEATURE_COLUMNS]
+
+
+def read_csv_chunks(path, feature_names, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (X, y) chunks of a training CSV"""
+    import pandas as pd
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield encode_frame(chunk, feature_names), chunk[LABEL].to_numpy(dtype=str)
+
+
+def read_response_chunks(conn, feature_names, after_id=0, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (X, y, ids) chunks of student_responses rows with id > after_id.
+
+    Pages by id (keyset), so no read transaction stays open between
+    chunks and rows committed meanwhile are picked up by the next page.
+    """
+    import pandas as pd
+
+    unknown = [name for name in feature_names if name not in RESPONSE_COLUMNS]
+    if unknown:
+        raise ValueError(f"student_responses has no column for features {unknown}")
+
+    sql = f'''
+        SELECT r.id, {', '.join(RESPONSE_COLUMNS[name] for name in feature_names)}, r.predicted_tool
+        FROM student_responses r
+        LEFT JOIN assessments a ON a.id = r.assessment_id
+        WHERE r.id > ? AND r.predicted_tool IS NOT NULL
+        ORDER BY r.id
+        LIMIT ?
+    '''
+    while True:
+        rows = conn.execute(sql, (after_id, chunksize)).fetchall()
+        if not rows:
+            return
+        df = pd.DataFrame(rows, columns=['id', *feature_names, LABEL])
+        if 'BloomLevel' in df.columns:
+            df['BloomLevel'] = df['BloomLevel'].str.split(',').str[0]
+        ids = df['id'].to_numpy()
+        after_id = int(ids[-1])
+        yield encode_frame(df, feature_names), df[LABEL].to_numpy(dtype=str), ids
+
+
+class TrainingData:
+    """Rows collected chunk by chunk for one fit.
+
+    Labels are stored as small integer codes into `labels`. With
+    compact=True only the distinct (feature row, label) pairs are kept,
+    with their counts used as sample weights. The features take a few
+    hundred distinct values, so memory stays flat however many rows are
+    read; the trade-off is that each tree's bootstrap resamples distinct
+    rows (weighted by count) rather than individual rows.
+    """
+
+    def __init__(self, n_features, compact=False):
+        self.n_features = n_features
+        self.compact = compact
+        self.rows = 0
+        self.labels = []
+        self._label_codes = {}
+        self._chunks = []
+        self._counts = {}
+
+    def _encode_labels(self, y):
+        values, codes = np.unique(y, return_inverse=True)
+        remap = np.array([self._label_codes.setdefault(str(value), len(self._label_codes)) for value in values],
+                         dtype=np.int32)
+        self.labels = list(self._label_codes)
+        return remap[codes.ravel()]
+
+    def add(self, X, y):
+        self.rows += len(X)
+        codes = self._encode_labels(y)
+        if not self.compact:
+            self._chunks.append((X, codes))
+            return
+        keyed = np.ascontiguousarray(np.column_stack([X, codes.astype(np.float32)]), dtype=np.float32)
+        # One opaque bytes value per row: far cheaper to unique than axis=0
+        packed = keyed.view(np.dtype((np.void, keyed.shape[1] * keyed.itemsize))).ravel()
+        distinct, counts = np.unique(packed, return_counts=True)
+        for row, count in zip(distinct, counts):
+            key = row.tobytes()
+            self._counts[key] = self._counts.get(key, 0) + int(count)
+
+    def __len__(self):
+        return self.rows
+
+    def arrays(self):
+        """(X, y, sample_weight); sample_weight is None unless compact"""
+        # An object array of shared label strings: 8 bytes a row
+        labels = np.array(self.labels, dtype=object)
+        if not self.compact:
+            if not self._chunks:
+                return np.empty((0, self.n_features), dtype=np.float32), labels[:0], None
+            X = np.concatenate([X for X, _ in self._chunks])
+            y = labels[np.concatenate([codes for _, codes in self._chunks])]
+            return X, y, None
+        keyed = np.frombuffer(b''.join(self._counts), dtype=np.float32).reshape(-1, self.n_features + 1)
+        weight = np.fromiter(self._counts.values(), dtype=np.float64, count=len(self._counts))
+        return keyed[:, :-1].copy(), labels[keyed[:, -1].astype(np.intp)], weight
+
+
+def fit_forest(data, n_estimators=100, n_jobs=-1, random_state=42):
+    """Fit a new RandomForestClassifier on a TrainingData"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y, weight = data.arrays()
+    forest = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs)
+    forest.fit(X, y, sample_weight=weight)
+    # n_jobs only helps fitting; a pickled n_jobs=-1 would make every
+    # single-row predict_proba dispatch to a thread pool
+    forest.n_jobs = None
+    return forest
+
+
+def grow_forest(forest, data, n_new_trees, n_jobs=-1, max_trees=MAX_TREES):
+    """Add n_new_trees trees fitted on `data` to an existing forest (warm_start).
+
+    Old trees are kept as they are, except that the oldest are dropped
+    when the forest would grow past max_trees (None = no cap). The new
+    rows must not introduce labels the forest has never seen; that needs
+    a full retrain.
+    """
+    X, y, weight = data.arrays()
+    unseen = set(data.labels) - set(forest.classes_)
+    if unseen:
+        raise ValueError(f"New labels {sorted(unseen)} need a full retrain")
+
+    # warm_start recomputes classes_ from y, so every known label has to be
+    # present: add one zero-weight row for each label the new rows lack
+    missing = [c for c in forest.classes_ if c not in set(data.labels)]
+    if weight is None:
+        weight = np.ones(len(y), dtype=np.float64)
+    if missing:
+        X = np.vstack([X, np.zeros((len(missing), X.shape[1]), dtype=np.float32)])
+        y = np.concatenate([y, np.array(missing, dtype=object)])
+        weight = np.concatenate([weight, np.zeros(len(missing))])
+
+    n_trees = len(forest.estimators_) + n_new_trees
+    if max_trees is not None and n_trees > max_trees:
+        # estimators_ is in fitting order: evict from the front
+        n_new_trees = min(n_new_trees, max_trees)
+        forest.estimators_ = forest.estimators_[len(forest.estimators_) + n_new_trees - max_trees:]
+        n_trees = max_trees
+    forest.set_params(warm_start=True, n_estimators=n_trees, n_jobs=n_jobs)
+    forest.fit(X, y, sample_weight=weight)
+    forest.set_params(warm_start=False, n_jobs=None)
+    return forest
+
+
+def train(csv_file=None, db_path=None, model_file='data/fa_model.pkl', incremental=False,
+          n_estimators=100, new_trees=20, n_jobs=-1, chunksize=DEFAULT_CHUNKSIZE, compact=False,
+          max_trees=MAX_TREES):
+    """Train (or grow) the model and save it; returns a report with timings.
+
+    A full run fits a new forest on the CSV plus every stored response.
+    An incremental run loads model_file and grows it with `new_trees`
+    trees fitted on the responses added since the checkpoint watermark,
+    dropping the oldest past max_trees.
+    """
+    from models.ml_model import FARecommendationModel
+
+    report = {'incremental': incremental, 'rows': 0, 'read_seconds': 0.0, 'fit_seconds': 0.0}
+    state = load_state(model_file) if incremental else {'watermark': 0, 'rows': 0}
+
+    model = FARecommendationModel()
+    if incremental:
+        if not model.load_model(model_file):
+            raise FileNotFoundError(f"{model_file} not found; run a full training first")
+        feature_names = model.feature_names
+    elif csv_file:
+        feature_names = csv_feature_names(csv_file)
+    else:
+        feature_names = list(RESPONSE_COLUMNS)
+
+    start = time.perf_counter()
+    data = TrainingData(len(feature_names), compact=compact)
+    watermark = state['watermark']
+    with metrics.stage('train_read'):
+        if csv_file and not incremental:
+            for X, y in read_csv_chunks(csv_file, feature_names, chunksize):
+                data.add(X, y)
+        if db_path:
+            conn = sqlite3.connect(db_path)
+            try:
+                for X, y, ids in read_response_chunks(conn, feature_names, watermark, chunksize):
+                    data.add(X, y)
+                    watermark = int(ids[-1])
+            finally:
+                conn.close()
+    report['read_seconds'] = time.perf_counter() - start
+    report['rows'] = len(data)
+
+    if not len(data):
+        report['message'] = "No new rows to train on"
+        return report
+
+    start = time.perf_counter()
+    with metrics.stage('train_fit'):
+        if incremental:
+            forest = grow_forest(model.model, data, new_trees, n_jobs=n_jobs, max_trees=max_trees)
+        else:
+            forest = fit_forest(data, n_estimators=n_estimators, n_jobs=n_jobs)
+    report['fit_seconds'] = time.perf_counter() - start
+
+    model.model = forest
+    model.feature_names = feature_names
+    model._build_encoder()
+    with metrics.stage('train_save'):
+        model.save_model(model_file)
+
+    save_state(model_file, {'watermark': watermark, 'rows': state['rows'] + len(data),
+                            'n_estimators': len(forest.estimators_)})
+    report.update(watermark=watermark, n_estimators=len(forest.estimators_), version=model.version)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the FA recommendation forest")
+    parser.add_argument('--csv', help="training CSV in the data/dataset.csv layout")
+    parser.add_argument('--db', help="SQLite database whose student_responses to train on")
+    parser.add_argument('--model', default='data/fa_model.pkl')
+    parser.add_argument('--incremental', action='store_true',
+                        help="grow the saved forest with responses since the last checkpoint")
+    parser.add_argument('--trees', type=int, default=100, help="trees in a full fit")
+    parser.add_argument('--new-trees', type=int, default=20, help="trees added per incremental run")
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES,
+                        help="incremental runs drop the oldest trees past this many")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--compact', action='store_true', help="train on distinct rows weighted by count")
+    args = parser.parse_args()
+
+    if not args.csv and not args.db:
+        parser.error("give --csv and/or --db")
+
+    report = train(args.csv, args.db, args.model, args.incremental, args.trees, args.new_trees,
+                   args.n_jobs, args.chunksize, args.compact, args.max_trees)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
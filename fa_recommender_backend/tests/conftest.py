@@ -0,0 +1,35 @@
+"""Shared fixtures. Run from fa_recommender_backend/: python -m pytest tests"""
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.feature_encoder import feature_domain  # noqa: E402
+
+FEATURE_NAMES = ['Year', 'LearningStyle', 'ConfidenceLevel', 'BloomLevel']
+TOOLS = np.array(['Quiz', 'Project', 'Lab Work', 'Case Study'], dtype=object)
+
+
+def feature_grid(feature_names=FEATURE_NAMES):
+    """Every on-grid encoded input, in PredictionTable key order"""
+    return np.array(list(itertools.product(*(feature_domain(name) for name in feature_names))),
+                    dtype=np.float32)
+
+
+def fit_forest(feature_names=FEATURE_NAMES, seed=0, n_estimators=10):
+    """A small forest fitted on random labels over the feature grid"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    X = np.repeat(feature_grid(feature_names), 3, axis=0)
+    y = TOOLS[rng.integers(0, len(TOOLS), len(X))]
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+
+
+@pytest.fixture(scope='session')
+def forest():
+    return fit_forest()
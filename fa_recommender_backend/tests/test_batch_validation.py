@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+BATCH_PATH = '/student/submit_assessments/batch'
+STUDENT = {'year': '2nd Year', 'learning_style': 'Visual', 'confidence': 4, 'bloom_level': 'Apply'}
+
+
+@pytest.fixture(scope='module')
+def servers(tmp_path_factory, monkeypatch_module):
+    """(flask test client, asgi app, session cookie) bound to a throwaway database"""
+    monkeypatch_module.setenv('FA_DB_PATH', str(tmp_path_factory.mktemp('db') / 'test.db'))
+    monkeypatch_module.setenv('FA_MODEL_LOADING', 'lazy')
+    monkeypatch_module.setenv('FA_MODEL_WATCH_INTERVAL', '0')
+    import app
+    import asgi
+
+    client = app.app.test_client()
+    assert client.post('/login', json={'username': 'student1', 'password': 'student123'}).status_code == 200
+    return client, asgi.app, client.get_cookie(app.app.config['SESSION_COOKIE_NAME']).value
+
+
+@pytest.fixture(scope='module')
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as mp:
+        yield mp
+
+
+def post_flask(servers, body):
+    client, _, _ = servers
+    response = client.post(BATCH_PATH, json=body)
+    return response.status_code, response.json
+
+
+def post_asgi(servers, body):
+    _, asgi_app, cookie = servers
+    scope = {'type': 'http', 'method': 'POST', 'path': BATCH_PATH, 'query_string': b'',
+             'headers': [(b'content-type', b'application/json'), (b'cookie', f'session={cookie}'.encode())]}
+    messages = iter([{'type': 'http.request', 'body': json.dumps(body).encode()}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    return sent[0]['status'], json.loads(b''.join(message.get('body', b'') for message in sent[1:]))
+
+
+@pytest.mark.parametrize('post', [post_flask, post_asgi], ids=['flask', 'asgi'])
+@pytest.mark.parametrize('body, status, index', [
+    ([STUDENT], 400, None),
+    ({'responses': []}, 400, None),
+    ({'responses': [STUDENT, 1]}, 400, 1),
+    ({'responses': [dict(STUDENT, resources='Slides')]}, 400, 0),
+    ({'responses': [STUDENT] * 501}, 413, None),
+])
+def test_invalid_batches_are_rejected_alike(servers, post, body, status, index):
+    got_status, payload = post(servers, body)
+    assert got_status == status
+    assert isinstance(payload['error'], str)
+    assert payload.get('index') == index
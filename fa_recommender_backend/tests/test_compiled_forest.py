@@ -0,0 +1,160 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FEATURE_NAMES, feature_grid, fit_forest
+from models.compiled_forest import CHUNK_ROWS, CompiledForest
+
+
+@pytest.fixture(scope='module')
+def deep_forest():
+    """Unbounded depth on continuous features, so trees are deep and uneven"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(2000, 6)).astype(np.float32)
+    y = np.where(X[:, 0] + X[:, 1] ** 2 > 0.5, 'a', np.where(X[:, 2] > 0, 'b', 'c'))
+    return RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+
+
+def inputs(n_features, seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(scale=3, size=(3 * CHUNK_ROWS + 7, n_features))
+    big = 1e30
+    edges = np.array([[0.0] * n_features, [-big] * n_features, [big] * n_features,
+                      [-0.0] * n_features, [1e-30] * n_features])
+    return np.vstack([noise, edges]).astype(np.float32)
+
+
+def assert_matches(forest, compiled, X):
+    assert np.array_equal(compiled.apply(X) - compiled.roots, forest.apply(X))
+    # Leaf values are renormalised in float64, so equal to within an ulp or so
+    np.testing.assert_allclose(compiled.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+    assert (compiled.predict(X) == forest.predict(X)).all()
+
+
+def test_matches_sklearn_on_the_feature_grid(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    grid = feature_grid()
+    assert_matches(forest, compiled, grid)
+    assert_matches(forest, compiled, inputs(len(FEATURE_NAMES)))
+
+
+def test_matches_sklearn_on_deep_trees(deep_forest):
+    compiled = CompiledForest.from_sklearn(deep_forest)
+    assert compiled.max_depth > 10
+    assert_matches(deep_forest, compiled, inputs(6, seed=1))
+
+
+def test_split_thresholds_are_compared_like_sklearn(deep_forest):
+    compiled = CompiledForest.from_sklearn(deep_forest)
+    # Values on and either side of every threshold (as float32, like sklearn sees them)
+    internal = compiled.children[0::2] != np.arange(len(compiled.feature))
+    rows = []
+    for feature, threshold in zip(compiled.feature[internal], compiled.threshold[internal]):
+        for value in np.nextafter(np.float32(threshold), [-np.inf, 0, np.inf], dtype=np.float32):
+            row = np.zeros(6, dtype=np.float32)
+            row[feature] = value
+            rows.append(row)
+    assert_matches(deep_forest, compiled, np.array(rows))
+
+
+def test_single_row_and_empty_batches(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    row = feature_grid()[:1]
+    assert_matches(forest, compiled, row)
+    assert compiled.apply(np.empty((0, len(FEATURE_NAMES)))).shape == (0, compiled.n_estimators)
+    assert compiled.predict_proba(np.empty((0, len(FEATURE_NAMES)))).shape == (0, len(forest.classes_))
+
+
+@pytest.mark.parametrize('shape', [(3, 3), (3, 5), (4,), (2, 2, 4)])
+def test_wrong_input_shape_is_rejected(forest, shape):
+    compiled = CompiledForest.from_sklearn(forest)
+    with pytest.raises(ValueError):
+        compiled.predict_proba(np.zeros(shape, dtype=np.float32))
+
+
+def test_saved_arrays_are_memory_mapped(forest, tmp_path):
+    path = str(tmp_path / 'fa_model.forest')
+    CompiledForest.from_sklearn(forest).save(path, source_digest='abc')
+    loaded, meta = CompiledForest.load(path)
+
+    assert meta == {'source_digest': 'abc'}
+    assert isinstance(loaded.children, np.memmap)
+    assert os.path.exists(os.path.join(path, 'children.npy'))
+    assert_matches(forest, loaded, feature_grid())
+
+
+def test_older_layout_counts_as_missing(forest, tmp_path):
+    path = str(tmp_path / 'fa_model.forest')
+    CompiledForest.from_sklearn(forest).save(path)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    del meta['n_features_in']
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    assert CompiledForest.load(path) == (None, None)
+
+
+def test_large_batches_use_sklearn_in_compiled_mode(forest, tmp_path, monkeypatch):
+    from models import ml_model
+    from models.ml_model import FARecommendationModel
+
+    filename = str(tmp_path / 'fa_model.pkl')
+    model = FARecommendationModel(compiled=True)
+    model.model, model.feature_names = fit_forest(), list(FEATURE_NAMES)
+    model._build_encoder()
+    model.save_model(filename)
+    assert isinstance(model.model, CompiledForest)
+
+    monkeypatch.setattr(ml_model, 'COMPILED_MAX_ROWS', 10)
+    X = feature_grid()[:50]
+    expected = [p['confidence'] for p in model.predict_batch(X[:5])]
+    assert model._sklearn_model is None
+    predictions = model.predict_batch(X)
+    assert model._sklearn_model is not None
+    assert [p['confidence'] for p in predictions[:5]] == expected
+
+
+def saved_model(tmp_path, seed=0):
+    from models.ml_model import FARecommendationModel
+
+    filename = str(tmp_path / 'fa_model.pkl')
+    model = FARecommendationModel()
+    model.model, model.feature_names = fit_forest(seed=seed), list(FEATURE_NAMES)
+    model._build_encoder()
+    model.save_model(filename)
+    return model, filename
+
+
+def test_save_model_exports_each_version(tmp_path):
+    from models.compiled_forest import compiled_path
+
+    first, filename = saved_model(tmp_path)
+    assert os.listdir(compiled_path(filename)) == [first.version]
+    second, _ = saved_model(tmp_path, seed=1)
+    third, _ = saved_model(tmp_path, seed=2)
+    # The version being replaced is kept for servers still loading it; older ones go
+    assert sorted(os.listdir(compiled_path(filename))) == sorted([second.version, third.version])
+
+
+def test_serving_never_writes_the_export(tmp_path):
+    import shutil
+
+    from models.compiled_forest import compiled_path
+    from models.ml_model import FARecommendationModel
+
+    saved, filename = saved_model(tmp_path)
+    served = FARecommendationModel(compiled=True)
+    served.load_model(filename)
+    assert isinstance(served.model, CompiledForest)
+
+    # No export for this version: serve the pickle, and leave the directory alone
+    shutil.rmtree(compiled_path(filename))
+    served = FARecommendationModel(compiled=True)
+    served.load_model(filename)
+    assert not isinstance(served.model, CompiledForest)
+    assert not os.path.exists(compiled_path(filename))
+    assert served.predict_batch(feature_grid()[:3]) == saved.predict_batch(feature_grid()[:3])
@@ -0,0 +1,108 @@
+import numpy as np
+
+from conftest import FEATURE_NAMES, feature_grid, fit_forest
+from models.ml_model import FARecommendationModel
+from models.prediction_table import PredictionTable, file_digest, table_path
+
+
+def make_model(forest, feature_names=FEATURE_NAMES):
+    model = FARecommendationModel(precomputed=True)
+    model.model = forest
+    model.feature_names = list(feature_names)
+    model._build_encoder()
+    return model
+
+
+def test_every_on_grid_input_matches_the_forest(forest):
+    table = PredictionTable.build(forest, FEATURE_NAMES)
+    grid = feature_grid()
+    expected = forest.predict_proba(grid)
+
+    assert len(table) == len(grid)
+    for row, proba in zip(grid, expected):
+        assert np.array_equal(table.lookup(row), proba)
+
+    looked_up, hit = table.lookup_many(grid)
+    assert hit.all()
+    assert np.array_equal(looked_up, expected)
+
+
+def test_off_grid_values_miss(forest):
+    table = PredictionTable.build(forest, FEATURE_NAMES)
+    off_grid = np.array([[2, 1, 2.5, 3], [2, 1, 7, 3], [9, 1, 2, 3], [2, 1, 2, -1]], dtype=np.float32)
+
+    for row in off_grid:
+        assert table.lookup(row) is None
+    probabilities, hit = table.lookup_many(off_grid)
+    assert not hit.any()
+    assert not probabilities.any()
+
+
+def test_off_grid_predictions_fall_back_to_the_forest(forest):
+    model = make_model(forest)
+    students = [{'Year': '2nd Year', 'LearningStyle': 'Visual', 'ConfidenceLevel': 2.5, 'BloomLevel': 'Apply'},
+                {'Year': '2nd Year', 'LearningStyle': 'Visual', 'ConfidenceLevel': 3, 'BloomLevel': 'Apply'}]
+    X = model.encode_batch(students)
+    expected = forest.predict_proba(X)
+
+    for student, proba in zip(students, expected):
+        assert model.predict_fa_tool(student)['all_probabilities'] == dict(zip(forest.classes_, proba))
+    for prediction, proba in zip(model.predict_batch(X), expected):
+        assert prediction['confidence'] == proba.max()
+
+
+def test_unbounded_feature_has_no_table(forest):
+    assert PredictionTable.build(forest, FEATURE_NAMES[:3] + ['StudyHours']) is None
+
+
+def test_save_and_load_round_trip(forest, tmp_path):
+    table = PredictionTable.build(forest, FEATURE_NAMES, source_digest='abc')
+    table.save(tmp_path / 'model.table.npz')
+    loaded = PredictionTable.load(tmp_path / 'model.table.npz')
+
+    assert loaded.feature_names == FEATURE_NAMES
+    assert loaded.source_digest == 'abc'
+    assert loaded.matches(FEATURE_NAMES, forest.classes_, 'abc')
+    assert np.array_equal(loaded.lookup_many(feature_grid())[0], table.probabilities)
+
+
+def test_table_is_rebuilt_when_the_model_file_changes(forest, tmp_path):
+    filename = str(tmp_path / 'fa_model.pkl')
+    make_model(forest).save_model(filename)
+    first = PredictionTable.load(table_path(filename))
+    assert first.source_digest == file_digest(filename)
+
+    # A retrained model saved over the artifact has another digest
+    retrained = fit_forest(seed=1)
+    make_model(retrained).save_model(filename)
+    table = PredictionTable.load(table_path(filename))
+    assert table.source_digest == file_digest(filename) != first.source_digest
+    assert np.array_equal(table.lookup_many(feature_grid())[0], retrained.predict_proba(feature_grid()))
+
+    # A server loading the artifact while a stale table is on disk rebuilds it
+    first.save(table_path(filename))
+    model = FARecommendationModel(precomputed=True)
+    model.load_model(filename)
+    assert model.table.source_digest == file_digest(filename)
+    assert np.array_equal(model.table.probabilities, table.probabilities)
+
+
+def test_table_is_rebuilt_when_feature_names_change(forest, tmp_path):
+    filename = str(tmp_path / 'fa_model.pkl')
+    make_model(forest).save_model(filename)
+
+    # A table on disk with the right digest but another column order
+    reordered = FEATURE_NAMES[::-1]
+    PredictionTable.build(fit_forest(reordered), reordered, file_digest(filename)).save(table_path(filename))
+    model = FARecommendationModel(precomputed=True)
+    model.load_model(filename)
+    assert model.table.feature_names == FEATURE_NAMES
+    assert np.array_equal(model.table.probabilities, forest.predict_proba(feature_grid()))
+
+    # feature_names changed in memory: the next prediction builds a new table
+    model.model = fit_forest(reordered)
+    model.feature_names = reordered
+    student = {'Year': '1st Year', 'LearningStyle': 'Auditory', 'ConfidenceLevel': 4, 'BloomLevel': 'Create'}
+    prediction = model.predict_fa_tool(student)
+    assert model.table.feature_names == reordered
+    assert prediction['confidence'] == model.model.predict_proba(model.encode_batch([student]))[0].max()
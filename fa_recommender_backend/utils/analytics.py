@@ -0,0 +1,52 @@
+"""Per-assessment class summaries: predicted tool distribution and breakdowns.
+
+The counts come from assessment_summary (schema migration 3), which the
+student_responses triggers keep current, so reading a summary costs a
+primary-key range scan of a few dozen rows. live=True computes the same
+rows with GROUP BY over student_responses instead, for checking the
+stored table or databases that haven't been migrated.
+"""
+from utils.schema import SUMMARY_DIMENSIONS, summary_select
+
+
+def _summary_rows(conn, assessment_id, live):
+    if live:
+        cursor = conn.execute(summary_select('assessment_id = ?'), (assessment_id,) * (len(SUMMARY_DIMENSIONS) + 1))
+        return [row[1:] for row in cursor]
+    return conn.execute('''
+        SELECT dimension, value, responses, confidence_sum, confidence_count
+        FROM assessment_summary WHERE assessment_id = ?
+    ''', (assessment_id,)).fetchall()
+
+
+def _mean(total, count):
+    return round(total / count, 4) if count else None
+
+
+def assessment_summary(conn, assessment_id, live=False):
+    """Response count, mean confidence_score and a breakdown per summary dimension.
+
+    Each breakdown lists its values by descending response count, with
+    the share of the assessment's responses and their mean confidence;
+    missing values are reported as "unknown".
+    """
+    summary = {"assessment_id": assessment_id, "responses": 0, "mean_confidence": None}
+    breakdowns = {dimension: [] for dimension in SUMMARY_DIMENSIONS}
+    for dimension, value, responses, confidence_sum, confidence_count in _summary_rows(conn, assessment_id, live):
+        if dimension == 'all':
+            summary.update(responses=responses, mean_confidence=_mean(confidence_sum, confidence_count))
+        else:
+            breakdowns[dimension].append({
+                "value": value if value != '' else "unknown",
+                "responses": responses,
+                "mean_confidence": _mean(confidence_sum, confidence_count)
+            })
+
+    total = summary["responses"]
+    for dimension, entries in breakdowns.items():
+        entries.sort(key=lambda entry: (-entry["responses"], entry["value"]))
+        for entry in entries:
+            entry["share"] = round(entry["responses"] / total, 4) if total else 0.0
+        summary[dimension] = entries
+    summary["source"] = "live" if live else "summary"
+    return summary
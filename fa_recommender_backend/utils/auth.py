@@ -0,0 +1,233 @@
+"""Password hashing and the login fast path.
+
+Passwords are stored as scrypt hashes, "scrypt$n$r$p$salt$key" (salt and
+key base64). The work factor n comes from FA_PASSWORD_HASH_N (default
+2**14, about 16 MB and tens of ms per hash); hashes made with other
+parameters still verify, and needs_rehash() tells login to upgrade them.
+
+scrypt releases the GIL, so PasswordHasher runs hashes on a small thread
+pool: max_workers caps how many cores a login storm can take from the
+prediction endpoints, and max_pending how many logins may wait for a
+worker before the rest are turned away. Bulk imports use a separate
+pool, so a cohort being hashed doesn't queue in front of logins.
+UserCache keeps recent username lookups (id, role, hash) for a few
+seconds so repeated logins skip the database.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent import futures
+
+SCHEME = 'scrypt'
+DEFAULT_N = int(os.environ.get('FA_PASSWORD_HASH_N', 2 ** 14))
+DEFAULT_R = 8
+DEFAULT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Pools and locks don't survive os.fork(): each forked worker starts its own
+_instances = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for instance in list(_instances):
+        instance._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _derive(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=2 * 128 * n * r * p, dklen=KEY_BYTES)
+
+
+def hash_password(password, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P):
+    salt = os.urandom(SALT_BYTES)
+    return f'{SCHEME}${n}${r}${p}${_b64(salt)}${_b64(_derive(password, salt, n, r, p))}'
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(SCHEME + '$')
+
+
+def verify_password(password, stored):
+    """True if password matches the stored hash; plaintext or malformed values never match"""
+    if not isinstance(password, str) or not is_hashed(stored):
+        return False
+    try:
+        _, n, r, p, salt, key = stored.split('$')
+        derived = _derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(derived, base64.b64decode(key))
+
+
+def needs_rehash(stored, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P):
+    return not stored.startswith(f'{SCHEME}${n}${r}${p}$')
+
+
+class PasswordHasher:
+    """Bounded thread pool for hash_password / verify_password.
+
+    verify() and hash() return None instead of waiting when max_pending
+    jobs are already queued or running, or the job takes longer than
+    timeout, so the caller can answer 503 straight away. hash_many() is
+    for bulk imports and isn't capped: give imports a PasswordHasher of
+    their own, or a large import holds up every login behind it.
+    """
+
+    def __init__(self, max_workers=1, max_pending=64, timeout=10.0, n=DEFAULT_N):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.n = n
+        self._dummy_hash = None
+        self._reset()
+        _instances.add(self)
+
+    def _reset(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {'hashes': 0, 'busy': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='password-hasher')
+            return self._executor
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1e3
+            with self._lock:
+                self._stats['hashes'] += 1
+                self._stats['total_ms'] += elapsed_ms
+                self._stats['max_ms'] = max(self._stats['max_ms'], elapsed_ms)
+
+    def _busy(self):
+        with self._lock:
+            self._stats['busy'] += 1
+        return None
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['busy'] += 1
+                return None
+            self._pending += 1
+        try:
+            future = self._pool().submit(self._timed, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A job counts as pending until it finishes, even if the caller stops waiting
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            return self._busy()
+
+    def verify(self, password, stored):
+        """True/False, or None when the pool is saturated.
+
+        stored=None (unknown user) is checked against a dummy hash, so a
+        missing username takes as long as a wrong password.
+        """
+        if stored is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = hash_password('', self.n)
+            result = self._run(verify_password, password, self._dummy_hash)
+            return None if result is None else False
+        return self._run(verify_password, password, stored)
+
+    def hash(self, password):
+        """A new hash, or None when the pool is saturated"""
+        return self._run(hash_password, password, self.n)
+
+    def hash_many(self, passwords):
+        return list(self._pool().map(lambda password: self._timed(hash_password, password, self.n), passwords))
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.n)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, pending=self._pending)
+        total_ms = stats.pop('total_ms')
+        stats['avg_ms'] = total_ms / stats['hashes'] if stats['hashes'] else 0.0
+        stats.update(max_workers=self.max_workers, max_pending=self.max_pending, n=self.n)
+        return stats
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class UserCache:
+    """username -> (id, role, password hash), each entry kept for ttl seconds.
+
+    Only found users are cached, so a newly created account is seen at
+    once; invalidate() drops an entry whose hash or role changed.
+    """
+
+    def __init__(self, ttl=30.0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._reset()
+        _instances.add(self)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(self, username):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[0] > now:
+                self._stats['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[username]
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, username, user):
+        with self._lock:
+            self._entries[username] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,215 @@
+"""Bulk import of users and assessments from JSON arrays or CSV.
+
+A batch is validated as a whole before anything is written: field checks
+run row by row in one pass, and the checks that need the database
+(usernames already taken, unknown teachers) are one query per batch
+rather than one per row. Validation and the executemany of the valid
+rows share a single write transaction; user passwords are hashed before
+it starts, so the write lock isn't held while scrypt runs. Errors are
+reported per row, numbered from 1 in input order; with strict=True a batch with any error writes nothing.
+
+The CLI can also create admin accounts (role "admin").
+
+    python -m utils.bulk_import --db fa_system.db users cohort.csv
+    python -m utils.bulk_import --db fa_system.db assessments term1.csv --teacher 1 --strict
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+
+from utils.auth import PasswordHasher, hash_password
+from utils.rubric_generator import BLOOM_CRITERIA
+
+ROLES = ('teacher', 'student')
+# Admins onboard users and use the /admin routes over HTTP; they can only be
+# created from the CLI
+ADMIN_ROLE = 'admin'
+MAX_ROWS = 50_000
+MAX_FIELD_LENGTH = 200
+
+USER_COLUMNS = ('username', 'password', 'role')
+ASSESSMENT_COLUMNS = ('teacher_id', 'subject_name', 'assessment_name', 'bloom_level')
+
+
+def read_csv(text):
+    """Rows of a CSV with a header line, as dicts"""
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _text(row, name, required=True, strip=True):
+    value = row.get(name)
+    value = value.strip() if strip and isinstance(value, str) else value
+    if value in (None, ''):
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    if len(value) > MAX_FIELD_LENGTH:
+        raise ValueError(f"{name} is longer than {MAX_FIELD_LENGTH} characters")
+    return value
+
+
+def _check_rows(rows, max_rows=MAX_ROWS):
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("expected a non-empty list of rows")
+    if len(rows) > max_rows:
+        raise ValueError(f"at most {max_rows} rows per import")
+
+
+def _existing(conn, sql, values):
+    # One query for the whole batch: the values travel as a single JSON array
+    return {row[0] for row in conn.execute(sql, (json.dumps(list(values)),))}
+
+
+def _parse_users(rows, roles=ROLES):
+    """Field checks: ([(row number, (username, password, role))], errors)"""
+    parsed, errors = [], []
+    for number, row in enumerate(rows, 1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row must be an object")
+            # /login checks the password exactly as typed, so it is hashed as given
+            username, password = _text(row, 'username'), _text(row, 'password', strip=False)
+            role = _text(row, 'role', required=False) or 'student'
+            if role not in roles:
+                raise ValueError(f"role must be one of {', '.join(roles)}")
+            parsed.append((number, (username, password, role)))
+        except ValueError as e:
+            errors.append({"row": number, "error": str(e)})
+    return parsed, errors
+
+
+def _check_usernames(conn, parsed):
+    """Drop usernames that are taken or repeated: (valid user rows, errors)"""
+    taken = _existing(conn, 'SELECT username FROM users WHERE username IN (SELECT value FROM json_each(?))',
+                      {user[0] for _, user in parsed})
+    seen = set()
+    valid, errors = [], []
+    for number, user in parsed:
+        username = user[0]
+        if username in taken:
+            errors.append({"row": number, "error": f"username {username!r} already exists"})
+        elif username in seen:
+            errors.append({"row": number, "error": f"username {username!r} appears earlier in the import"})
+        else:
+            seen.add(username)
+            valid.append(user)
+    return valid, errors
+
+
+def validate_assessments(conn, rows, teacher_id=None):
+    """(valid assessment rows, errors); teacher_id, if given, overrides each row's own"""
+    _check_rows(rows)
+    parsed, errors = [], []
+    for number, row in enumerate(rows, 1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row must be an object")
+            owner = teacher_id if teacher_id is not None else row.get('teacher_id')
+            try:
+                owner = int(owner)
+            except (TypeError, ValueError):
+                raise ValueError("teacher_id must be an integer") from None
+            bloom_level = _text(row, 'bloom_level', required=False)
+            if bloom_level is not None and bloom_level not in BLOOM_CRITERIA:
+                raise ValueError(f"bloom_level must be one of {', '.join(BLOOM_CRITERIA)}")
+            parsed.append((number, (owner, _text(row, 'subject_name'), _text(row, 'assessment_name'), bloom_level)))
+        except ValueError as e:
+            errors.append({"row": number, "error": str(e)})
+
+    teachers = _existing(conn, "SELECT id FROM users WHERE role = 'teacher' AND id IN (SELECT value FROM json_each(?))",
+                         {assessment[0] for _, assessment in parsed})
+    valid = []
+    for number, assessment in parsed:
+        if assessment[0] in teachers:
+            valid.append(assessment)
+        else:
+            errors.append({"row": number, "error": f"teacher {assessment[0]} does not exist"})
+    return valid, sorted(errors, key=lambda error: error["row"])
+
+
+INSERT_SQL = {
+    'users': 'INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+    'assessments': 'INSERT INTO assessments (teacher_id, subject_name, assessment_name, bloom_level) '
+                   'VALUES (?, ?, ?, ?)',
+}
+
+
+def bulk_insert(conn, kind, rows, teacher_id=None, strict=False, hash_many=None, max_rows=MAX_ROWS,
+                roles=ROLES):
+    """Validate and insert users or assessments; returns {"inserted", "rejected", "errors"}.
+
+    User passwords are stored hashed: hash_many maps a list of passwords
+    to their hashes (e.g. PasswordHasher.hash_many), one by one with
+    hash_password by default. roles are the ones imported users may have.
+    Raises ValueError when the batch itself is malformed (empty, more
+    than max_rows).
+    """
+    _check_rows(rows, max_rows)
+    errors = []
+    if kind == 'users':
+        # Hashing is the slow part, so it happens before the write lock is taken
+        parsed, errors = _parse_users(rows, roles)
+        if parsed and not (strict and errors):
+            hashes = (hash_many or _hash_each)([user[1] for _, user in parsed])
+            parsed = [(number, (username, hashed, role))
+                      for (number, (username, _, role)), hashed in zip(parsed, hashes)]
+
+    # IMMEDIATE takes the write lock before the database checks, so a username
+    # can't be taken between the check and the insert; the batch commits whole
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if kind == 'users':
+            valid, conflicts = _check_usernames(conn, parsed)
+            errors = sorted(errors + conflicts, key=lambda error: error["row"])
+        else:
+            valid, errors = validate_assessments(conn, rows, teacher_id)
+        if errors and strict:
+            valid = []
+        conn.executemany(INSERT_SQL[kind], valid)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {"inserted": len(valid), "rejected": len(rows) - len(valid), "errors": errors}
+
+
+def _hash_each(passwords):
+    return [hash_password(password) for password in passwords]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import users or assessments from a CSV file")
+    parser.add_argument('kind', choices=list(INSERT_SQL))
+    parser.add_argument('csv_file', help=f"header row with {', '.join(USER_COLUMNS)} (users) "
+                                         f"or {', '.join(ASSESSMENT_COLUMNS)} (assessments)")
+    parser.add_argument('--db', default='fa_system.db')
+    parser.add_argument('--teacher', type=int, help="owner of every imported assessment")
+    parser.add_argument('--strict', action='store_true', help="import nothing if any row is invalid")
+    args = parser.parse_args()
+
+    with open(args.csv_file, newline='') as f:
+        rows = read_csv(f.read())
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    # Password hashes on every core: nothing else is competing for them here
+    hasher = PasswordHasher(max_workers=os.cpu_count() or 1)
+    try:
+        result = bulk_insert(conn, args.kind, rows, teacher_id=args.teacher, strict=args.strict,
+                             hash_many=hasher.hash_many, roles=ROLES + (ADMIN_ROLE,))
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        hasher.close()
+        conn.close()
+
+    for error in result["errors"]:
+        print(f"⚠️ Row {error['row']}: {error['error']}")
+    print(f"✅ Imported {result['inserted']} {args.kind}, rejected {result['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Pools to fix up around os.fork() (pre-fork servers like gunicorn --preload)
+_pools = weakref.WeakSet()
+
+
+def _before_fork():
+    for pool in list(_pools):
+        pool._close_idle()
+
+
+def _after_fork_in_child():
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
+
+
+class ConnectionPool:
+    """A bounded pool of tuned SQLite connections shared by request handlers.
+
+    New connections are opened in WAL mode with synchronous=NORMAL and a
+    busy timeout, so readers don't block the writer and concurrent commits
+    wait instead of failing with "database is locked". sqlite3 keeps a
+    per-connection cache of prepared statements; reusing connections keeps
+    that cache warm across requests.
+
+    size=0 disables pooling: every acquire opens a plain connection and
+    release closes it (the behaviour before pooling, kept for comparison).
+
+    SQLite connections must not cross a fork, so idle connections are
+    closed in the parent just before os.fork() and the child starts with
+    an empty pool of its own.
+    """
+
+    def __init__(self, path, size=8, busy_timeout=5.0, cached_statements=256, wal=True):
+        self.path = path
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.wal = wal
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        _pools.add(self)
+
+    def _connect(self):
+        if not self.size:
+            return sqlite3.connect(self.path)
+
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+    def _close_idle(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def _reset(self):
+        # Connections checked out by other parent threads are never released
+        # here, so the child forgets them and opens its own
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def acquire(self, timeout=None):
+        """Take an idle connection, opening one if the pool isn't full yet"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self.size:
+            return self._connect()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.busy_timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled connection")
+
+    def release(self, conn):
+        """Return a connection, rolling back anything left uncommitted"""
+        if not self.size or self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections; connections still checked out close on release"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,224 @@
+"""Streaming export of student_responses and rubrics as CSV, NDJSON or Parquet.
+
+Rows are read with fetchmany in fixed-size chunks and each chunk is
+encoded and handed on before the next is read, so memory stays flat
+however large the table is. Filters (assessment, teacher, created_at
+range) are part of the SQL. Parquet needs pyarrow, which isn't a
+requirement of the app; it is written one row group per chunk.
+
+The "training" dataset has the data/dataset.csv layout, so a CSV export
+can be passed straight to FARecommendationModel.train_model or
+models.training --csv.
+
+    python -m utils.export --db fa_system.db --dataset training --output data/responses.csv
+    python -m utils.export --db fa_system.db --dataset responses --format ndjson --teacher 1 --since 2026-01-01
+"""
+import argparse
+import csv
+import io
+import json
+import sqlite3
+from datetime import datetime
+
+DEFAULT_CHUNKSIZE = 5000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# (column, SQL expression, type) per dataset; types pick the Parquet column type
+RESPONSE_COLUMNS = [
+    ('id', 'r.id', 'int'),
+    ('assessment_id', 'r.assessment_id', 'int'),
+    ('teacher_id', 'a.teacher_id', 'int'),
+    ('student_id', 'r.student_id', 'int'),
+    ('year_of_study', 'r.year_of_study', 'str'),
+    ('confidence_level', 'r.confidence_level', 'int'),
+    ('learning_mode', 'r.learning_mode', 'str'),
+    ('resources', 'r.resources', 'str'),
+    ('previous_tools', 'r.previous_tools', 'str'),
+    ('bloom_focus', 'r.bloom_focus', 'str'),
+    ('predicted_tool', 'r.predicted_tool', 'str'),
+    ('confidence_score', 'r.confidence_score', 'float'),
+    ('explanation', 'r.explanation', 'str'),
+    ('model_version', 'r.model_version', 'str'),
+    ('created_at', 'r.created_at', 'str'),
+]
+
+RUBRIC_COLUMNS = [
+    ('id', 'r.id', 'int'),
+    ('assessment_id', 'r.assessment_id', 'int'),
+    ('teacher_id', 'a.teacher_id', 'int'),
+    ('subject_name', 'a.subject_name', 'str'),
+    ('assessment_name', 'a.assessment_name', 'str'),
+    ('total_marks', 'r.total_marks', 'int'),
+    ('rubric_data', 'r.rubric_data', 'str'),
+    ('created_at', 'r.created_at', 'str'),
+]
+
+
+def _first_entry(expression):
+    # bloom_focus is comma-separated; training uses its first entry
+    return f"CASE WHEN instr({expression}, ',') > 0 THEN substr({expression}, 1, instr({expression}, ',') - 1) " \
+           f"ELSE {expression} END"
+
+
+def _training_columns():
+    # The feature expressions models.training reads responses with (imported
+    # here: models.training pulls in numpy, which app startup avoids)
+    from models.training import RESPONSE_COLUMNS as FEATURE_SQL
+
+    return [
+        ('StudentID', 'r.student_id', 'int'),
+        ('Year', FEATURE_SQL['Year'], 'str'),
+        ('LearningStyle', FEATURE_SQL['LearningStyle'], 'str'),
+        ('ConfidenceLevel', FEATURE_SQL['ConfidenceLevel'], 'int'),
+        ('PreferredTool', 'r.predicted_tool', 'str'),
+        ('LeastEffectiveTool', "''", 'str'),
+        ('BloomLevel', _first_entry(FEATURE_SQL['BloomLevel']), 'str'),
+    ]
+
+
+DATASETS = {
+    # name: (columns, FROM clause, extra condition)
+    'responses': (lambda: RESPONSE_COLUMNS,
+                  'student_responses r LEFT JOIN assessments a ON a.id = r.assessment_id', None),
+    'rubrics': (lambda: RUBRIC_COLUMNS, 'rubrics r JOIN assessments a ON a.id = r.assessment_id', None),
+    'training': (_training_columns, 'student_responses r LEFT JOIN assessments a ON a.id = r.assessment_id',
+                 'r.predicted_tool IS NOT NULL'),
+}
+
+
+def _timestamp(value):
+    # created_at is stored as 'YYYY-MM-DD HH:MM:SS' (CURRENT_TIMESTAMP, UTC)
+    return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def export_query(dataset, assessment_id=None, teacher_id=None, since=None, until=None):
+    """(columns, sql, params) selecting a dataset; since is inclusive, until exclusive.
+
+    Raises ValueError for an unknown dataset or a malformed date.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r}, expected one of {', '.join(DATASETS)}")
+    columns, source, condition = DATASETS[dataset]
+    columns = columns()
+
+    conditions = [condition] if condition else []
+    params = []
+    for sql, value in (('r.assessment_id = ?', assessment_id), ('a.teacher_id = ?', teacher_id),
+                       ('r.created_at >= ?', _timestamp(since) if since else None),
+                       ('r.created_at < ?', _timestamp(until) if until else None)):
+        if value is not None:
+            conditions.append(sql)
+            params.append(value)
+
+    sql = f"SELECT {', '.join(expression for _, expression, _ in columns)} FROM {source}"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    return columns, sql + ' ORDER BY r.id', params
+
+
+def iter_chunks(conn, sql, params, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield lists of at most chunksize rows"""
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def iter_csv(columns, chunks):
+    """Header, then one CSV string per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _, _ in columns])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(columns, chunks):
+    """One JSON object per row, a string per chunk"""
+    names = [name for name, _, _ in columns]
+    for rows in chunks:
+        yield ''.join(json.dumps(dict(zip(names, row))) + '\n' for row in rows)
+
+
+def write_parquet(sink, columns, chunks):
+    """Write chunks to sink (a path or binary file) as Parquet row groups; returns rows written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string()}
+    schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+    n_rows = 0
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in chunks:
+            values = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema))
+            n_rows += len(rows)
+    return n_rows
+
+
+def export(conn, dataset, fmt, path, chunksize=DEFAULT_CHUNKSIZE, **filters):
+    """Write a dataset to path in the given format; returns the number of rows"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    columns, sql, params = export_query(dataset, **filters)
+    n_rows = 0
+
+    def counted(chunks):
+        nonlocal n_rows
+        for rows in chunks:
+            n_rows += len(rows)
+            yield rows
+
+    chunks = counted(iter_chunks(conn, sql, params, chunksize))
+    if fmt == 'parquet':
+        write_parquet(path, columns, chunks)
+        return n_rows
+    encode = iter_csv if fmt == 'csv' else iter_ndjson
+    with open(path, 'w', newline='') as f:
+        for text in encode(columns, chunks):
+            f.write(text)
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export responses or rubrics from the FA database")
+    parser.add_argument('--db', default='fa_system.db')
+    parser.add_argument('--dataset', choices=list(DATASETS), default='responses')
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--assessment', type=int, help="only this assessment")
+    parser.add_argument('--teacher', type=int, help="only this teacher's assessments")
+    parser.add_argument('--since', help="created_at on or after (ISO date/time, UTC)")
+    parser.add_argument('--until', help="created_at before (ISO date/time, UTC)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        n_rows = export(conn, args.dataset, args.format, args.output, args.chunksize,
+                        assessment_id=args.assessment, teacher_id=args.teacher, since=args.since, until=args.until)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    print(f"✅ Exported {n_rows} {args.dataset} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+
+# smaps_rollup fields reported by process_memory(), in kB
+_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb'
+}
+
+
+def process_memory(pid='self'):
+    """RSS/PSS breakdown of a process from /proc/<pid>/smaps_rollup (Linux).
+
+    PSS divides every shared page between the processes mapping it, so the
+    PSS of pre-forked workers sums to their real footprint while their RSS
+    counts shared pages once per worker. Returns None where smaps_rollup
+    isn't available.
+    """
+    path = f'/proc/{pid}/smaps_rollup'
+    if not os.path.exists(path):
+        return None
+
+    usage = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            key = _FIELDS.get(parts[0].rstrip(':')) if parts else None
+            if key is not None:
+                usage[key] = int(parts[1])
+    usage['pid'] = os.getpid() if pid == 'self' else int(pid)
+    return usage
+
+
+def child_pids(pid):
+    """Direct children of a process, e.g. the workers of a pre-fork master"""
+    children = set()
+    task_dir = f'/proc/{pid}/task'
+    for task in os.listdir(task_dir):
+        with open(os.path.join(task_dir, task, 'children')) as f:
+            children.update(int(child) for child in f.read().split())
+    return sorted(children)
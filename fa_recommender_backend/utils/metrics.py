@@ -0,0 +1,189 @@
+"""Request and stage timings, exported in the Prometheus text format.
+
+    from utils.metrics import registry as metrics
+
+    with metrics.stage('predict'):
+        ...
+
+Stages are histograms labelled by stage name; an exception inside one is
+counted as an error of that stage. The registry starts disabled: stage()
+then hands back a shared no-op context manager and nothing is recorded,
+so instrumented code costs a method call. Values are per process; with
+several workers each one exposes its own (scrape them individually or
+use one worker per target).
+"""
+import bisect
+import os
+import threading
+import time
+import weakref
+
+# Seconds; Prometheus' usual latency spread, extended down for sub-ms stages
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'fa_request_seconds': 'HTTP request latency by route',
+    'fa_requests_total': 'HTTP requests by route, method and status',
+    'fa_request_errors_total': 'HTTP requests that ended in a 5xx, by route',
+    'fa_stage_seconds': 'Time spent in an instrumented stage',
+    'fa_stage_errors_total': 'Exceptions raised inside an instrumented stage',
+}
+
+_registries = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for registry in list(_registries):
+        registry._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ('registry', 'labels', 'start')
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe('fa_stage_seconds', self.labels, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.registry.inc('fa_stage_errors_total', self.labels)
+        return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed on (name, labels), plus collector callbacks.
+
+    A collector is a function returning (name, type, help, labels dict,
+    value) tuples, read at scrape time; it exports stats the app already
+    keeps (queue depths, cache hits) without instrumenting them twice.
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+        _registries.add(self)
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def _reset(self):
+        # The parent's observations (e.g. a preloaded model) aren't this worker's
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def stage(self, name):
+        """Context manager timing one stage; a no-op while disabled"""
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, (('stage', name),))
+
+    def observe(self, name, labels, seconds):
+        """Add one observation to a histogram; labels is a tuple of (key, value) pairs"""
+        key = (name, labels)
+        # Index of the first bound >= seconds; len(buckets) is the +Inf bucket
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def inc(self, name, labels, n=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def observe_request(self, route, method, status, seconds):
+        route_label = (('route', route),)
+        self.observe('fa_request_seconds', route_label, seconds)
+        self.inc('fa_requests_total', (('route', route), ('method', method), ('status', str(status))))
+        if status >= 500:
+            self.inc('fa_request_errors_total', route_label)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = {key: (list(counts), total, count)
+                          for key, (counts, total, count) in self._histograms.items()}
+            counters = dict(self._counters)
+
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, ('counter', HELP.get(name, name), []))[2].append((labels, value))
+        for (name, labels), value in histograms.items():
+            families.setdefault(name, ('histogram', HELP.get(name, name), []))[2].append((labels, value))
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                families.setdefault(name, (kind, help_text, []))[2].append((tuple(labels.items()), value))
+
+        lines = []
+        for name in sorted(families):
+            kind, help_text, samples = families[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(samples, key=lambda sample: sample[0]):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += n
+                    bucket_labels = labels + (('le', _format_value(float(bound))),)
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+# The process-wide registry the app and models record into
+registry = MetricsRegistry()
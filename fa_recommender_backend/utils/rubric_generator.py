@@ -1,69 +1,142 @@
-import random
+import functools
+import zlib
+
+# Static tables, built once at import time
+
+BLOOM_CRITERIA = {
+    'Remember': ['Recall facts', 'List items', 'Define terms', 'Identify concepts'],
+    'Understand': ['Explain concepts', 'Summarize content', 'Interpret information', 'Compare ideas'],
+    'Apply': ['Use knowledge in new situations', 'Solve problems', 'Implement procedures', 'Demonstrate skills'],
+    'Analyze': ['Break down information', 'Examine relationships', 'Compare and contrast', 'Identify patterns'],
+    'Evaluate': ['Make judgments', 'Critique ideas', 'Assess quality', 'Justify decisions'],
+    'Create': ['Design solutions', 'Generate new ideas', 'Develop plans', 'Construct products']
+}
+
+FA_TOOL_CRITERIA = {
+    'Quiz': {
+        'criteria': ['Accuracy of answers', 'Speed of completion', 'Understanding of concepts'],
+        'weightage': [40, 20, 40]
+    },
+    'Project': {
+        'criteria': ['Innovation and creativity', 'Technical implementation', 'Documentation quality', 'Presentation'],
+        'weightage': [25, 30, 25, 20]
+    },
+    'Lab Work': {
+        'criteria': ['Experimental setup', 'Data collection', 'Analysis and interpretation', 'Safety protocols'],
+        'weightage': [25, 25, 35, 15]
+    },
+    'Case Study': {
+        'criteria': ['Problem identification', 'Analysis depth', 'Solution feasibility', 'Critical thinking'],
+        'weightage': [20, 30, 30, 20]
+    },
+    'Group Work': {
+        'criteria': ['Collaboration', 'Individual contribution', 'Final output quality', 'Communication'],
+        'weightage': [25, 25, 30, 20]
+    },
+    'Presentation / PPT': {
+        'criteria': ['Content quality', 'Visual design', 'Delivery and communication', 'Time management'],
+        'weightage': [35, 20, 35, 10]
+    },
+    'Written Paper': {
+        'criteria': ['Content accuracy', 'Writing clarity', 'Structure and organization', 'References and citations'],
+        'weightage': [40, 25, 25, 10]
+    },
+    'Role Play': {
+        'criteria': ['Character understanding', 'Scenario execution', 'Learning demonstration', 'Creativity'],
+        'weightage': [25, 25, 30, 20]
+    },
+    'Poster Presentation': {
+        'criteria': ['Visual appeal', 'Content clarity', 'Information accuracy', 'Presentation skills'],
+        'weightage': [25, 30, 25, 20]
+    },
+    'Viva / Oral Test': {
+        'criteria': ['Knowledge depth', 'Communication skills', 'Confidence', 'Question handling'],
+        'weightage': [40, 20, 20, 20]
+    },
+    'Reflection Journal': {
+        'criteria': ['Self-reflection depth', 'Learning insights', 'Writing quality', 'Regular entries'],
+        'weightage': [30, 30, 20, 20]
+    },
+    'Open Book Test': {
+        'criteria': ['Information utilization', 'Problem-solving approach', 'Time management', 'Answer quality'],
+        'weightage': [30, 30, 20, 20]
+    }
+}
+
+PERFORMANCE_LEVELS = ['Excellent', 'Good', 'Satisfactory', 'Needs Improvement']
+
+LEVEL_DESCRIPTIONS = {
+    'Excellent': {
+        'Accuracy of answers': 'All answers are correct with detailed explanations',
+        'Content quality': 'Exceptional depth and breadth of content with innovative insights',
+        'Technical implementation': 'Flawless execution with advanced techniques',
+        'Collaboration': 'Outstanding teamwork and leadership skills demonstrated',
+        'Knowledge depth': 'Comprehensive understanding with ability to extend concepts'
+    },
+    'Good': {
+        'Accuracy of answers': 'Most answers correct with good explanations',
+        'Content quality': 'Good content with clear understanding',
+        'Technical implementation': 'Solid implementation with minor areas for improvement',
+        'Collaboration': 'Effective participation and good teamwork',
+        'Knowledge depth': 'Good understanding with minor gaps'
+    },
+    'Satisfactory': {
+        'Accuracy of answers': 'Basic answers with some correct elements',
+        'Content quality': 'Adequate content meeting minimum requirements',
+        'Technical implementation': 'Basic implementation with room for improvement',
+        'Collaboration': 'Participated but limited contribution',
+        'Knowledge depth': 'Basic understanding with some confusion'
+    },
+    'Needs Improvement': {
+        'Accuracy of answers': 'Many incorrect answers or incomplete responses',
+        'Content quality': 'Insufficient content or significant gaps',
+        'Technical implementation': 'Poor implementation with major issues',
+        'Collaboration': 'Limited participation or disruptive behavior',
+        'Knowledge depth': 'Minimal understanding with major gaps'
+    }
+}
+
+BLOOM_VERBS = {
+    'Remember': ['recall', 'identify', 'list', 'define'],
+    'Understand': ['explain', 'describe', 'summarize', 'interpret'],
+    'Apply': ['apply', 'use', 'implement', 'demonstrate'],
+    'Analyze': ['analyze', 'examine', 'compare', 'break down'],
+    'Evaluate': ['evaluate', 'assess', 'critique', 'judge'],
+    'Create': ['create', 'design', 'develop', 'generate']
+}
+
+LEVEL_QUALIFIERS = {
+    'Excellent': 'exceptionally well',
+    'Good': 'effectively',
+    'Satisfactory': 'adequately',
+    'Needs Improvement': 'with significant gaps'
+}
 
 class RubricGenerator:
-    def __init__(self):
-        self.bloom_criteria = {
-            'Remember': ['Recall facts', 'List items', 'Define terms', 'Identify concepts'],
-            'Understand': ['Explain concepts', 'Summarize content', 'Interpret information', 'Compare ideas'],
-            'Apply': ['Use knowledge in new situations', 'Solve problems', 'Implement procedures', 'Demonstrate skills'],
-            'Analyze': ['Break down information', 'Examine relationships', 'Compare and contrast', 'Identify patterns'],
-            'Evaluate': ['Make judgments', 'Critique ideas', 'Assess quality', 'Justify decisions'],
-            'Create': ['Design solutions', 'Generate new ideas', 'Develop plans', 'Construct products']
-        }
-        
-        self.fa_tool_criteria = {
-            'Quiz': {
-                'criteria': ['Accuracy of answers', 'Speed of completion', 'Understanding of concepts'],
-                'weightage': [40, 20, 40]
-            },
-            'Project': {
-                'criteria': ['Innovation and creativity', 'Technical implementation', 'Documentation quality', 'Presentation'],
-                'weightage': [25, 30, 25, 20]
-            },
-            'Lab Work': {
-                'criteria': ['Experimental setup', 'Data collection', 'Analysis and interpretation', 'Safety protocols'],
-                'weightage': [25, 25, 35, 15]
-            },
-            'Case Study': {
-                'criteria': ['Problem identification', 'Analysis depth', 'Solution feasibility', 'Critical thinking'],
-                'weightage': [20, 30, 30, 20]
-            },
-            'Group Work': {
-                'criteria': ['Collaboration', 'Individual contribution', 'Final output quality', 'Communication'],
-                'weightage': [25, 25, 30, 20]
-            },
-            'Presentation / PPT': {
-                'criteria': ['Content quality', 'Visual design', 'Delivery and communication', 'Time management'],
-                'weightage': [35, 20, 35, 10]
-            },
-            'Written Paper': {
-                'criteria': ['Content accuracy', 'Writing clarity', 'Structure and organization', 'References and citations'],
-                'weightage': [40, 25, 25, 10]
-            },
-            'Role Play': {
-                'criteria': ['Character understanding', 'Scenario execution', 'Learning demonstration', 'Creativity'],
-                'weightage': [25, 25, 30, 20]
-            },
-            'Poster Presentation': {
-                'criteria': ['Visual appeal', 'Content clarity', 'Information accuracy', 'Presentation skills'],
-                'weightage': [25, 30, 25, 20]
-            },
-            'Viva / Oral Test': {
-                'criteria': ['Knowledge depth', 'Communication skills', 'Confidence', 'Question handling'],
-                'weightage': [40, 20, 20, 20]
-            },
-            'Reflection Journal': {
-                'criteria': ['Self-reflection depth', 'Learning insights', 'Writing quality', 'Regular entries'],
-                'weightage': [30, 30, 20, 20]
-            },
-            'Open Book Test': {
-                'criteria': ['Information utilization', 'Problem-solving approach', 'Time management', 'Answer quality'],
-                'weightage': [30, 30, 20, 20]
-            }
-        }
+    def __init__(self, cache_size=256):
+        self.bloom_criteria = BLOOM_CRITERIA
+        self.fa_tool_criteria = FA_TOOL_CRITERIA
+
+        # Rubrics are deterministic, so identical requests share one result
+        self._cached_rubric = functools.lru_cache(maxsize=cache_size)(self._build_rubric)
+        self._html_renderer = None
     
     def generate_rubric(self, assessment_name, fa_tool, total_marks, bloom_level):
-        """Generate a comprehensive rubric for the given parameters"""
+        """Generate a comprehensive rubric for the given parameters.
+
+        Results are memoized per (assessment_name, fa_tool, total_marks,
+        bloom_level) in a bounded LRU and shared between callers, so treat
+        the returned dict as read-only.
+        """
+        return self._cached_rubric(assessment_name, fa_tool, total_marks, bloom_level)
+
+    def cache_info(self):
+        return self._cached_rubric.cache_info()
+
+    def clear_cache(self):
+        self._cached_rubric.cache_clear()
+
+    def _build_rubric(self, assessment_name, fa_tool, total_marks, bloom_level):
         
         # Get tool-specific criteria
         tool_config = self.fa_tool_criteria.get(fa_tool, self.fa_tool_criteria['Quiz'])
@@ -127,7 +200,7 @@ class RubricGenerator:
             level_description = self._get_level_description(criterion, i, bloom_level)
             
             levels.append({
-                'level': ['Excellent', 'Good', 'Satisfactory', 'Needs Improvement'][i],
+                'level': PERFORMANCE_LEVELS[i],
                 'range': range_text,
                 'marks': marks,
                 'description': level_description
@@ -137,66 +210,22 @@ class RubricGenerator:
     
     def _get_level_description(self, criterion, level_index, bloom_level):
         """Generate description for each performance level"""
-        descriptions = {
-            'Excellent': {
-                'Accuracy of answers': 'All answers are correct with detailed explanations',
-                'Content quality': 'Exceptional depth and breadth of content with innovative insights',
-                'Technical implementation': 'Flawless execution with advanced techniques',
-                'Collaboration': 'Outstanding teamwork and leadership skills demonstrated',
-                'Knowledge depth': 'Comprehensive understanding with ability to extend concepts'
-            },
-            'Good': {
-                'Accuracy of answers': 'Most answers correct with good explanations',
-                'Content quality': 'Good content with clear understanding',
-                'Technical implementation': 'Solid implementation with minor areas for improvement',
-                'Collaboration': 'Effective participation and good teamwork',
-                'Knowledge depth': 'Good understanding with minor gaps'
-            },
-            'Satisfactory': {
-                'Accuracy of answers': 'Basic answers with some correct elements',
-                'Content quality': 'Adequate content meeting minimum requirements',
-                'Technical implementation': 'Basic implementation with room for improvement',
-                'Collaboration': 'Participated but limited contribution',
-                'Knowledge depth': 'Basic understanding with some confusion'
-            },
-            'Needs Improvement': {
-                'Accuracy of answers': 'Many incorrect answers or incomplete responses',
-                'Content quality': 'Insufficient content or significant gaps',
-                'Technical implementation': 'Poor implementation with major issues',
-                'Collaboration': 'Limited participation or disruptive behavior',
-                'Knowledge depth': 'Minimal understanding with major gaps'
-            }
-        }
-        
-        level_name = ['Excellent', 'Good', 'Satisfactory', 'Needs Improvement'][level_index]
+        level_name = PERFORMANCE_LEVELS[level_index]
         
         # Try to find specific description, fallback to generic
-        if criterion in descriptions[level_name]:
-            return descriptions[level_name][criterion]
+        if criterion in LEVEL_DESCRIPTIONS[level_name]:
+            return LEVEL_DESCRIPTIONS[level_name][criterion]
         else:
             # Generate based on bloom level and criterion
             return self._generate_generic_description(criterion, level_name, bloom_level)
     
     def _generate_generic_description(self, criterion, level_name, bloom_level):
         """Generate generic description based on criterion and level"""
-        bloom_verbs = {
-            'Remember': ['recall', 'identify', 'list', 'define'],
-            'Understand': ['explain', 'describe', 'summarize', 'interpret'],
-            'Apply': ['apply', 'use', 'implement', 'demonstrate'],
-            'Analyze': ['analyze', 'examine', 'compare', 'break down'],
-            'Evaluate': ['evaluate', 'assess', 'critique', 'judge'],
-            'Create': ['create', 'design', 'develop', 'generate']
-        }
-        
-        level_qualifiers = {
-            'Excellent': 'exceptionally well',
-            'Good': 'effectively',
-            'Satisfactory': 'adequately',
-            'Needs Improvement': 'with significant gaps'
-        }
+        verbs = BLOOM_VERBS.get(bloom_level, BLOOM_VERBS['Apply'])
         
-        verb = random.choice(bloom_verbs.get(bloom_level, bloom_verbs['Apply']))
-        qualifier = level_qualifiers[level_name]
+        # Stable pick (not random.choice) so the same inputs always give the same rubric
+        verb = verbs[zlib.crc32(f"{criterion}|{level_name}".encode()) % len(verbs)]
+        qualifier = LEVEL_QUALIFIERS[level_name]
         
         return f"Can {verb} {criterion.lower()} {qualifier}"
     
@@ -213,65 +242,11 @@ class RubricGenerator:
     
     def generate_rubric_html(self, rubric_data):
         """Generate HTML representation of the rubric"""
-        html = f"""
-        <div class="rubric-container">
-            <h2>Assessment Rubric: {rubric_data['assessment_name']}</h2>
-            <div class="rubric-info">
-                <p><strong>FA Tool:</strong> {rubric_data['fa_tool']}</p>
-                <p><strong>Bloom's Level:</strong> {rubric_data['bloom_level']}</p>
-                <p><strong>Total Marks:</strong> {rubric_data['total_marks']}</p>
-            </div>
-            
-            <table class="rubric-table">
-                <thead>
-                    <tr>
-                        <th>Criteria</th>
-                        <th>Marks</th>
-                        <th>Excellent</th>
-                        <th>Good</th>
-                        <th>Satisfactory</th>
-                        <th>Needs Improvement</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for criterion in rubric_data['criteria']:
-            html += f"""
-                    <tr>
-                        <td><strong>{criterion['criterion']}</strong></td>
-                        <td>{criterion['marks']}</td>
-            """
-            
-            for level in criterion['levels']:
-                html += f"""
-                        <td>
-                            <div class="level-info">
-                                <strong>{level['range']}</strong><br>
-                                <span class="marks">({level['marks']} marks)</span><br>
-                                <p>{level['description']}</p>
-                            </div>
-                        </td>
-                """
-            
-            html += "</tr>"
-        
-        html += """
-                </tbody>
-            </table>
-            
-            <div class="bloom-integration">
-                <h3>Bloom's Taxonomy Integration</h3>
-                <p><strong>Target Level:</strong> {}</p>
-                <p><strong>Assessment Focus:</strong> {}</p>
-            </div>
-        </div>
-        """.format(
-            rubric_data['bloom_integration']['target_level'],
-            rubric_data['bloom_integration']['assessment_focus']
-        )
-        
-        return html
+        from utils.rubric_renderer import RubricHtmlRenderer
+
+        if self._html_renderer is None:
+            self._html_renderer = RubricHtmlRenderer()
+        return self._html_renderer.render(rubric_data)
 
 # Usage example
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+import functools
+import io
+from html import escape
+
+from utils.rubric_generator import PERFORMANCE_LEVELS
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _escape(value):
+    """html.escape for any value; rubric text repeats a lot, so results are cached"""
+    return escape(str(value))
+
+
+class RubricHtmlRenderer:
+    """Render rubrics to HTML as a stream of chunks.
+
+    The static parts of the layout (document shell, table header, cell
+    templates) are compiled once when the renderer is created; rendering
+    only fills in the escaped rubric values and yields one chunk per
+    table row, so a response can be streamed and large documents never
+    need to exist as one string.
+    """
+
+    DOCUMENT_START = (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        '<title>{title}</title>\n</head>\n<body>\n'
+    )
+    DOCUMENT_END = '</body>\n</html>\n'
+
+    RUBRIC_START = (
+        '<div class="rubric-container">\n'
+        '<h2>Assessment Rubric: {assessment_name}</h2>\n'
+        '<div class="rubric-info">\n'
+        '<p><strong>FA Tool:</strong> {fa_tool}</p>\n'
+        '<p><strong>Bloom\'s Level:</strong> {bloom_level}</p>\n'
+        '<p><strong>Total Marks:</strong> {total_marks}</p>\n'
+        '</div>\n'
+        '<table class="rubric-table">\n'
+    )
+    # Per-row templates are positional: (criterion, marks) and (range, marks, description)
+    ROW_START = '<tr>\n<td><strong>%s</strong></td>\n<td>%s</td>\n'
+    LEVEL_CELL = (
+        '<td>\n<div class="level-info">\n'
+        '<strong>%s</strong><br>\n'
+        '<span class="marks">(%s marks)</span><br>\n'
+        '<p>%s</p>\n'
+        '</div>\n</td>\n'
+    )
+    ROW_END = '</tr>\n'
+    RUBRIC_END = (
+        '</tbody>\n</table>\n'
+        '<div class="bloom-integration">\n'
+        '<h3>Bloom\'s Taxonomy Integration</h3>\n'
+        '<p><strong>Target Level:</strong> {target_level}</p>\n'
+        '<p><strong>Assessment Focus:</strong> {assessment_focus}</p>\n'
+        '</div>\n</div>\n'
+    )
+
+    def __init__(self, levels=PERFORMANCE_LEVELS):
+        header_cells = ''.join(f'<th>{escape(level)}</th>\n' for level in levels)
+        self._table_head = (
+            '<thead>\n<tr>\n<th>Criteria</th>\n<th>Marks</th>\n'
+            + header_cells + '</tr>\n</thead>\n<tbody>\n'
+        )
+        self._rubric_start = self.RUBRIC_START.format
+        self._rubric_end = self.RUBRIC_END.format
+
+    def iter_rubric(self, rubric_data):
+        """Yield the HTML for one rubric, one table row per chunk"""
+        yield self._rubric_start(
+            assessment_name=_escape(rubric_data['assessment_name']),
+            fa_tool=_escape(rubric_data['fa_tool']),
+            bloom_level=_escape(rubric_data['bloom_level']),
+            total_marks=_escape(rubric_data['total_marks'])
+        ) + self._table_head
+
+        row_start, level_cell, row_end = self.ROW_START, self.LEVEL_CELL, self.ROW_END
+        for criterion in rubric_data['criteria']:
+            cells = [row_start % (_escape(criterion['criterion']), _escape(criterion['marks']))]
+            for level in criterion['levels']:
+                cells.append(level_cell % (_escape(level['range']), _escape(level['marks']),
+                                           _escape(level['description'])))
+            cells.append(row_end)
+            yield ''.join(cells)
+
+        bloom = rubric_data['bloom_integration']
+        yield self._rubric_end(target_level=_escape(bloom['target_level']),
+                               assessment_focus=_escape(bloom['assessment_focus']))
+
+    def iter_document(self, rubrics, title='Assessment Rubrics'):
+        """Yield a full HTML document containing every rubric in `rubrics` (any iterable)"""
+        yield self.DOCUMENT_START.format(title=escape(title))
+        for rubric_data in rubrics:
+            yield from self.iter_rubric(rubric_data)
+        yield self.DOCUMENT_END
+
+    def render(self, rubric_data):
+        """Render one rubric fragment to a string"""
+        buffer = io.StringIO()
+        for chunk in self.iter_rubric(rubric_data):
+            buffer.write(chunk)
+        return buffer.getvalue()
+
+    def render_document(self, rubrics, title='Assessment Rubrics'):
+        buffer = io.StringIO()
+        for chunk in self.iter_document(rubrics, title):
+            buffer.write(chunk)
+        return buffer.getvalue()
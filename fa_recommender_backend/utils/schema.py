@@ -0,0 +1,306 @@
+"""Database schema: base tables plus versioned migrations.
+
+Migrations are tracked with SQLite's PRAGMA user_version. Each one runs
+once, in its own transaction, after create_tables. Add new steps to the
+end of MIGRATIONS.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.auth import SCHEME, hash_password
+
+
+def create_tables(conn):
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,  -- an encoded hash since migration 5, see utils.auth
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assessments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            teacher_id INTEGER,
+            subject_name TEXT NOT NULL,
+            assessment_name TEXT NOT NULL,
+            bloom_level TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (teacher_id) REFERENCES users (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS student_responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            assessment_id INTEGER,
+            student_id INTEGER,
+            year_of_study INTEGER,
+            study_hours INTEGER,
+            confidence_level INTEGER,
+            learning_mode INTEGER,
+            difficulty_level INTEGER,
+            time_available INTEGER,
+            topic_type INTEGER,
+            resources TEXT,
+            previous_tools TEXT,
+            bloom_focus TEXT,
+            predicted_tool TEXT,
+            confidence_score REAL,
+            explanation TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (assessment_id) REFERENCES assessments (id),
+            FOREIGN KEY (student_id) REFERENCES users (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rubrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            assessment_id INTEGER,
+            total_marks INTEGER,
+            rubric_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (assessment_id) REFERENCES assessments (id)
+        )
+    ''')
+
+    conn.commit()
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = _columns(conn, table)
+    for name, decl in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+
+
+def _indexes_and_unique_rubrics(conn):
+    # Databases created before these columns existed can't be indexed on them
+    _add_missing_columns(conn, 'student_responses', [
+        ('assessment_id', 'INTEGER REFERENCES assessments (id)'),
+        ('resources', 'TEXT'),
+        ('previous_tools', 'TEXT'),
+        ('bloom_focus', 'TEXT')
+    ])
+
+    # teacher_assessments filters on teacher_id (and soon is_active)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_assessments_teacher
+        ON assessments (teacher_id, is_active)
+    ''')
+
+    # Per-assessment and per-student response lookups
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_responses_assessment_student
+        ON student_responses (assessment_id, student_id)
+    ''')
+
+    # INSERT OR REPLACE used to append; keep the newest rubric per assessment
+    conn.execute('''
+        DELETE FROM rubrics
+        WHERE id NOT IN (SELECT MAX(id) FROM rubrics GROUP BY assessment_id)
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_rubrics_assessment
+        ON rubrics (assessment_id)
+    ''')
+
+
+def _response_model_version(conn):
+    # Which model artifact produced predicted_tool; NULL for older rows
+    _add_missing_columns(conn, 'student_responses', [('model_version', 'TEXT')])
+
+
+# Per-assessment response counts and confidence sums, one row per
+# (assessment, dimension, value); 'all' holds the assessment's totals.
+# Triggers keep it in step with student_responses, so a class summary
+# reads a few dozen rows however many responses there are.
+SUMMARY_DIMENSIONS = ('predicted_tool', 'year_of_study', 'learning_mode')
+
+
+def summary_select(where='assessment_id IS NOT NULL'):
+    """GROUP BY over student_responses producing assessment_summary rows"""
+    parts = [f'''
+        SELECT assessment_id, 'all', '', COUNT(*), COALESCE(SUM(confidence_score), 0), COUNT(confidence_score)
+        FROM student_responses WHERE {where} GROUP BY assessment_id
+    ''']
+    for dimension in SUMMARY_DIMENSIONS:
+        parts.append(f'''
+        SELECT assessment_id, '{dimension}', COALESCE(CAST({dimension} AS TEXT), ''), COUNT(*),
+               COALESCE(SUM(confidence_score), 0), COUNT(confidence_score)
+        FROM student_responses WHERE {where} GROUP BY assessment_id, 3
+        ''')
+    return ' UNION ALL '.join(parts)
+
+
+def _summary_values(row):
+    # (dimension, value) pairs a response row counts towards
+    return [("'all'", "''")] + [(f"'{dimension}'", f"COALESCE(CAST({row}.{dimension} AS TEXT), '')")
+                                for dimension in SUMMARY_DIMENSIONS]
+
+
+def _summary_add(row):
+    values = ', '.join(
+        f"({dimension}, {value}, COALESCE({row}.confidence_score, 0), {row}.confidence_score IS NOT NULL)"
+        for dimension, value in _summary_values(row)
+    )
+    return f'''
+        INSERT INTO assessment_summary
+            (assessment_id, dimension, value, responses, confidence_sum, confidence_count)
+        SELECT {row}.assessment_id, column1, column2, 1, column3, column4 FROM (VALUES {values})
+        WHERE {row}.assessment_id IS NOT NULL
+        ON CONFLICT (assessment_id, dimension, value) DO UPDATE SET
+            responses = responses + excluded.responses,
+            confidence_sum = confidence_sum + excluded.confidence_sum,
+            confidence_count = confidence_count + excluded.confidence_count;
+    '''
+
+
+def _summary_remove(row):
+    # assessment_id = NULL matches nothing, so rows without an assessment are skipped
+    keys = ' OR '.join(f'(dimension = {dimension} AND value = {value})'
+                       for dimension, value in _summary_values(row))
+    return f'''
+        UPDATE assessment_summary SET
+            responses = responses - 1,
+            confidence_sum = confidence_sum - COALESCE({row}.confidence_score, 0),
+            confidence_count = confidence_count - ({row}.confidence_score IS NOT NULL)
+        WHERE assessment_id = {row}.assessment_id AND ({keys});
+        DELETE FROM assessment_summary WHERE assessment_id = {row}.assessment_id AND responses <= 0;
+    '''
+
+
+def _assessment_summary(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_summary (
+            assessment_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            responses INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            confidence_count INTEGER NOT NULL,
+            PRIMARY KEY (assessment_id, dimension, value)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('DELETE FROM assessment_summary')
+    conn.execute(f'''
+        INSERT INTO assessment_summary
+            (assessment_id, dimension, value, responses, confidence_sum, confidence_count)
+        {summary_select()}
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_summary_insert AFTER INSERT ON student_responses
+        BEGIN {_summary_add('NEW')} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_summary_delete AFTER DELETE ON student_responses
+        BEGIN {_summary_remove('OLD')} END
+    ''')
+    # An update moves the row's contribution: take the old values out, add the new
+    watched = ', '.join(('assessment_id', 'confidence_score') + SUMMARY_DIMENSIONS)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_summary_update AFTER UPDATE OF {watched} ON student_responses
+        BEGIN {_summary_remove('OLD')} {_summary_add('NEW')} END
+    ''')
+
+
+def _assessment_listing(conn):
+    # Keyset pages over all of a teacher's assessments walk this in id order;
+    # idx_assessments_teacher only does so with is_active fixed
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_assessments_teacher_id
+        ON assessments (teacher_id, id)
+    ''')
+
+    # Bumped by any change to a teacher's assessments: listing ETags are
+    # built from it, so a revalidation is one primary-key read
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_versions (
+            teacher_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    bump = '''
+        INSERT INTO assessment_versions (teacher_id, version) VALUES ({row}.teacher_id, 1)
+        ON CONFLICT (teacher_id) DO UPDATE SET version = version + 1;
+    '''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_assessment_version_insert AFTER INSERT ON assessments
+        WHEN NEW.teacher_id IS NOT NULL
+        BEGIN {bump.format(row='NEW')} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_assessment_version_delete AFTER DELETE ON assessments
+        WHEN OLD.teacher_id IS NOT NULL
+        BEGIN {bump.format(row='OLD')} END
+    ''')
+    # A row moved to another teacher changes both listings
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_assessment_version_update AFTER UPDATE ON assessments
+        BEGIN
+            INSERT INTO assessment_versions (teacher_id, version)
+            SELECT teacher_id, 1 FROM (SELECT OLD.teacher_id AS teacher_id UNION SELECT NEW.teacher_id)
+            WHERE teacher_id IS NOT NULL
+            ON CONFLICT (teacher_id) DO UPDATE SET version = version + 1;
+        END
+    ''')
+
+
+def _hash_passwords(conn):
+    # users.password held plaintext before this; scrypt releases the GIL, so
+    # the existing rows are hashed on every core
+    rows = conn.execute('SELECT id, password FROM users WHERE password NOT LIKE ?', (SCHEME + '$%',)).fetchall()
+    if not rows:
+        return
+    with ThreadPoolExecutor(os.cpu_count() or 1) as pool:
+        hashes = list(pool.map(hash_password, [password for _, password in rows]))
+    conn.executemany('UPDATE users SET password = ? WHERE id = ?',
+                     [(hashed, user_id) for (user_id, _), hashed in zip(rows, hashes)])
+    print(f"✅ Hashed {len(rows)} stored passwords")
+
+
+MIGRATIONS = [
+    (1, "indexes on assessments/student_responses, one rubric per assessment",
+     _indexes_and_unique_rubrics),
+    (2, "student_responses.model_version", _response_model_version),
+    (3, "assessment_summary table kept up to date by triggers", _assessment_summary),
+    (4, "assessments (teacher_id, id) index and per-teacher listing versions", _assessment_listing),
+    (5, "users.password stored as a scrypt hash", _hash_passwords),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations; safe to call from several processes at once"""
+    for version, description, apply in MIGRATIONS:
+        if schema_version(conn) >= version:
+            continue
+
+        # IMMEDIATE takes the write lock, so concurrent workers apply each step once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) < version:
+                apply(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                print(f"✅ Applied schema migration {version}: {description}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
@@ -0,0 +1,176 @@
+import os
+import queue
+import threading
+import time
+import weakref
+
+from utils.metrics import registry as metrics
+
+_STOP = object()
+
+# Threads don't survive os.fork(): each forked worker restarts its own writer
+_queues = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for q in list(_queues):
+        q._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class WriteBehindQueue:
+    """Buffer INSERT rows in memory and write them from a background thread.
+
+    Rows are flushed with one executemany per transaction once `batch_size`
+    rows are waiting or `flush_interval` seconds have passed since the first
+    one arrived. The queue is bounded: when it stays full for `put_timeout`
+    seconds the rows are dropped and counted, and submit() returns False so
+    the caller can ask the client to retry.
+
+    With durable=True every submit() writes and commits before returning,
+    for deployments that can't accept losing acknowledged rows on a crash.
+    """
+
+    def __init__(self, pool, sql, max_size=10000, batch_size=500, flush_interval=0.05,
+                 put_timeout=0.5, durable=False):
+        self.pool = pool
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.durable = durable
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'rows_written': 0,
+            'rows_dropped': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+        self._writer = None
+        self._start_writer()
+        _queues.add(self)
+
+    def _start_writer(self):
+        if not self.durable:
+            self._writer = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._writer.start()
+
+    def _reset(self):
+        # Rows queued before the fork belong to the parent's writer
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._lock = threading.Lock()
+        for key in self._stats:
+            self._stats[key] = 0
+        self._writer = None
+        if not self._closed:
+            self._start_writer()
+
+    def submit(self, row):
+        return self.submit_many([row])
+
+    def submit_many(self, rows):
+        """Queue rows for writing; returns False if they were dropped"""
+        rows = list(rows)
+        if self.durable:
+            self._flush(rows)
+            return True
+        if self._closed:
+            self._count('rows_dropped', len(rows))
+            return False
+        try:
+            self._queue.put(rows, timeout=self.put_timeout)
+        except queue.Full:
+            self._count('rows_dropped', len(rows))
+            return False
+        return True
+
+    def _count(self, key, n):
+        with self._lock:
+            self._stats[key] += n
+
+    def _run(self):
+        pending = []
+        deadline = None
+        stopping = False
+        while not (stopping and not pending):
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout) if not stopping else self._queue.get_nowait()
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.extend(item)
+
+            expired = deadline is not None and time.monotonic() >= deadline
+            if pending and (len(pending) >= self.batch_size or expired or stopping or item is None):
+                self._flush(pending)
+                pending = []
+                deadline = None
+
+    def _flush(self, rows):
+        start = time.perf_counter()
+        try:
+            with metrics.stage('db_flush'), self.pool.connection() as conn:
+                conn.executemany(self.sql, rows)
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ Write-behind flush of {len(rows)} rows failed: {e}")
+            with self._lock:
+                self._stats['flush_errors'] += 1
+                self._stats['rows_dropped'] += len(rows)
+            if self.durable:
+                raise
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+        with self._lock:
+            self._stats['rows_written'] += len(rows)
+            self._stats['flushes'] += 1
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['total_flush_ms'] += elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        total_ms = stats.pop('total_flush_ms')
+        stats['avg_flush_ms'] = total_ms / stats['flushes'] if stats['flushes'] else 0.0
+        stats['queue_depth'] = self._queue.qsize()
+        stats['durable'] = self.durable
+        return stats
+
+    def close(self, timeout=10.0):
+        """Stop accepting rows and wait for everything queued to be written"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join(timeout)
+
+        # Rows that raced in behind the stop marker are written here
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.extend(item)
+        if leftover:
+            self._flush(leftover)